@@ -0,0 +1,172 @@
+"""
+Benchmark: dictionary-encoded categorical columns vs plain TEXT
+
+Loads the same synthetic records into two SQLite files: one with the old
+text-column layout, one through SqliteStopSearchRepository (category ids).
+Compares file size, GROUP BY outcome/type time and the memory held by the
+records read back (text rows give every record its own strings; decoded ids
+share one str per distinct value).
+
+Usage:
+    python benchmarks/bench_category_encoding.py
+    python benchmarks/bench_category_encoding.py --rows 2000000
+"""
+
+import argparse
+import gc
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from stopsearch_etl.domain import RECORD_FIELDS, StopSearchRecord  # noqa: E402
+from stopsearch_etl.migrations import run_migrations  # noqa: E402
+from stopsearch_etl.read_service import ReadService  # noqa: E402
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository  # noqa: E402
+
+TEXT_SCHEMA = """
+CREATE TABLE stop_search_records (
+    id INTEGER NOT NULL, type VARCHAR(100), datetime DATETIME, gender VARCHAR(20),
+    age_range VARCHAR(20), self_defined_ethnicity VARCHAR(200), officer_defined_ethnicity VARCHAR(200),
+    legislation TEXT, object_of_search VARCHAR(100), outcome TEXT,
+    outcome_linked_to_object_of_search BOOLEAN, removal_of_more_than_outer_clothing BOOLEAN,
+    latitude FLOAT, longitude FLOAT, street_id INTEGER, street_name VARCHAR(500),
+    force VARCHAR(100) DEFAULT '' NOT NULL,
+    PRIMARY KEY (id),
+    CONSTRAINT unique_stop_search UNIQUE (datetime, latitude, longitude, type, legislation, force)
+)
+"""
+TYPES = ["Person search", "Person and Vehicle search", "Vehicle search"]
+GENDERS = ["Male", "Female", None]
+AGES = ["under 10", "10-17", "18-24", "25-34", "over 34", None]
+ETHNICITIES = [
+    "White - English/Welsh/Scottish/Northern Irish/British", "Black/African/Caribbean/Black British - Any other",
+    "Asian/Asian British - Any other Asian background", "Other ethnic group - Not stated", None,
+]
+OFFICER_ETHNICITIES = ["White", "Black", "Asian", "Other", None]
+LEGISLATION = ["Misuse of Drugs Act 1971 (section 23)", "Police and Criminal Evidence Act 1984 (section 1)",
+               "Criminal Justice and Public Order Act 1994 (section 60)", "Firearms Act 1968 (section 47)"]
+OBJECTS = ["Controlled drugs", "Offensive weapons", "Stolen goods", "Article for use in theft", None]
+OUTCOMES = ["A no further action disposal", "Arrest", "Community resolution", "Khat or Cannabis warning",
+            "Penalty Notice for Disorder", "Summons / charged by post", "Caution (simple or conditional)"]
+
+
+def records(count: int) -> list:
+    base = datetime(2023, 1, 1)
+    return [
+        StopSearchRecord(
+            type=TYPES[i % 3], datetime=base + timedelta(seconds=i * 7), gender=GENDERS[i % 3],
+            age_range=AGES[i % 6], self_defined_ethnicity=ETHNICITIES[i % 5],
+            officer_defined_ethnicity=OFFICER_ETHNICITIES[i % 5], legislation=LEGISLATION[i % 4],
+            object_of_search=OBJECTS[i % 5], outcome=OUTCOMES[i % 7],
+            outcome_linked_to_object_of_search=bool(i % 2), removal_of_more_than_outer_clothing=False,
+            latitude=51.3 + (i * 7919 % 10000) / 25000, longitude=-0.5 + (i * 104729 % 10000) / 10000,
+            street_id=i % 20000, street_name="On or near Shopping Area", force="metropolitan",
+        )
+        for i in range(count)
+    ]
+
+
+def load_text(db_path: str, data: list) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.execute(TEXT_SCHEMA)
+    conn.execute("CREATE INDEX ix_stop_search_outcome ON stop_search_records (outcome)")
+    conn.execute("CREATE INDEX ix_stop_search_type ON stop_search_records (type)")
+    rows = [record.as_tuple()[:1] + (record.datetime.isoformat(" ", "microseconds"),) + record.as_tuple()[2:]
+            for record in data]
+    conn.executemany(
+        f"INSERT INTO stop_search_records ({', '.join(RECORD_FIELDS)}) "
+        f"VALUES ({', '.join('?' * len(RECORD_FIELDS))})",
+        rows,
+    )
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def load_encoded(db_path: str, data: list) -> None:
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    run_migrations(engine)
+    session = sessionmaker(bind=engine)()
+    SqliteStopSearchRepository(session).save_batch(data)
+    session.close()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("VACUUM")
+    engine.dispose()
+
+
+def best_ms(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def held_bytes(fn) -> int:
+    """Bytes still allocated by what fn returns"""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = records(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        text_path, encoded_path = os.path.join(tmp, "text.db"), os.path.join(tmp, "encoded.db")
+        load_text(text_path, data)
+        load_encoded(encoded_path, data)
+        del data
+
+        text_conn = sqlite3.connect(text_path)
+        engine = create_engine(f"sqlite:///{encoded_path}")
+        session = sessionmaker(bind=engine)()
+        read_service = ReadService(SqliteStopSearchRepository(session))
+
+        def text_group_by():  # same queries as get_summary_stats, on the text columns
+            text_conn.execute("SELECT count(*) FROM stop_search_records").fetchall()
+            text_conn.execute("SELECT type, count(type) FROM stop_search_records GROUP BY type").fetchall()
+            text_conn.execute("SELECT outcome, count(outcome) FROM stop_search_records "
+                              "WHERE outcome IS NOT NULL GROUP BY outcome").fetchall()
+
+        def text_records():
+            return [StopSearchRecord(*row) for row in text_conn.execute(
+                f"SELECT {', '.join(RECORD_FIELDS)} FROM stop_search_records "
+                "WHERE datetime >= '2023-01-01' AND datetime < '2023-02-01'"
+            )]
+
+        print(f"{args.rows:,} rows")
+        print(f"{'':<24} {'text':>10} {'encoded':>10}")
+        print(f"{'file MB':<24} {os.path.getsize(text_path) / 1e6:>10.1f} "
+              f"{os.path.getsize(encoded_path) / 1e6:>10.1f}")
+        print(f"{'GROUP BY type+outcome ms':<24} {best_ms(args.repeat, text_group_by):>10.1f} "
+              f"{best_ms(args.repeat, read_service.get_summary_stats):>10.1f}")
+        print(f"{'January records MB':<24} {held_bytes(text_records) / 1e6:>10.1f} "
+              f"{held_bytes(lambda: read_service.get_records_by_month('2023-01')) / 1e6:>10.1f}")
+
+        session.close()
+        engine.dispose()
+        text_conn.close()
+
+
+if __name__ == "__main__":
+    main()
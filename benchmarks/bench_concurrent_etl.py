@@ -0,0 +1,101 @@
+"""
+Benchmark: ConcurrentEtlService throughput from 1 to 32 workers
+
+Runs a full backfill against a fake API that sleeps to simulate network
+latency, loading into a real SQLite file through the single-writer pipeline.
+Fetching should scale with workers until the writer (or the GIL spent
+parsing) becomes the bottleneck.
+
+Usage:
+    python benchmarks/bench_concurrent_etl.py
+    python benchmarks/bench_concurrent_etl.py --months 96 --records 2000 --latency-ms 250
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from stopsearch_etl.concurrent_etl import ConcurrentEtlService  # noqa: E402
+from stopsearch_etl.etl_service import EtlService  # noqa: E402
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository  # noqa: E402
+
+
+class FakeApi:
+    """Stands in for HttpPoliceApiClient: fixed latency, synthetic month payloads"""
+
+    def __init__(self, months: list[str], records_per_month: int, latency_s: float):
+        self.months = months
+        self.records_per_month = records_per_month
+        self.latency_s = latency_s
+
+    def get_available_months(self, force: str) -> list[str]:
+        return list(self.months)
+
+    def fetch_stops(self, force: str, year_month: str) -> list[dict]:
+        time.sleep(self.latency_s)
+        return [
+            {
+                "type": "Person search",
+                "datetime": f"{year_month}-{1 + i % 28:02d}T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}+00:00",
+                "gender": "Male",
+                "age_range": "25-34",
+                "officer_defined_ethnicity": "White",
+                "legislation": "Misuse of Drugs Act 1971 (section 23)",
+                "object_of_search": "Controlled drugs",
+                "outcome": "A no further action disposal",
+                "location": {
+                    "latitude": f"{51.5 + (i % 1000) / 10000:.4f}",
+                    "longitude": "-0.1200",
+                    "street": {"id": i % 500, "name": "On or near High Street"},
+                },
+            }
+            for i in range(self.records_per_month)
+        ]
+
+
+def run(workers: int, api: FakeApi, db_path: str) -> tuple[float, int]:
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    etl_service = EtlService(api, SqliteStopSearchRepository(session))
+    service = ConcurrentEtlService(api, etl_service, max_workers=workers)
+
+    start = time.perf_counter()
+    result = service.backfill_force_concurrent("metropolitan")
+    elapsed = time.perf_counter() - start
+
+    session.close()
+    engine.dispose()
+    return elapsed, result.total_records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--months", type=int, default=48)
+    parser.add_argument("--records", type=int, default=1_000, help="records per month")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="simulated API latency")
+    args = parser.parse_args()
+
+    months = [f"{2000 + m // 12}-{m % 12 + 1:02d}" for m in range(args.months)]
+    api = FakeApi(months, args.records, args.latency_ms / 1000)
+
+    print(f"{'workers':>8} {'seconds':>9} {'months/s':>9} {'records/s':>10} {'speedup':>8}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            elapsed, records = run(workers, api, os.path.join(tmp, f"bench_{workers}.db"))
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>9.2f} {args.months / elapsed:>9.1f} "
+                  f"{records / elapsed:>10,.0f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: all-forces refresh, MultiForceRunner vs ConcurrentMultiForceRunner
+
+Simulates --forces forces with uneven histories (the biggest has --months
+months, the rest fewer) behind a fake API with fixed latency, and loads into
+a real SQLite file. The sequential runner takes the sum of every force; the
+concurrent one should land near the slowest force's own time once
+--in-flight is large enough.
+
+Usage:
+    python benchmarks/bench_multi_force.py
+    python benchmarks/bench_multi_force.py --forces 43 --months 36 --latency-ms 200 --in-flight 16
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from stopsearch_etl.backfill_service import BackfillService  # noqa: E402
+from stopsearch_etl.etl_service import EtlService  # noqa: E402
+from stopsearch_etl.multi_force_runner import ConcurrentMultiForceRunner, MultiForceRunner  # noqa: E402
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository  # noqa: E402
+
+
+class FakeApi:
+    """Stands in for HttpPoliceApiClient: fixed latency, force i has a shorter history than force 0"""
+
+    def __init__(self, forces: list, months: int, records_per_month: int, latency_s: float):
+        self.histories = {
+            force: [f"{2015 + m // 12}-{1 + m % 12:02d}" for m in range(max(1, months - index % months))]
+            for index, force in enumerate(forces)
+        }
+        self.records_per_month = records_per_month
+        self.latency_s = latency_s
+
+    def get_available_months(self, force: str) -> list:
+        return list(self.histories[force])
+
+    def fetch_stops(self, force: str, year_month: str) -> list:
+        time.sleep(self.latency_s)
+        return [
+            {"type": "Person search", "datetime": f"{year_month}-{1 + i % 28:02d}T{i % 24:02d}:{i % 60:02d}:00+00:00",
+             "legislation": force, "location": {"latitude": "51.5", "longitude": "-0.1"}}
+            for i in range(self.records_per_month)
+        ]
+
+
+def run(runner_class, api: FakeApi, db_path: str, **kwargs) -> float:
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    etl_service = EtlService(api, SqliteStopSearchRepository(session))
+    runner = runner_class(BackfillService(api, etl_service), **kwargs)
+
+    start = time.perf_counter()
+    summary = runner.run_backfill(list(api.histories))
+    elapsed = time.perf_counter() - start
+
+    assert summary.total_months_failed == 0
+    session.close()
+    engine.dispose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--forces", type=int, default=12)
+    parser.add_argument("--months", type=int, default=12, help="history of the biggest force")
+    parser.add_argument("--records", type=int, default=200, help="records per month")
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--in-flight", type=int, default=16)
+    parser.add_argument("--per-force", type=int, default=4)
+    args = parser.parse_args()
+
+    api = FakeApi([f"force-{i}" for i in range(args.forces)], args.months, args.records, args.latency_ms / 1000)
+    slowest = max(len(months) for months in api.histories.values()) * api.latency_s / args.per_force
+    task_count = sum(len(months) for months in api.histories.values())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # per-month progress goes to logging, which isn't configured here, so it stays quiet
+        sequential = run(MultiForceRunner, api, os.path.join(tmp, "sequential.db"))
+        concurrent = run(ConcurrentMultiForceRunner, api, os.path.join(tmp, "concurrent.db"),
+                         max_in_flight=args.in_flight, per_force_limit=args.per_force)
+
+    print(f"{args.forces} forces, {task_count} force-months, {args.latency_ms:g} ms per fetch")
+    print(f"{'sequential':<28} {sequential:>7.2f} s")
+    print(f"{f'concurrent ({args.in_flight} in flight)':<28} {concurrent:>7.2f} s  ({sequential / concurrent:.1f}x)")
+    print(f"{'slowest force, alone':<28} {slowest:>7.2f} s  (its months / per-force cap)")
+
+
+if __name__ == "__main__":
+    main()
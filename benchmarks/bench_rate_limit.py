@@ -0,0 +1,102 @@
+"""
+Benchmark: shared token bucket vs bouncing off 429s
+
+Starts a local stub API that allows --server-rate requests per second
+(burst --server-burst) and answers 429 with Retry-After: 1 beyond that, then
+fetches --requests months from --threads threads through HttpPoliceApiClient,
+once without a rate limiter (urllib3 retries do the pacing) and once with a
+TokenBucket set just under the server's limit.
+
+Usage:
+    python benchmarks/bench_rate_limit.py
+    python benchmarks/bench_rate_limit.py --threads 32 --requests 300 --server-rate 15
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from stopsearch_etl.api import ApiError  # noqa: E402
+from stopsearch_etl.http_client import HttpPoliceApiClient  # noqa: E402
+from stopsearch_etl.ratelimit import TokenBucket  # noqa: E402
+
+
+def start_server(rate: float, burst: int):
+    """Stub API enforcing its own token bucket; returns (server, counters)"""
+    counters = {"ok": 0, "throttled": 0}
+    limiter = TokenBucket(rate, burst)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with lock:
+                limiter._refill(limiter.clock())
+                allowed = limiter._tokens >= 1
+                if allowed:
+                    limiter._tokens -= 1
+                counters["ok" if allowed else "throttled"] += 1
+            body = b"[]" if allowed else b""
+            self.send_response(200 if allowed else 429)
+            if not allowed:
+                self.send_header("Retry-After", "1")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+
+def run(args, rate_limiter):
+    server, counters = start_server(args.server_rate, args.server_burst)
+    time.sleep(args.server_burst / args.server_rate)  # let the server's bucket fill
+    client = HttpPoliceApiClient(base_url=f"http://127.0.0.1:{server.server_port}/api",
+                                 max_retries=10, backoff_factor=0.5, rate_limiter=rate_limiter)
+    failures = 0
+
+    def fetch(i):
+        nonlocal failures
+        try:
+            client.fetch_stops("metropolitan", f"m{i}")
+        except ApiError:
+            failures += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(fetch, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    return elapsed, counters["throttled"], failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=150)
+    parser.add_argument("--server-rate", type=float, default=15)
+    parser.add_argument("--server-burst", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{args.requests} requests, {args.threads} threads, server allows {args.server_rate:g}/s "
+          f"(burst {args.server_burst})")
+    print(f"{'client':<14} {'seconds':>8} {'req/s':>7} {'429s':>6} {'failed':>7}")
+    for name, limiter in [("no limiter", None),
+                          ("token bucket", TokenBucket(args.server_rate * 0.95, args.server_burst))]:
+        elapsed, throttled, failures = run(args, limiter)
+        print(f"{name:<14} {elapsed:>8.2f} {args.requests / elapsed:>7.1f} {throttled:>6} {failures:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: ReadService.get_records_by_* before/after the secondary indexes
+
+Fills a SQLite file with synthetic rows, times every get_records_by_* query
+(plus get_records_near_location and get_summary_stats) with no secondary
+indexes and the old extract() month filter, then runs the migrations and
+times them again with the half-open range filter.
+
+Usage:
+    python benchmarks/bench_read_queries.py
+    python benchmarks/bench_read_queries.py --rows 5000000 --repeat 5
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import and_, create_engine, extract  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from stopsearch_etl.migrations import run_migrations  # noqa: E402
+from stopsearch_etl.read_service import ReadService  # noqa: E402
+from stopsearch_etl.sqlite_repository import (  # noqa: E402
+    RECORD_COLUMNS,
+    Base,
+    SqliteStopSearchRepository,
+    StopSearchTable,
+)
+
+EPOCH = datetime(2015, 1, 1)
+TYPES = ["Person search", "Person and Vehicle search", "Vehicle search"]
+
+
+def prefill(db_path: str, rows: int, chunk: int = 100_000) -> None:
+    """~10 years of rows, 1,000 distinct outcomes, a rare type every 1,000th row"""
+    spacing = timedelta(days=3650) / rows
+    conn = sqlite3.connect(db_path)
+    # categorical columns are stored as category_values ids
+    categories = [("type", name) for name in TYPES + ["Vehicle only search"]]
+    categories += [("legislation", "Police Act")] + [("outcome", f"Outcome {i}") for i in range(1000)]
+    conn.executemany("INSERT INTO category_values (category, value) VALUES (?, ?)", categories)
+    ids = {(category, value): row_id for row_id, category, value in
+           conn.execute("SELECT id, category, value FROM category_values")}
+    for chunk_start in range(0, rows, chunk):
+        batch = [
+            (
+                ids["type", "Vehicle only search" if i % 1000 == 0 else TYPES[i % 3]],
+                (EPOCH + spacing * i).isoformat(sep=" ", timespec="microseconds"),
+                ids["legislation", "Police Act"],
+                ids["outcome", f"Outcome {i % 1000}"],
+                51.3 + (i * 7919 % 10000) / 25000,
+                -0.5 + (i * 104729 % 10000) / 10000,
+            )
+            for i in range(chunk_start, min(chunk_start + chunk, rows))
+        ]
+        conn.executemany(
+            "INSERT INTO stop_search_records (type_id, datetime, legislation_id, outcome_id, latitude, longitude) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            batch,
+        )
+        conn.commit()
+    conn.close()
+
+
+def legacy_records_by_month(read_service: ReadService, year_month: str) -> list:
+    """The old extract() filter, kept here only for comparison"""
+    year, month = (int(part) for part in year_month.split("-"))
+    rows = read_service.session.query(*RECORD_COLUMNS).filter(
+        and_(
+            extract("year", StopSearchTable.datetime) == year,
+            extract("month", StopSearchTable.datetime) == month,
+        )
+    ).all()
+    return [read_service._row_to_domain(row) for row in rows]
+
+
+def best_of(repeat: int, fn) -> tuple[float, int]:
+    best, found = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = len(fn())
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per query")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{db_path}")
+        Base.metadata.create_all(engine)
+        print(f"filling {args.rows:,} rows...")
+        prefill(db_path, args.rows)
+
+        session = sessionmaker(bind=engine)()
+        read_service = ReadService(SqliteStopSearchRepository(session))
+
+        queries = {
+            "get_records_by_month": (
+                lambda: legacy_records_by_month(read_service, "2020-06"),
+                lambda: read_service.get_records_by_month("2020-06"),
+            ),
+            "get_records_by_outcome": (lambda: read_service.get_records_by_outcome("Outcome 42"),) * 2,
+            "get_records_by_type": (lambda: read_service.get_records_by_type("Vehicle only search"),) * 2,
+            "get_records_near_location": (
+                lambda: read_service.get_records_near_location(51.5, -0.12, radius_km=0.5),
+            ) * 2,
+            "get_summary_stats": (lambda: [read_service.get_summary_stats()],) * 2,
+        }
+
+        before = {name: best_of(args.repeat, fns[0]) for name, fns in queries.items()}
+        run_migrations(engine)
+        session.expire_all()
+        after = {name: best_of(args.repeat, fns[1]) for name, fns in queries.items()}
+
+        print(f"{'query':<27} {'rows':>7} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for name in queries:
+            (before_ms, found), (after_ms, _) = before[name], after[name]
+            print(f"{name:<27} {found:>7,} {before_ms:>10.1f} {after_ms:>10.1f} {before_ms / after_ms:>7.1f}x")
+
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark: memory and throughput of record layouts (dataclass, slots, columnar batch)
+
+Builds N records from synthetic API payloads with the current (slots=True)
+StopSearchRecord, with an otherwise identical __dict__-backed dataclass and
+as one columnar StopSearchBatch, comparing tracemalloc bytes per record and
+build time. Then times loading them into SQLite the old way (dict per row
+through SQLAlchemy's insert) against save_batch with tuples from records and
+straight from the batch's columns.
+
+Usage:
+    python benchmarks/bench_record_layout.py
+    python benchmarks/bench_record_layout.py --records 500000
+"""
+
+import argparse
+import dataclasses
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.dialects.sqlite import insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from stopsearch_etl.batch import StopSearchBatch  # noqa: E402
+from stopsearch_etl.domain import RECORD_FIELDS, StopSearchRecord  # noqa: E402
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository, StopSearchTable  # noqa: E402
+
+# same fields, same from_api_data, but with a per-instance __dict__ (the old layout)
+DictRecord = dataclasses.make_dataclass(
+    "DictRecord",
+    [(f.name, f.type, f) for f in dataclasses.fields(StopSearchRecord)],
+    namespace={"from_api_data": classmethod(StopSearchRecord.from_api_data.__func__)},
+)
+
+
+def payloads(count: int) -> list:
+    return [
+        {
+            "type": "Person search",
+            "datetime": f"2023-01-{1 + i % 28:02d}T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}+00:00",
+            "gender": "Male",
+            "age_range": "18-24",
+            "self_defined_ethnicity": "White - English/Welsh/Scottish/Northern Irish/British",
+            "officer_defined_ethnicity": "White",
+            "legislation": "Misuse of Drugs Act 1971 (section 23)",
+            "object_of_search": "Controlled drugs",
+            "outcome": "A no further action disposal",
+            "outcome_linked_to_object_of_search": None,
+            "removal_of_more_than_outer_clothing": False,
+            "location": {
+                "latitude": f"{51.4 + (i % 5000) / 25000:.6f}",
+                "longitude": f"{-0.3 + (i % 7000) / 14000:.6f}",
+                "street": {"id": 1_000_000 + i, "name": "On or near Shopping Area"},
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def build(record_class, raw: list) -> tuple:
+    """(records, seconds, traced bytes) for building every record"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = [record_class.from_api_data(data, "metropolitan") for data in raw]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return records, elapsed, current
+
+
+def build_batch(raw: list) -> tuple:
+    """(batch, seconds, traced bytes) for one columnar batch"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    batch = StopSearchBatch.from_api_data(raw, "metropolitan")
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return batch, elapsed, current
+
+
+def load(records, legacy: bool = False) -> float:
+    """Seconds to insert every record into a fresh SQLite file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        start = time.perf_counter()
+        if legacy:
+            rows = [dict(zip(RECORD_FIELDS, record.as_tuple()), force=record.force or '') for record in records]
+            session.execute(insert(StopSearchTable).on_conflict_do_nothing(), rows)
+            session.commit()
+        else:
+            SqliteStopSearchRepository(session).save_batch(records)
+        elapsed = time.perf_counter() - start
+        session.close()
+        engine.dispose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=200_000)
+    args = parser.parse_args()
+
+    raw = payloads(args.records)
+    print(f"{args.records:,} records")
+
+    dict_records, dict_seconds, dict_bytes = build(DictRecord, raw)
+    del dict_records
+    slot_records, slot_seconds, slot_bytes = build(StopSearchRecord, raw)
+    batch, batch_seconds, batch_bytes = build_batch(raw)
+
+    print(f"{'layout':<18} {'bytes/record':>13} {'build s':>8}")
+    print(f"{'dataclass':<18} {dict_bytes / args.records:>13.0f} {dict_seconds:>8.2f}")
+    print(f"{'slots dataclass':<18} {slot_bytes / args.records:>13.0f} {slot_seconds:>8.2f}")
+    print(f"{'columnar batch':<18} {batch_bytes / args.records:>13.0f} {batch_seconds:>8.2f}")
+
+    legacy_seconds = load(slot_records, legacy=True)
+    tuple_seconds = load(slot_records)
+    batch_load_seconds = load(batch)
+    print(f"\n{'insert path':<18} {'seconds':>8} {'rows/s':>10}")
+    print(f"{'dict rows':<18} {legacy_seconds:>8.2f} {args.records / legacy_seconds:>10,.0f}")
+    print(f"{'tuple rows':<18} {tuple_seconds:>8.2f} {args.records / tuple_seconds:>10,.0f}")
+    print(f"{'columnar batch':<18} {batch_load_seconds:>8.2f} {args.records / batch_load_seconds:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
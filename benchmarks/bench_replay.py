@@ -0,0 +1,106 @@
+"""
+Benchmark: raw archive size per codec and replay throughput vs decode processes
+
+Archives synthetic force-months with each available codec (size + write
+time), then replays the gzip archive into a fresh SQLite file with 0
+(in-process), 1, 2, ... decode processes. Loading is single-writer either
+way, so the speedup flattens once decoding outpaces the inserts.
+
+Usage:
+    python benchmarks/bench_replay.py
+    python benchmarks/bench_replay.py --months 48 --records 30000 --workers 0 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from stopsearch_etl.archive import CODECS, RawArchive  # noqa: E402
+from stopsearch_etl.etl_service import EtlService  # noqa: E402
+from stopsearch_etl.ledger import IngestionLedger  # noqa: E402
+from stopsearch_etl.replay import ReplayService  # noqa: E402
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository  # noqa: E402
+
+OUTCOMES = ["A no further action disposal", "Arrest", "Community resolution", "Khat or Cannabis warning"]
+
+
+def month_payload(month_index: int, records: int) -> list:
+    year, month = 2020 + month_index // 12, 1 + month_index % 12
+    return [
+        {
+            "type": "Person search",
+            "involved_person": True,
+            "datetime": f"{year}-{month:02d}-{1 + i % 28:02d}T{i % 24:02d}:{i * 7 % 60:02d}:{i % 60:02d}+00:00",
+            "operation": False,
+            "operation_name": None,
+            "gender": "Male" if i % 3 else "Female",
+            "age_range": "18-24",
+            "self_defined_ethnicity": "White - English/Welsh/Scottish/Northern Irish/British",
+            "officer_defined_ethnicity": "White",
+            "legislation": "Misuse of Drugs Act 1971 (section 23)",
+            "object_of_search": "Controlled drugs",
+            "outcome": OUTCOMES[i % 4],
+            "outcome_linked_to_object_of_search": bool(i % 2),
+            "removal_of_more_than_outer_clothing": False,
+            "location": {"latitude": f"{51.3 + i % 1000 / 2500:.6f}", "longitude": f"{-0.5 + i % 997 / 1000:.6f}",
+                         "street": {"id": 1_000_000 + i % 20000, "name": "On or near Shopping Area"}},
+        }
+        for i in range(records)
+    ]
+
+
+def replay_seconds(archive: RawArchive, db_path: str, workers: int) -> float:
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    etl_service = EtlService(None, SqliteStopSearchRepository(session), ledger=IngestionLedger(session))
+
+    start = time.perf_counter()
+    result = ReplayService(archive, etl_service, max_workers=workers).replay()
+    elapsed = time.perf_counter() - start
+
+    assert result.months_failed == 0, result.failures
+    session.close()
+    engine.dispose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--records", type=int, default=20_000, help="records per month")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    payloads = [month_payload(index, args.records) for index in range(args.months)]
+    total = args.months * args.records
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.months} months x {args.records:,} records")
+        print(f"{'codec':<8} {'archive MB':>11} {'write s':>8}")
+        for codec in CODECS:
+            archive = RawArchive(os.path.join(tmp, codec), codec)
+            start = time.perf_counter()
+            for index, payload in enumerate(payloads):
+                archive.put("metropolitan", f"m{index:03d}", payload)
+            elapsed = time.perf_counter() - start
+            size = sum(entry.size_bytes for entry in archive.entries())
+            print(f"{codec:<8} {size / 1e6:>11.1f} {elapsed:>8.2f}")
+        del payloads
+
+        archive = RawArchive(os.path.join(tmp, "gzip"), "gzip")
+        print(f"\n{'workers':<8} {'replay s':>9} {'records/s':>11}")
+        for workers in args.workers:
+            elapsed = replay_seconds(archive, os.path.join(tmp, f"replay-{workers}.db"), workers)
+            print(f"{workers:<8} {elapsed:>9.2f} {total / elapsed:>11,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: SqliteStopSearchRepository.save_batch load time vs table size
+
+Grows one SQLite file through the given sizes and times a month-sized
+save_batch (new rows + some duplicates) at each step. With driver rowcount
+accounting the time should stay flat; the old count()-based version
+(--legacy) grows with the table.
+
+Usage:
+    python benchmarks/bench_save_batch.py
+    python benchmarks/bench_save_batch.py --sizes 10000 100000 1000000 10000000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from stopsearch_etl.domain import StopSearchRecord  # noqa: E402
+from stopsearch_etl.sqlite_repository import (  # noqa: E402
+    Base,
+    SqliteStopSearchRepository,
+    StopSearchTable,
+)
+
+EPOCH = datetime(2000, 1, 1)
+
+
+def prefill(db_path: str, start: int, stop: int, chunk: int = 100_000) -> None:
+    """Bulk insert synthetic rows [start, stop) with plain sqlite3 (fast path, not timed)"""
+    conn = sqlite3.connect(db_path)
+    for chunk_start in range(start, stop, chunk):
+        rows = [
+            ((EPOCH + timedelta(seconds=i)).isoformat(sep=" "), 51.5 + (i % 1000) / 10000, -0.12)
+            for i in range(chunk_start, min(chunk_start + chunk, stop))
+        ]
+        conn.executemany(
+            "INSERT INTO stop_search_records (datetime, latitude, longitude) VALUES (?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+    conn.close()
+
+
+def month_batch(offset: int, size: int) -> list[StopSearchRecord]:
+    """Records that don't clash with the prefill (dates far in the future)"""
+    base = datetime(2090, 1, 1) + timedelta(days=offset)
+    return [
+        StopSearchRecord(
+            type="Person search", datetime=base + timedelta(seconds=i), gender="Male",
+            age_range="25-34", self_defined_ethnicity=None, officer_defined_ethnicity="White",
+            legislation="Police Act", object_of_search="Drugs", outcome="No action",
+            outcome_linked_to_object_of_search=False, removal_of_more_than_outer_clothing=False,
+            latitude=51.5, longitude=-0.12, street_id=1, street_name="High Street",
+        )
+        for i in range(size)
+    ]
+
+
+def legacy_save_batch(repo: SqliteStopSearchRepository, records: list[StopSearchRecord]) -> int:
+    """The old count() before/after accounting, kept here only for comparison"""
+    initial_count = repo.session.query(StopSearchTable).count()
+    repo.save_batch(records)
+    return repo.session.query(StopSearchTable).count() - initial_count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=5_000, help="records per month batch")
+    parser.add_argument("--dupes", type=int, default=500, help="duplicates mixed into each batch")
+    parser.add_argument("--legacy", action="store_true", help="also time the count()-based version")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{db_path}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        repo = SqliteStopSearchRepository(session)
+
+        print(f"{'rows':>12} {'save_batch ms':>14} {'inserted':>9}" + (f" {'legacy ms':>10}" if args.legacy else ""))
+        filled = 0
+        for step, size in enumerate(sorted(args.sizes)):
+            prefill(db_path, filled, size)
+            filled = size
+
+            records = month_batch(step * 2, args.batch)
+            records += records[: args.dupes]  # duplicates within the batch get ignored
+
+            start = time.perf_counter()
+            inserted = repo.save_batch(records)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            line = f"{size:>12,} {elapsed_ms:>14.1f} {inserted:>9}"
+
+            if args.legacy:
+                start = time.perf_counter()
+                legacy_save_batch(repo, month_batch(step * 2 + 1, args.batch))
+                line += f" {(time.perf_counter() - start) * 1000:>10.1f}"
+
+            print(line)
+
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: radius and k-nearest lookups, lat/lon B-tree vs R*Tree
+
+Scatters points over a Greater London sized box, then times the index
+lookup alone and the full ReadService.get_records_near_location /
+get_nearest_records calls at a few radii, with only migration 1 (B-tree on
+latitude, longitude) and again after migration 2 adds the R*Tree. The full
+calls are dominated by building ORM objects once the radius gets large.
+
+Usage:
+    python benchmarks/bench_spatial_queries.py
+    python benchmarks/bench_spatial_queries.py --rows 3000000 --radii 0.25 1 5
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from stopsearch_etl.migrations import MIGRATIONS, run_migrations  # noqa: E402
+from stopsearch_etl.read_service import ReadService  # noqa: E402
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository  # noqa: E402
+
+EPOCH = datetime(2015, 1, 1)
+LONDON = (51.28, 51.69, -0.51, 0.33)  # min_lat, max_lat, min_lon, max_lon
+
+
+def prefill(db_path: str, rows: int, chunk: int = 100_000) -> None:
+    rng = random.Random(42)
+    min_lat, max_lat, min_lon, max_lon = LONDON
+    conn = sqlite3.connect(db_path)
+    for chunk_start in range(0, rows, chunk):
+        batch = [
+            ((EPOCH + timedelta(seconds=i)).isoformat(sep=" "),
+             rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon))
+            for i in range(chunk_start, min(chunk_start + chunk, rows))
+        ]
+        conn.executemany(
+            "INSERT INTO stop_search_records (datetime, latitude, longitude) VALUES (?, ?, ?)",
+            batch,
+        )
+        conn.commit()
+    conn.close()
+
+
+def time_queries(read_service: ReadService, points, radii, k: int) -> dict:
+    timings = {}
+    for radius in radii:
+        # index lookup + haversine only, without building ORM objects for the hits
+        start = time.perf_counter()
+        found = sum(sum(1 for d, _ in read_service._candidates(lat, lon, radius) if d <= radius)
+                    for lat, lon in points)
+        timings[f"lookup {radius:g} km"] = ((time.perf_counter() - start) * 1000 / len(points), found / len(points))
+
+    for radius in radii:
+        start = time.perf_counter()
+        found = sum(len(read_service.get_records_near_location(lat, lon, radius)) for lat, lon in points)
+        timings[f"near {radius:g} km"] = ((time.perf_counter() - start) * 1000 / len(points), found / len(points))
+
+    start = time.perf_counter()
+    for lat, lon in points:
+        read_service.get_nearest_records(lat, lon, k=k)
+    timings[f"nearest k={k}"] = ((time.perf_counter() - start) * 1000 / len(points), k)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--radii", type=float, nargs="+", default=[0.25, 0.5, 1.0, 2.0])
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=20, help="random query points per measurement")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    min_lat, max_lat, min_lon, max_lon = LONDON
+    points = [(rng.uniform(min_lat + 0.05, max_lat - 0.05), rng.uniform(min_lon + 0.05, max_lon - 0.05))
+              for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        engine = create_engine(f"sqlite:///{db_path}")
+        Base.metadata.create_all(engine)
+        print(f"filling {args.rows:,} rows...")
+        prefill(db_path, args.rows)
+
+        run_migrations(engine, [m for m in MIGRATIONS if m.version == 1])
+        session = sessionmaker(bind=engine)()
+        before = time_queries(ReadService(SqliteStopSearchRepository(session)), points, args.radii, args.k)
+        session.close()
+
+        run_migrations(engine)
+        session = sessionmaker(bind=engine)()
+        after = time_queries(ReadService(SqliteStopSearchRepository(session)), points, args.radii, args.k)
+        session.close()
+
+        print(f"{'query':<16} {'avg rows':>9} {'B-tree ms':>10} {'R*Tree ms':>10} {'speedup':>8}")
+        for name, (before_ms, found) in before.items():
+            after_ms = after[name][0]
+            print(f"{name:<16} {found:>9,.0f} {before_ms:>10.2f} {after_ms:>10.2f} {before_ms / after_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
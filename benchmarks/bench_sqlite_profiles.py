@@ -0,0 +1,83 @@
+"""
+Benchmark: ingest throughput per SQLITE_PROFILE
+
+Loads the same synthetic months through SqliteStopSearchRepository.save_batch
+(one commit per month, like the ETL) into a fresh SQLite file for each
+profile, plus "default" (create_engine with no PRAGMAs: rollback journal,
+synchronous=FULL). readonly is skipped since it can't write.
+
+Usage:
+    python benchmarks/bench_sqlite_profiles.py
+    python benchmarks/bench_sqlite_profiles.py --months 120 --batch 10000 --dir /mnt/ssd
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from stopsearch_etl.domain import StopSearchRecord  # noqa: E402
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository  # noqa: E402
+from stopsearch_etl.storage import create_database_engine  # noqa: E402
+
+
+def month_batch(month: int, size: int) -> list[StopSearchRecord]:
+    base = datetime(2010, 1, 1) + timedelta(days=31 * month)
+    return [
+        StopSearchRecord(
+            type="Person search", datetime=base + timedelta(seconds=i * 7), gender="Male",
+            age_range="25-34", self_defined_ethnicity=None, officer_defined_ethnicity="White",
+            legislation="Police Act", object_of_search="Drugs", outcome="No action",
+            outcome_linked_to_object_of_search=False, removal_of_more_than_outer_clothing=False,
+            latitude=51.5 + (i % 1000) / 10000, longitude=-0.12, street_id=i % 500,
+            street_name="High Street",
+        )
+        for i in range(size)
+    ]
+
+
+def ingest(profile: str, db_path: str, months: list[list[StopSearchRecord]]) -> float:
+    url = f"sqlite:///{db_path}"
+    engine = create_engine(url) if profile == "default" else create_database_engine(url, profile)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    repo = SqliteStopSearchRepository(session)
+
+    start = time.perf_counter()
+    for records in months:
+        repo.save_batch(records)
+    elapsed = time.perf_counter() - start
+
+    session.close()
+    engine.dispose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", nargs="+", default=["default", "safe", "bulk"])
+    parser.add_argument("--months", type=int, default=60)
+    parser.add_argument("--batch", type=int, default=5_000, help="records per month")
+    parser.add_argument("--dir", help="where to put the DB files (fsync cost depends on the disk)")
+    args = parser.parse_args()
+
+    months = [month_batch(m, args.batch) for m in range(args.months)]
+    total = args.months * args.batch
+
+    print(f"{'profile':>8} {'seconds':>9} {'records/s':>11} {'ms/commit':>10}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for profile in args.profiles:
+            elapsed = ingest(profile, os.path.join(tmp, f"{profile}.db"), months)
+            print(f"{profile:>8} {elapsed:>9.2f} {total / elapsed:>11,.0f} "
+                  f"{elapsed / args.months * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
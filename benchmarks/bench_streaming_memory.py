@@ -0,0 +1,148 @@
+"""
+Benchmark: peak memory loading one big month, whole-body vs streamed
+
+Serves a synthetic stops-force month from a local HTTP server and loads it
+into SQLite with EtlService, once with response.json() (whole month in
+memory) and once streamed at a few chunk sizes. Each run is its own
+subprocess so peak RSS isn't shared; tracemalloc peak is reported too.
+
+Usage:
+    python benchmarks/bench_streaming_memory.py
+    python benchmarks/bench_streaming_memory.py --records 200000 --chunks 1000 5000 20000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from stopsearch_etl.etl_service import EtlService  # noqa: E402
+from stopsearch_etl.http_client import HttpPoliceApiClient  # noqa: E402
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository  # noqa: E402
+
+
+def month_body(records: int) -> bytes:
+    return json.dumps([
+        {
+            "age_range": "18-24",
+            "outcome": "A no further action disposal",
+            "involved_person": True,
+            "self_defined_ethnicity": "White - English/Welsh/Scottish/Northern Irish/British",
+            "gender": "Male",
+            "legislation": "Misuse of Drugs Act 1971 (section 23)",
+            "outcome_linked_to_object_of_search": None,
+            "datetime": f"2023-01-{1 + i % 28:02d}T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}+00:00",
+            "removal_of_more_than_outer_clothing": False,
+            "outcome_object": {"id": "bu-no-further-action", "name": "A no further action disposal"},
+            "location": {
+                "latitude": f"{51.4 + (i % 5000) / 25000:.6f}",
+                "street": {"id": 1_000_000 + i % 20000, "name": "On or near Shopping Area"},
+                "longitude": f"{-0.3 + (i % 7000) / 14000:.6f}",
+            },
+            "operation": False,
+            "officer_defined_ethnicity": "White",
+            "type": "Person search",
+            "operation_name": None,
+            "object_of_search": "Controlled drugs",
+        }
+        for i in range(records)
+    ]).encode()
+
+
+def serve(body: bytes) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            for start in range(0, len(body), 1 << 16):
+                self.wfile.write(body[start:start + (1 << 16)])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def peak_rss_kb() -> int:
+    """Peak RSS of this process in KiB"""
+    # ru_maxrss survives fork+exec on Linux (it would report the parent's peak,
+    # which holds the whole JSON body), so prefer VmHWM, which exec resets
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def child(base_url: str, chunk: int) -> None:
+    """One load in this process; prints a JSON result line"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        etl_service = EtlService(HttpPoliceApiClient(base_url=base_url), SqliteStopSearchRepository(session),
+                                 stream_chunk_size=chunk or None)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        saved = etl_service.extract_transform_load("metropolitan", "2023-01")
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        session.close()
+
+    print(json.dumps({"saved": saved, "seconds": elapsed, "traced_peak": peak, "max_rss_kb": peak_rss_kb()}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100_000, help="records in the month")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1_000, 5_000, 20_000])
+    parser.add_argument("--child", nargs=2, metavar=("BASE_URL", "CHUNK"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], int(args.child[1]))
+        return
+
+    body = month_body(args.records)
+    server = serve(body)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"month: {args.records:,} records, {len(body) / 1e6:.1f} MB of JSON")
+    print(f"{'mode':<14} {'traced peak MB':>15} {'max RSS MB':>11} {'seconds':>8} {'saved':>8}")
+
+    try:
+        for chunk in [0] + args.chunks:
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", base_url, str(chunk)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            mode = "whole month" if chunk == 0 else f"stream {chunk:,}"
+            print(f"{mode:<14} {result['traced_peak'] / 1e6:>15.1f} {result['max_rss_kb'] / 1024:>11.1f} "
+                  f"{result['seconds']:>8.2f} {result['saved']:>8,}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: transform throughput with the memoised timestamp parser vs plain fromisoformat
+
+Times EtlService.transform (record by record) and transform_batch (columnar)
+over a synthetic month, once with the old per-record
+datetime.fromisoformat(value.replace("Z", "+00:00")) and once with
+timestamps.parse_api_datetime. --distinct controls how many different
+timestamps the month has; by default one month where they repeat heavily and
+one where every timestamp is new.
+
+The memoised parser only wins when timestamps repeat: with 2,000 distinct
+stamps in 100,000 records (1 CPU) parsing is ~1.7x faster, transform_batch
+~1.2x and transform ~1.05x (within noise run to run). With all-distinct
+stamps every lookup misses, parsing is ~2.5x slower and transform 0.8-0.9x;
+transform_batch still dedupes per call and stays about even.
+
+Usage:
+    python benchmarks/bench_transform.py
+    python benchmarks/bench_transform.py --records 200000 --distinct 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from stopsearch_etl import batch, domain  # noqa: E402
+from stopsearch_etl.etl_service import EtlService  # noqa: E402
+from stopsearch_etl.timestamps import parse_api_datetime  # noqa: E402
+
+
+def legacy_parse(value: str) -> datetime:
+    """What from_api_data did before the memoised parser"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def legacy_parse_column(values: list) -> list:
+    parsed = []
+    for value in values:
+        try:
+            parsed.append(legacy_parse(value))
+        except (AttributeError, TypeError, ValueError):
+            parsed.append(None)
+    return parsed
+
+
+def month(records: int, distinct: int) -> list:
+    return [
+        {
+            "type": "Person search",
+            "datetime": f"2023-01-{1 + i % distinct % 28:02d}T{i % distinct // 28 % 24:02d}:"
+                        f"{i % distinct // 672 % 60:02d}:00+00:00",
+            "gender": "Male",
+            "legislation": "Misuse of Drugs Act 1971 (section 23)",
+            "location": {"latitude": "51.5", "longitude": "-0.12", "street": {"id": i, "name": "High St"}},
+        }
+        for i in range(records)
+    ]
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        parse_api_datetime.cache_clear()  # every run starts cold, like a fresh process
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, nargs="+", default=[2_000, 100_000],
+                        help="distinct timestamps in the month (one run per value)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    etl_service = EtlService(mock.Mock(), mock.Mock())
+    for distinct in args.distinct:
+        raw = month(args.records, distinct)
+        paths = {
+            "parse only": lambda: [domain.parse_api_datetime(record["datetime"]) for record in raw],
+            "transform": lambda: etl_service.transform(raw, "metropolitan"),
+            "transform_batch": lambda: etl_service.transform_batch(raw, "metropolitan"),
+        }
+
+        print(f"\n{args.records:,} records, {distinct:,} distinct timestamps")
+        print(f"{'path':<16} {'before rec/s':>13} {'after rec/s':>12} {'speedup':>8}")
+        for name, fn in paths.items():
+            with mock.patch.object(domain, "parse_api_datetime", legacy_parse), \
+                    mock.patch.object(batch, "parse_api_datetimes", legacy_parse_column):
+                before = best_of(args.repeat, fn)
+            after = best_of(args.repeat, fn)
+            print(f"{name:<16} {args.records / before:>13,.0f} {args.records / after:>12,.0f} "
+                  f"{before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from .api import ApiError
+
+logger = logging.getLogger(__name__)
+
+# answers that mean "you're sending too much": back off
+CONGESTION_STATUSES = (429, 502, 503, 504)
+
+
+@dataclass
+class AimdStats:
+    """What the controller has seen and done"""
+    completed: int = 0
+    congested: int = 0  # completions that counted as a congestion signal
+    increases: int = 0
+    decreases: int = 0
+    peak_limit: int = 0
+
+
+def is_congestion(error: Exception) -> bool:
+    """
+    Does this failure say the server (or the path to it) is overloaded?
+
+    429/5xx gateway answers do, and so do timeouts / connection errors (an
+    ApiError with no status). A 404 or a bad payload doesn't: fetching fewer
+    months at once wouldn't have helped.
+    """
+    if isinstance(error, ApiError):
+        return error.status_code is None or error.status_code in CONGESTION_STATUSES
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class AimdController:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight fetches.
+
+    Callers take a slot with acquire() and hand it back with release(), which
+    reports the fetch's latency (not counting time queued for a rate-limiter
+    token, which says nothing about the server) and error. A full window of clean completions (one per unit of the
+    current limit, like TCP's once per round trip) raises the limit by
+    `increase`. A congestion signal cuts it by `backoff`: a 429/5xx/timeout, or
+    the smoothed latency climbing past latency_tolerance x the best latency
+    seen (requests queueing somewhere). After a cut, the fetches that were
+    already in flight finish before another cut can happen, so one burst of
+    429s counts once. The limit stays within [min_limit, max_limit] and every
+    change is logged.
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 32,
+                 increase: float = 1.0, backoff: float = 0.5, latency_tolerance: float = 2.0,
+                 smoothing: float = 0.2):
+        """
+        Args:
+            initial_limit: where to start
+            min_limit / max_limit: bounds for the limit
+            increase: added after each clean window
+            backoff: multiplier on congestion (0 < backoff < 1)
+            latency_tolerance: smoothed latency / best latency that counts as congestion
+            smoothing: EWMA weight of the newest latency sample
+        """
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("need 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.stats = AimdStats(peak_limit=initial_limit)
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._clean = 0  # clean completions since the last change
+        self._cooldown = 0  # completions to let through before another cut
+        self._latency: Optional[float] = None  # EWMA
+        self._best_latency: Optional[float] = None
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def has_capacity(self) -> bool:
+        """Would acquire() go straight through right now?"""
+        return self._in_flight < self.limit
+
+    def acquire(self) -> None:
+        """Block until fewer than `limit` fetches are in flight, then count this one"""
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, latency_s: float, error: Optional[Exception] = None) -> None:
+        """Pair of acquire(): the fetch finished (error=None) or failed"""
+        with self._condition:
+            self._in_flight -= 1
+            self._observe(latency_s, error)
+            self._condition.notify_all()
+
+    def _observe(self, latency_s: float, error: Optional[Exception]) -> None:
+        self.stats.completed += 1
+        reason = None
+
+        if error is not None:
+            if is_congestion(error):
+                reason = f"error: {error}"
+        else:
+            self._latency = latency_s if self._latency is None else \
+                self.smoothing * latency_s + (1 - self.smoothing) * self._latency
+            if self._best_latency is None or latency_s < self._best_latency:
+                self._best_latency = latency_s
+            else:
+                # let the baseline drift up slowly, so a server that's simply slower
+                # today doesn't look congested forever
+                self._best_latency += (self._latency - self._best_latency) * 0.01
+            if self._latency > self._best_latency * self.latency_tolerance:
+                reason = f"latency {self._latency:.3f}s vs best {self._best_latency:.3f}s"
+
+        cooling_down = self._cooldown > 0
+        if cooling_down:
+            self._cooldown -= 1
+
+        if reason is not None:
+            self.stats.congested += 1
+            self._clean = 0
+            if not cooling_down and self._limit > self.min_limit:
+                self._set_limit(max(self.min_limit, self._limit * self.backoff), reason)
+                self.stats.decreases += 1
+                self._cooldown = self._in_flight  # those were sent at the old limit
+            return
+
+        self._clean += 1
+        if self._clean >= self.limit and self._limit < self.max_limit:
+            self._set_limit(min(self.max_limit, self._limit + self.increase), "clean window")
+            self.stats.increases += 1
+            self._clean = 0
+
+    def _set_limit(self, limit: float, reason: str) -> None:
+        old = self.limit
+        self._limit = limit
+        self.stats.peak_limit = max(self.stats.peak_limit, self.limit)
+        if self.limit != old:
+            logger.info("Concurrency limit %d -> %d (%s)", old, self.limit, reason,
+                        extra={"old_limit": old, "new_limit": self.limit, "reason": reason})
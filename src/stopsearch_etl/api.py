@@ -1,10 +1,32 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
 
 
 # Custom error just for our Police API
 class ApiError(Exception):
     """Raised when API requests fail or return unexpected data."""
-    pass
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code  # HTTP status, when the server answered at all
+
+
+@dataclass
+class ConditionalStops:
+    """
+    Result of a conditional stops fetch (see HttpPoliceApiClient.fetch_stops_conditional).
+
+    records is None when the server answered 304 Not Modified; etag and
+    last_modified are the validators to send next time.
+    """
+    records: Optional[List[dict]]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.records is None
 
 
 class PoliceApiClient(ABC):
@@ -24,6 +46,15 @@ class PoliceApiClient(ABC):
         """
         pass
 
+    def iter_stops(self, force: str, year_month: str) -> Iterator[dict]:
+        """
+        Same records as fetch_stops, yielded one at a time.
+
+        Default just walks fetch_stops; clients that can decode the response
+        as it arrives override this so a big month never sits in memory whole.
+        """
+        yield from self.fetch_stops(force, year_month)
+
     @abstractmethod
     def get_available_months(self, force: str) -> list[str]:
         """
@@ -35,4 +66,14 @@ class PoliceApiClient(ABC):
         Returns:
             List of available months in YYYY-MM format
         """
-        pass
\ No newline at end of file
+        pass
+
+    def get_availability(self) -> List[dict]:
+        """
+        Full availability matrix: every month, with the forces that have stop
+        & search data for it ({"date": "YYYY-MM", "stop-and-search": [...]}).
+
+        Optional: clients that can't fetch it in one go leave this as is, and
+        AvailabilityCatalogue asks get_available_months force by force instead.
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no availability matrix")
@@ -0,0 +1,213 @@
+import gzip
+import hashlib
+import json
+import logging
+import lzma
+import os
+import threading
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd archives need the zstandard package
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# codec -> (file suffix, opener); zstd only when zstandard is installed
+CODECS = {
+    "gzip": (".gz", lambda path, mode: gzip.open(path, mode, compresslevel=6)),
+    "lzma": (".xz", lambda path, mode: lzma.open(path, mode)),
+}
+if zstandard is not None:
+    CODECS["zstd"] = (".zst", lambda path, mode: zstandard.open(path, mode))
+
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def default_codec() -> str:
+    """Best codec we can use here: zstd if available, else gzip"""
+    return "zstd" if "zstd" in CODECS else "gzip"
+
+
+def _payload_line(raw_record: dict) -> bytes:
+    # same serialisation as ledger.PayloadHasher, so an object's sha256 is the payload_hash
+    return json.dumps(raw_record, sort_keys=True, separators=(",", ":")).encode() + b"\n"
+
+
+@dataclass
+class ArchiveEntry:
+    """One archived force-month payload (a line of the manifest)"""
+    force: str
+    month: str
+    sha256: str  # of the uncompressed payload, equal to the ledger's payload_hash
+    codec: str
+    record_count: int
+    size_bytes: int  # compressed
+    archived_at: str
+
+
+class ArchiveWriter:
+    """
+    Writes one force-month payload into the archive as the records go past.
+
+    Records are compressed into a temporary file and hashed on the way, so a
+    streamed month is never held in memory. commit() moves the file to its
+    content address (or drops it if that payload is already stored) and adds
+    the manifest line; abort() throws it away.
+    """
+
+    def __init__(self, archive: "RawArchive", force: str, month: str):
+        self.archive = archive
+        self.force = force
+        self.month = month
+        self.record_count = 0
+        self._digest = hashlib.sha256()
+        self._temp_path = os.path.join(archive.root, "tmp", f"{uuid.uuid4().hex}.part")
+        self._file = CODECS[archive.codec][1](self._temp_path, "wb")
+
+    def add(self, raw_record: dict) -> None:
+        line = _payload_line(raw_record)
+        self._digest.update(line)
+        self._file.write(line)
+        self.record_count += 1
+
+    def tee(self, raw_records: Iterable[dict]) -> Iterator[dict]:
+        """Pass records through unchanged, archiving each one"""
+        for raw_record in raw_records:
+            self.add(raw_record)
+            yield raw_record
+
+    def commit(self) -> ArchiveEntry:
+        self._file.close()
+        digest = self._digest.hexdigest()
+        path = self.archive.find_object(digest)
+
+        if path is not None:
+            os.remove(self._temp_path)  # same payload archived before (maybe another month)
+            codec = self.archive.codec_of(path)
+        else:
+            path = self.archive.object_path(digest, self.archive.codec)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._temp_path, path)  # atomic: readers never see half an object
+            codec = self.archive.codec
+
+        entry = ArchiveEntry(
+            force=self.force,
+            month=self.month,
+            sha256=digest,
+            codec=codec,
+            record_count=self.record_count,
+            size_bytes=os.path.getsize(path),
+            archived_at=datetime.utcnow().isoformat(timespec="seconds"),
+        )
+        self.archive.add_entry(entry)
+        return entry
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+
+class RawArchive:
+    """
+    Content-addressed store of raw API payloads, one compressed JSON-lines
+    object per distinct payload.
+
+    Layout under root:
+        objects/ab/abcdef....jsonl.gz   one record per line, keys sorted
+        manifest.jsonl                  one ArchiveEntry per archived force-month
+
+    The manifest is append-only; when a force-month is archived again the
+    latest line wins. Safe to write from several threads of one process.
+    """
+
+    def __init__(self, root: str, codec: Optional[str] = None):
+        codec = codec or default_codec()
+        if codec not in CODECS:
+            raise ValueError(f"Unknown archive codec '{codec}'. Available: {sorted(CODECS)}")
+
+        self.root = root
+        self.codec = codec
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "tmp"), exist_ok=True)
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def writer(self, force: str, month: str) -> ArchiveWriter:
+        return ArchiveWriter(self, force, month)
+
+    def put(self, force: str, month: str, raw_records: Iterable[dict]) -> ArchiveEntry:
+        """Archive a whole payload that's already in memory"""
+        writer = self.writer(force, month)
+        try:
+            for raw_record in raw_records:
+                writer.add(raw_record)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def add_entry(self, entry: ArchiveEntry) -> None:
+        line = json.dumps(asdict(entry), sort_keys=True) + "\n"
+        with self._lock, open(self.manifest_path, "a", encoding="utf-8") as manifest:
+            manifest.write(line)
+
+    def entries(self, forces: Optional[List[str]] = None) -> List[ArchiveEntry]:
+        """Latest entry per force-month, sorted by force then month"""
+        latest: Dict[tuple, ArchiveEntry] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as manifest:
+                for line in manifest:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = ArchiveEntry(**json.loads(line))
+                    except (TypeError, ValueError):
+                        # e.g. a line cut short by a crash mid-append
+                        logger.warning("Skipping unreadable manifest line: %r", line[:80])
+                        continue
+                    latest[(entry.force, entry.month)] = entry
+
+        return [
+            entry for key, entry in sorted(latest.items())
+            if forces is None or entry.force in forces
+        ]
+
+    def read(self, entry: ArchiveEntry) -> Iterator[dict]:
+        """
+        Decompress an entry's payload one record at a time.
+
+        The content is hashed on the way; once the last record has been read a
+        mismatch with entry.sha256 (damaged object) raises ValueError.
+        """
+        digest = hashlib.sha256()
+        path = self.object_path(entry.sha256, entry.codec)
+        with CODECS[entry.codec][1](path, "rb") as payload:
+            for line in payload:
+                digest.update(line)
+                yield json.loads(line)
+
+        if digest.hexdigest() != entry.sha256:
+            raise ValueError(f"Archived payload for {entry.force} {entry.month} is corrupt: {path}")
+
+    def object_path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.jsonl{CODECS[codec][0]}")
+
+    def find_object(self, digest: str) -> Optional[str]:
+        """Path of a stored payload in whichever codec it was written with"""
+        for codec in CODECS:
+            path = self.object_path(digest, codec)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def codec_of(self, path: str) -> str:
+        return next(codec for codec, (suffix, _) in CODECS.items() if path.endswith(suffix))
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+from .api import ApiError
+from .async_http_client import AsyncPoliceApiClient
+from .availability import AvailabilityCatalogue
+from .backfill_service import BackfillResult
+from .etl_service import EtlService
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEtlService:
+    """Fetch lots of force-months at once from one thread using asyncio"""
+
+    def __init__(self, api_client: AsyncPoliceApiClient, etl_service: EtlService,
+                 max_concurrency: int = 100):
+        """
+        Args:
+            api_client: async client used for every fetch
+            etl_service: does transform + load for each fetched month
+            max_concurrency: how many fetches may be in flight at once
+        """
+        self.api_client = api_client
+        self.etl_service = etl_service
+        self.max_concurrency = max_concurrency
+
+    def run_backfill(self, forces: List[str]) -> List[BackfillResult]:
+        """Blocking wrapper: backfill these forces and close the client afterwards"""
+
+        async def _run() -> List[BackfillResult]:
+            async with self.api_client:
+                return await self.backfill_forces(forces)
+
+        return asyncio.run(_run())
+
+    async def backfill_forces(self, forces: List[str]) -> List[BackfillResult]:
+        """
+        Backfill every available month for each force, all fetched concurrently
+
+        Returns:
+            One BackfillResult per force, in the order given
+        """
+        results = {force: BackfillResult(force=force, total_records=0, months_processed=0)
+                   for force in forces}
+
+        # one availability request covers every force
+        catalogue = AvailabilityCatalogue()
+        try:
+            catalogue.load(await self.api_client.get_availability())
+        except ApiError as e:
+            logger.error("Failed to get available months: %s", e)
+            return [results[force] for force in forces]
+
+        tasks = [(force, month) for force in forces for month in catalogue.months_for(force)]
+
+        await self.run_tasks(tasks, results)
+        return [results[force] for force in forces]
+
+    async def run_tasks(self, tasks: List[Tuple[str, str]],
+                        results: Dict[str, BackfillResult]) -> Dict[str, BackfillResult]:
+        """
+        Run ETL for a list of (force, month) pairs, adding the outcome to results
+
+        Transform + load happen on the event loop thread as each fetch lands, so the
+        repository is only ever touched from this one thread.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _fetch(force: str, month: str) -> List[dict]:
+            async with semaphore:
+                return await self.api_client.fetch_stops(force, month)
+
+        pending = {
+            asyncio.ensure_future(_fetch(force, month)): (force, month)
+            for force, month in tasks
+        }
+
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                force, month = pending.pop(future)
+                result = results.setdefault(
+                    force, BackfillResult(force=force, total_records=0, months_processed=0)
+                )
+                try:
+                    raw_records = future.result()
+                except Exception as e:
+                    self.etl_service.record_failure(force, month, e)
+                    result.months_failed += 1
+                    logger.error("Failed %s %s: %s", force, month, e,
+                                 extra={"force": force, "month": month, "error": str(e)})
+                    continue
+
+                try:
+                    records_saved = self.etl_service.transform_load(force, month, raw_records)
+                    result.total_records += records_saved
+                    result.months_processed += 1
+                    logger.info("Completed %s %s: %d records", force, month, records_saved,
+                                extra={"force": force, "month": month, "records_saved": records_saved})
+                except Exception as e:
+                    result.months_failed += 1
+                    logger.error("Failed %s %s: %s", force, month, e,
+                                 extra={"force": force, "month": month, "error": str(e)})
+
+        return results
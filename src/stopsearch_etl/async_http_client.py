@@ -0,0 +1,130 @@
+import asyncio
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from .api import ApiError
+from .ratelimit import RETRY_AFTER_STATUSES, TokenBucket
+
+# same statuses HttpPoliceApiClient retries on
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# urllib3 Retry.DEFAULT_BACKOFF_MAX
+BACKOFF_MAX = 120.0
+
+
+class AsyncPoliceApiClient:
+    """asyncio HTTP client for the Police API, all requests share one keep-alive pool"""
+
+    def __init__(self, timeout: int = 30, max_retries: int = 3, backoff_factor: float = 1.0,
+                 max_per_host: int = 10, base_url: str = "https://data.police.uk/api",
+                 rate_limiter: Optional[TokenBucket] = None):
+        """
+        Args:
+            timeout: total seconds per request attempt
+            max_retries: retries after the first attempt (same meaning as Retry(total=...))
+            backoff_factor: same meaning as urllib3 Retry backoff_factor
+            max_per_host: max open connections to one host (caps in-flight requests)
+            base_url: API root, override for a local stub server
+            rate_limiter: shared request budget (every attempt, retries included, takes a token)
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_per_host = max_per_host
+        self.rate_limiter = rate_limiter
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncPoliceApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the connection pool"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Lazily build the shared session (must be created inside the running loop)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.max_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def fetch_stops(self, force: str, year_month: str) -> List[Dict]:
+        """Get stop & search data for one force and month"""
+        return await self._get_json({"force": force, "date": year_month})
+
+    async def get_available_months(self, force: str) -> List[str]:
+        """List months that have stop & search for this force"""
+        availability_data = await self._get_json({"force": force})
+
+        # keep only months where this force shows up under stop-and-search
+        available_months = []
+        for month_data in availability_data:
+            if "stop-and-search" in month_data and force in month_data["stop-and-search"]:
+                available_months.append(month_data["date"])
+
+        return available_months
+
+    async def get_availability(self) -> List[Dict]:
+        """Full availability matrix (every month, every force) in one request"""
+        return await self._get_json({}, endpoint="crimes-street-dates")
+
+    async def _get_json(self, params: Dict[str, str], endpoint: str = "stops-force"):
+        """GET an endpoint with the same retry/backoff rules as the requests Retry"""
+        url = f"{self.base_url}/{endpoint}"
+        session = self._get_session()
+        errors = 0
+
+        while True:
+            retry_after = None
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status in RETRY_AFTER_STATUSES and self.rate_limiter is not None:
+                        self.rate_limiter.throttled(self._parse_retry_after(response.headers.get("Retry-After")))
+                    if response.status in RETRY_STATUSES and errors < self.max_retries:
+                        if response.status in RETRY_AFTER_STATUSES:
+                            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                    elif response.status >= 400:
+                        if response.status in RETRY_STATUSES:
+                            raise ApiError(f"HTTP error {response.status}: too many retries",
+                                           status_code=response.status)
+                        raise ApiError(f"HTTP error {response.status}: {response.reason}",
+                                       status_code=response.status)
+                    else:
+                        try:
+                            return await response.json(content_type=None)
+                        except ValueError as e:
+                            raise ApiError(f"Invalid JSON response: {e}")
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if errors >= self.max_retries:
+                    raise ApiError(f"Request failed: {e}")
+
+            errors += 1
+            await asyncio.sleep(retry_after if retry_after is not None else self._backoff_time(errors))
+
+    def _backoff_time(self, consecutive_errors: int) -> float:
+        """urllib3 Retry.get_backoff_time: nothing before the first retry, then factor * 2^(n-1)"""
+        if consecutive_errors <= 1:
+            return 0.0
+        return min(BACKOFF_MAX, self.backoff_factor * (2 ** (consecutive_errors - 1)))
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-After in seconds (we don't bother with the HTTP-date form)"""
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
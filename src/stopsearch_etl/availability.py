@@ -0,0 +1,144 @@
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .api import PoliceApiClient
+
+
+class AvailabilityCatalogue:
+    """
+    Which months exist for which force, fetched once and shared.
+
+    The API hands back the whole availability matrix (every month, every force)
+    in one response, so we pull it once, index it both ways and keep it for
+    ttl_seconds. BackfillService, ConcurrentEtlService and the scheduler all
+    read from the same catalogue, so a run makes one availability request
+    instead of one per force.
+
+    Clients without get_availability() (the PoliceApiClient default raises
+    NotImplementedError) are asked get_available_months() per force instead,
+    cached the same way. The catalogue then only knows the forces looked up
+    so far, and availability_hash() is None (no republish detection).
+    """
+
+    def __init__(self, api_client: Optional[PoliceApiClient] = None, ttl_seconds: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            api_client: a PoliceApiClient, ideally with get_availability(); None means load() only
+            ttl_seconds: how long a fetched matrix is trusted before refetching
+            clock: monotonic time source (swap out in tests)
+        """
+        self.api_client = api_client
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._fetched_at: Optional[float] = None
+        self._months_by_force: Dict[str, List[str]] = {}
+        self._forces_by_month: Dict[str, List[str]] = {}
+        self._per_force = False  # no matrix from this client: get_available_months per force
+        self._force_fetched_at: Dict[str, float] = {}
+
+    def months_for(self, force: str) -> List[str]:
+        """Months with stop & search data for this force, newest first"""
+        self._ensure_fresh(force)
+        return list(self._months_by_force.get(force, []))
+
+    def forces_for(self, month: str) -> List[str]:
+        """Forces with stop & search data for this month (YYYY-MM), sorted"""
+        self._ensure_fresh()
+        return list(self._forces_by_month.get(month, []))
+
+    def availability_hash(self, month: str) -> Optional[str]:
+        """
+        Fingerprint of a month's availability entry (None if the month isn't listed).
+
+        The entry changes when a month is republished with a different set of
+        forces, which is our cue that an already-loaded month may have changed.
+        """
+        self._ensure_fresh()
+        forces = self._forces_by_month.get(month)
+        if forces is None or self._per_force:  # a partial entry would look like a republish
+            return None
+        return hashlib.sha256(f"{month}:{','.join(forces)}".encode()).hexdigest()
+
+    def forces(self) -> List[str]:
+        """Every force that appears anywhere in the matrix"""
+        self._ensure_fresh()
+        return sorted(self._months_by_force)
+
+    def refresh(self) -> None:
+        """Refetch the matrix now, regardless of TTL"""
+        with self._lock:
+            self._force_fetched_at.clear()
+            self._fetch()
+
+    def invalidate(self) -> None:
+        """Drop the cached matrix; next lookup refetches (no-op without an api_client to refetch from)"""
+        if self.api_client is None:
+            return
+        with self._lock:
+            self._fetched_at = None
+            self._force_fetched_at.clear()
+
+    def load(self, availability_data: List[dict]) -> None:
+        """Index a matrix someone else already fetched (e.g. the async client)"""
+        with self._lock:
+            self._index(availability_data)
+
+    def _ensure_fresh(self, force: Optional[str] = None) -> None:
+        # lock so several threads asking at once still cause only one fetch
+        with self._lock:
+            if not self._per_force and (self._fetched_at is None
+                                        or self.clock() - self._fetched_at >= self.ttl_seconds):
+                self._fetch()
+            if self._per_force and force is not None:
+                fetched_at = self._force_fetched_at.get(force)
+                if fetched_at is None or self.clock() - fetched_at >= self.ttl_seconds:
+                    self._fetch_force(force)
+
+    def _fetch(self) -> None:
+        if self.api_client is None:
+            if self._fetched_at is None:
+                raise RuntimeError("AvailabilityCatalogue has no api_client and nothing loaded")
+            return
+        if self._per_force:
+            return
+        try:
+            availability_data = self.api_client.get_availability()
+        except NotImplementedError:
+            self._per_force = True
+            return
+        self._index(availability_data)
+
+    def _fetch_force(self, force: str) -> None:
+        months = sorted(self.api_client.get_available_months(force), reverse=True)
+        for forces in self._forces_by_month.values():
+            if force in forces:
+                forces.remove(force)
+        for month in months:
+            forces = self._forces_by_month.setdefault(month, [])
+            forces.append(force)
+            forces.sort()
+        self._months_by_force[force] = months
+        self._force_fetched_at[force] = self.clock()
+
+    def _index(self, availability_data: List[dict]) -> None:
+        months_by_force: Dict[str, List[str]] = {}
+        forces_by_month: Dict[str, List[str]] = {}
+
+        for month_data in availability_data:
+            forces = month_data.get("stop-and-search") or []
+            month = month_data["date"]
+            forces_by_month[month] = sorted(set(forces))
+            for force in forces:
+                months_by_force.setdefault(force, []).append(month)
+
+        # YYYY-MM sorts as text; newest first matches the API's own order
+        for months in months_by_force.values():
+            months.sort(reverse=True)
+
+        self._months_by_force = months_by_force
+        self._forces_by_month = forces_by_month
+        self._fetched_at = self.clock()
@@ -1,8 +1,14 @@
+import logging
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional
 
 from .api import PoliceApiClient, ApiError
+from .availability import AvailabilityCatalogue
 from .etl_service import EtlService
+from .ledger import IngestionLedger
+from .work_queue import BackfillWorkQueue
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -19,14 +25,35 @@ class BackfillResult:
 class BackfillService:
     """Pulls all historical months for a force and runs ETL per month"""
 
-    def __init__(self, api_client: PoliceApiClient, etl_service: EtlService):
+    def __init__(self, api_client: PoliceApiClient, etl_service: EtlService,
+                 catalogue: Optional[AvailabilityCatalogue] = None,
+                 ledger: Optional[IngestionLedger] = None, incremental: bool = False,
+                 work_queue: Optional[BackfillWorkQueue] = None):
+        """
+        Args:
+            api_client: used to get which months exist
+            etl_service: does the work for each month
+            catalogue: shared availability matrix; falls back to per-force lookups
+            ledger: record of loaded force-months (needed for incremental runs)
+            incremental: default mode for backfill_force, skip months already in the ledger
+            work_queue: persisted per-month progress (needed for resume / retry-failed)
+        """
         self.api_client = api_client
         self.etl_service = etl_service
+        self.catalogue = catalogue
+        self.ledger = ledger
+        self.incremental = incremental
+        self.work_queue = work_queue
 
-    def backfill_force(self, force: str) -> BackfillResult:
+    def backfill_force(self, force: str, incremental: Optional[bool] = None) -> BackfillResult:
         """
         Backfill all available historical data for a police force
 
+        Args:
+            force: Police force uid
+            incremental: only fetch months missing from the ledger (or whose
+                availability entry changed); None uses the service default
+
         Returns:
             BackfillResult with summary of the operation
         """
@@ -38,32 +65,132 @@ class BackfillService:
         )
 
         try:
-            # Discover available months for this force
-            # TODO: month order depends on API; sort if you want deterministic runs (e.g. newest→oldest)
-            available_months = self.api_client.get_available_months(force)
-
+            available_months = self.plan_months(force, incremental)
             if not available_months:
                 return result
 
-            # run etl by each month
-            for month in available_months:
-                try:
-                    records_saved = self.etl_service.extract_transform_load(force, month)
-                    result.total_records += records_saved
-                    result.months_processed += 1
-
-                    # quick progress ping; TODO: swap for proper logging
-                    print(f"Processed {force} {month}: {records_saved} records")
-
-                except Exception as e:
-                    result.months_failed += 1
-                    print(f"Failed to process {force} {month}: {e}")
-                    # continue
+            self._run_months(force, available_months, result)
 
         except ApiError as e:
             # couldn't even get the months list
-            print(f"Failed to get available months for {force}: {e}")
+            logger.error("Failed to get available months for %s: %s", force, e, extra={"force": force})
             # TODO: decide if you want to re-raise here for callers to handle vs. return an empty summary
 
 
-        return result
\ No newline at end of file
+        return result
+
+    def plan_months(self, force: str, incremental: Optional[bool] = None) -> List[str]:
+        """
+        Months a backfill of this force should run, already queued in the work
+        queue (if any). Raises ApiError if the months can't be discovered.
+        """
+        # Discover available months for this force
+        available_months = self._get_available_months(force)
+
+        if incremental is None:
+            incremental = self.incremental
+        if incremental and self.ledger is not None:
+            skipped = len(available_months)
+            availability_hashes = self._availability_hashes(available_months)
+            self.ledger.fill_missing_availability(force, availability_hashes)
+            available_months = self.ledger.months_to_fetch(
+                force, available_months, availability_hashes
+            )
+            skipped -= len(available_months)
+            if skipped:
+                logger.info("Skipping %d already loaded months for %s", skipped, force,
+                            extra={"force": force, "months_skipped": skipped})
+
+        if available_months and self.work_queue is not None:
+            self.work_queue.enqueue(force, available_months)
+
+        return available_months
+
+    def month_loaded(self, force: str, month: str) -> None:
+        """Bookkeeping once a month is in the database: availability seen + work queue"""
+        if self.ledger is not None and self.catalogue is not None:
+            self.ledger.record_availability(
+                force, month, self.catalogue.availability_hash(month)
+            )
+        if self.work_queue is not None:
+            self.work_queue.mark_done(force, month)
+
+    def month_failed(self, force: str, month: str, error: Exception) -> None:
+        if self.work_queue is not None:
+            self.work_queue.mark_failed(force, month, str(error))
+
+    def resume_force(self, force: str) -> BackfillResult:
+        """
+        Carry on an interrupted backfill: run only the months the last run queued
+        but never finished (pending, or left running when the process died)
+
+        Returns:
+            BackfillResult for just the resumed months
+        """
+        result = BackfillResult(force=force, total_records=0, months_processed=0, months_failed=0)
+        if self.work_queue is None:
+            raise ValueError("resume needs a work queue")
+
+        months = self.work_queue.unfinished_months(force)
+        if not months:
+            logger.info("Nothing to resume for %s", force, extra={"force": force})
+            return result
+
+        logger.info("Resuming %s: %d months left", force, len(months), extra={"force": force, "months": len(months)})
+        self._run_months(force, months, result)
+        return result
+
+    def retry_failed(self, force: str) -> BackfillResult:
+        """
+        Re-run only the months recorded as failed for this force
+
+        Returns:
+            BackfillResult for just the retried months
+        """
+        result = BackfillResult(force=force, total_records=0, months_processed=0, months_failed=0)
+        if self.work_queue is None:
+            raise ValueError("retry-failed needs a work queue")
+
+        months = self.work_queue.failed_months(force)
+        if not months:
+            logger.info("No failed months for %s", force, extra={"force": force})
+            return result
+
+        logger.info("Retrying %d failed months for %s", len(months), force,
+                    extra={"force": force, "months": len(months)})
+        self._run_months(force, months, result)
+        return result
+
+    def _run_months(self, force: str, months: List[str], result: BackfillResult) -> None:
+        """Run ETL month by month, keeping the work queue (if any) up to date"""
+        for month in months:
+            if self.work_queue is not None:
+                self.work_queue.mark_running(force, month)
+            try:
+                records_saved = self.etl_service.extract_transform_load(force, month)
+                result.total_records += records_saved
+                result.months_processed += 1
+                self.month_loaded(force, month)
+
+                logger.info("Processed %s %s: %d records", force, month, records_saved,
+                            extra={"force": force, "month": month, "records_saved": records_saved})
+
+            except Exception as e:
+                result.months_failed += 1
+                self.month_failed(force, month, e)
+                logger.error("Failed to process %s %s: %s", force, month, e,
+                             extra={"force": force, "month": month, "error": str(e)})
+                # continue
+
+    def _get_available_months(self, force: str) -> List[str]:
+        """Months for this force, from the shared catalogue when we have one"""
+        if self.catalogue is not None:
+            return self.catalogue.months_for(force)
+        # TODO: month order depends on API; sort if you want deterministic runs (e.g. newest→oldest)
+        return self.api_client.get_available_months(force)
+
+    def _availability_hashes(self, months: List[str]) -> Dict[str, str]:
+        """Current availability fingerprints (only known when we have a catalogue)"""
+        if self.catalogue is None:
+            return {}
+        return {month: self.catalogue.availability_hash(month) for month in months}
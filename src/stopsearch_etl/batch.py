@@ -0,0 +1,142 @@
+import logging
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .domain import RECORD_FIELDS, StopSearchRecord
+from .logging_setup import RECORDS_LOGGER
+from .timestamps import parse_api_datetimes
+
+try:
+    import numpy as np
+except ImportError:  # optional: only needed for StopSearchBatch.to_numpy()
+    np = None
+
+record_logger = logging.getLogger(RECORDS_LOGGER)
+
+# coordinate columns are array('d'), with NaN where the API had nothing usable
+COORDINATE_COLUMNS = ("latitude", "longitude")
+
+
+class StopSearchBatch:
+    """
+    A chunk of stop & search records held column by column.
+
+    Built straight from API JSON (see from_api_data) so the transform -> load
+    path never creates a StopSearchRecord or a dict per row. Every column is a
+    list in RECORD_FIELDS order, except latitude/longitude which are compact
+    float arrays (NaN = missing) that numpy can share without copying.
+    """
+
+    def __init__(self, columns: Dict[str, Sequence], rejected: int = 0):
+        if set(columns) != set(RECORD_FIELDS):
+            raise ValueError(f"StopSearchBatch needs exactly these columns: {RECORD_FIELDS}")
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"StopSearchBatch columns differ in length: {sorted(lengths)}")
+
+        self.columns = columns
+        self.rejected = rejected  # raw records dropped by validation
+
+    @classmethod
+    def from_api_data(cls, raw_records: Iterable[dict], force: Optional[str] = None) -> "StopSearchBatch":
+        """
+        Columnar equivalent of StopSearchRecord.from_api_data over many records.
+
+        Validation runs per column: records without a parseable datetime are
+        dropped (counted in .rejected), and coordinates that aren't numbers in
+        range become missing rather than being stored as text.
+        """
+        raw = raw_records if isinstance(raw_records, list) else list(raw_records)
+
+        # the datetime column decides which rows survive, so it goes first
+        stamps = parse_api_datetimes([record.get("datetime") for record in raw])
+        rejected = stamps.count(None)
+        if rejected:
+            raw = [record for record, stamp in zip(raw, stamps) if stamp is not None]
+            stamps = [stamp for stamp in stamps if stamp is not None]
+            record_logger.warning("Skipped %d records without a valid datetime", rejected,
+                                  extra={"records_rejected": rejected})
+
+        locations = [record.get("location") or {} for record in raw]
+        streets = [location.get("street") or {} for location in locations]
+
+        return cls({
+            "type": [record.get("type", "Unknown") for record in raw],
+            "datetime": stamps,
+            "gender": [record.get("gender") for record in raw],
+            "age_range": [record.get("age_range") for record in raw],
+            "self_defined_ethnicity": [record.get("self_defined_ethnicity") for record in raw],
+            "officer_defined_ethnicity": [record.get("officer_defined_ethnicity") for record in raw],
+            "legislation": [record.get("legislation", "") for record in raw],
+            "object_of_search": [record.get("object_of_search") for record in raw],
+            "outcome": [record.get("outcome") for record in raw],
+            "outcome_linked_to_object_of_search": [record.get("outcome_linked_to_object_of_search") for record in raw],
+            "removal_of_more_than_outer_clothing": [record.get("removal_of_more_than_outer_clothing") for record in raw],
+            "latitude": _coordinates([location.get("latitude") for location in locations], 90.0),
+            "longitude": _coordinates([location.get("longitude") for location in locations], 180.0),
+            "street_id": [street.get("id") for street in streets],
+            "street_name": [street.get("name") for street in streets],
+            "force": [force] * len(raw),
+        }, rejected)
+
+    @classmethod
+    def from_records(cls, records: Iterable[StopSearchRecord]) -> "StopSearchBatch":
+        """Pivot existing domain objects into columns"""
+        rows = [record.as_tuple() for record in records]
+        columns = {name: list(values) for name, values in zip(RECORD_FIELDS, zip(*rows))} if rows else \
+            {name: [] for name in RECORD_FIELDS}
+        for name, limit in zip(COORDINATE_COLUMNS, (90.0, 180.0)):
+            columns[name] = _coordinates(columns[name], limit)
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return len(self.columns["datetime"])
+
+    def __iter__(self) -> Iterator[StopSearchRecord]:
+        # row view for callers that still want objects; the load path doesn't use it
+        for row in zip(*self.to_columns().values()):
+            yield StopSearchRecord(*row)
+
+    def records(self) -> List[StopSearchRecord]:
+        return list(self)
+
+    def to_columns(self) -> Dict[str, list]:
+        """Plain lists per column (RECORD_FIELDS order), None for missing coordinates"""
+        columns = dict(self.columns)
+        for name in COORDINATE_COLUMNS:
+            columns[name] = [None if value != value else value for value in columns[name]]  # NaN != NaN
+        return {name: columns[name] for name in RECORD_FIELDS}
+
+    def to_numpy(self) -> Dict[str, "np.ndarray"]:
+        """
+        Columns as numpy arrays: float64 coordinates (NaN = missing, shared with
+        the batch, not copied), datetime64[us] timestamps as stored in the DB
+        (wall-clock, offset dropped), object arrays for everything else.
+        """
+        if np is None:
+            raise ImportError("StopSearchBatch.to_numpy() needs numpy installed")
+
+        arrays = {}
+        for name in RECORD_FIELDS:
+            values = self.columns[name]
+            if name in COORDINATE_COLUMNS:
+                arrays[name] = np.frombuffer(values, dtype=np.float64)
+            elif name == "datetime":
+                arrays[name] = np.array([stamp.replace(tzinfo=None) for stamp in values], dtype="datetime64[us]")
+            else:
+                arrays[name] = np.array(values, dtype=object)
+        return arrays
+
+
+def _coordinates(values: List, limit: float) -> array:
+    """Coordinate strings/numbers -> array('d'); anything unusable or out of range -> NaN"""
+    column = array("d")
+    for value in values:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            number = math.nan
+        # NaN fails the comparison too
+        column.append(number if -limit <= number <= limit else math.nan)
+    return column
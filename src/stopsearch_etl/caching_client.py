@@ -0,0 +1,294 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from .api import ApiError, PoliceApiClient
+from .timing import stage
+
+logger = logging.getLogger(__name__)
+
+STOPS_ENDPOINT = "stops-force"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    endpoint TEXT NOT NULL,
+    force TEXT NOT NULL,
+    date TEXT NOT NULL,
+    body BLOB NOT NULL,          -- zlib-compressed JSON lines, one record per line
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,    -- last time the server confirmed this body (200 or 304)
+    last_used REAL NOT NULL,     -- for LRU eviction
+    size_bytes INTEGER NOT NULL,
+    PRIMARY KEY (endpoint, force, date)
+)
+"""
+
+
+@dataclass
+class CacheStats:
+    """Counters for one CachingPoliceApiClient"""
+    hits: int = 0  # served from the cache without asking the server
+    revalidated: int = 0  # stale, server said 304 Not Modified, served from the cache
+    misses: int = 0  # fetched the full body (not cached, expired without validators, or changed)
+    evictions: int = 0
+    stored_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.revalidated + self.misses
+        return (self.hits + self.revalidated) / lookups if lookups else 0.0
+
+
+@dataclass
+class _Entry:
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class CachingPoliceApiClient(PoliceApiClient):
+    """
+    Decorator around any PoliceApiClient that keeps stops responses on disk.
+
+    Responses are stored in a small SQLite file keyed by (endpoint, force,
+    date). An entry younger than ttl_seconds is served without touching the
+    network. Once it's older, the wrapped client is asked again: if it can do
+    conditional requests (fetch_stops_conditional, e.g. HttpPoliceApiClient)
+    the stored ETag/Last-Modified go with it and a 304 just refreshes the
+    entry, otherwise the month is refetched. Least recently used entries are
+    dropped once the cache holds more than max_bytes (compressed).
+
+    Availability lookups always go to the wrapped client: that's how new
+    months show up. Safe to share between threads.
+    """
+
+    def __init__(self, inner: PoliceApiClient, path: str, ttl_seconds: Optional[float] = 86400,
+                 max_bytes: Optional[int] = 512 * 1024 * 1024, clock=time.time):
+        """
+        Args:
+            inner: client that does the actual fetching
+            path: SQLite file for the cache (created if missing)
+            ttl_seconds: how long an entry is served without revalidating (None = forever, 0 = always ask)
+            max_bytes: evict least recently used entries beyond this much stored body (None = no limit)
+            clock: time source, for tests
+        """
+        self.inner = inner
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # one connection shared by every thread, serialised by _lock
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+        self.stats.stored_bytes = self._connection.execute(
+            "SELECT coalesce(sum(size_bytes), 0) FROM responses"
+        ).fetchone()[0]
+
+    def fetch_stops(self, force: str, year_month: str) -> List[dict]:
+        entry = self._lookup(force, year_month)
+        if entry is not None and self._is_fresh(entry):
+            self._count("hits")
+            with stage("decode"):
+                return _decode(entry.body)
+
+        body = self._refresh(force, year_month, entry)
+        with stage("decode"):
+            return _decode(body)
+
+    def iter_stops(self, force: str, year_month: str) -> Iterator[dict]:
+        """
+        Cached months are decompressed record by record. A month that isn't
+        cached yet is streamed from the wrapped client and stored as it goes
+        (no validators then, so its first revalidation is a full fetch).
+        """
+        entry = self._lookup(force, year_month)
+        if entry is not None and self._is_fresh(entry):
+            self._count("hits")
+            yield from _iter_decode(entry.body)
+            return
+
+        if entry is None:
+            self._count("misses")
+            compressor = zlib.compressobj()
+            parts = []
+            for record in self.inner.iter_stops(force, year_month):
+                parts.append(compressor.compress(_line(record)))
+                yield record
+            parts.append(compressor.flush())
+            self._store(force, year_month, b"".join(parts), None, None)
+            return
+
+        yield from _iter_decode(self._refresh(force, year_month, entry))
+
+    def get_available_months(self, force: str) -> List[str]:
+        return self.inner.get_available_months(force)
+
+    def get_availability(self) -> List[Dict]:
+        return self.inner.get_availability()
+
+    def log_stats(self) -> None:
+        logger.info(
+            "API cache summary",
+            extra={
+                "cache_hits": self.stats.hits,
+                "cache_revalidated": self.stats.revalidated,
+                "cache_misses": self.stats.misses,
+                "cache_evictions": self.stats.evictions,
+                "cache_stored_bytes": self.stats.stored_bytes,
+                "cache_hit_rate": self.stats.hit_rate,
+            }
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _refresh(self, force: str, year_month: str, entry: Optional[_Entry]) -> bytes:
+        """Ask the wrapped client (conditionally if it can) and update the cache; returns the body"""
+        conditional = getattr(self.inner, "fetch_stops_conditional", None)
+
+        if conditional is None:
+            records, etag, last_modified = self.inner.fetch_stops(force, year_month), None, None
+        else:
+            response = conditional(force, year_month,
+                                   etag=entry.etag if entry else None,
+                                   last_modified=entry.last_modified if entry else None)
+            if response.not_modified and entry is not None:
+                self._count("revalidated")
+                if not self._touch(force, year_month, response.etag, response.last_modified):
+                    # evicted since the lookup; the body we hold is still current, so put it back
+                    self._store(force, year_month, entry.body, response.etag, response.last_modified)
+                return entry.body
+            if response.not_modified:
+                # a 304 with no entry to keep (evicted, or an intermediary answered):
+                # treat it as a miss and ask again without validators
+                response = conditional(force, year_month)
+                if response.not_modified:
+                    raise ApiError(f"304 Not Modified for {force} {year_month} with nothing cached",
+                                   status_code=304)
+            records, etag, last_modified = response.records, response.etag, response.last_modified
+
+        self._count("misses")
+        body = zlib.compress(b"".join(_line(record) for record in records))
+        self._store(force, year_month, body, etag, last_modified)
+        return body
+
+    def _is_fresh(self, entry: _Entry) -> bool:
+        if self.ttl_seconds is None:
+            return True
+        return self.clock() - entry.fetched_at < self.ttl_seconds
+
+    def _lookup(self, force: str, year_month: str) -> Optional[_Entry]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses "
+                "WHERE endpoint = ? AND force = ? AND date = ?",
+                (STOPS_ENDPOINT, force, year_month),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE responses SET last_used = ? WHERE endpoint = ? AND force = ? AND date = ?",
+                (self.clock(), STOPS_ENDPOINT, force, year_month),
+            )
+        return _Entry(*row)
+
+    def _touch(self, force: str, year_month: str, etag: Optional[str], last_modified: Optional[str]) -> bool:
+        """Mark a revalidated entry fresh; False if it's no longer in the cache"""
+        with self._lock:
+            now = self.clock()
+            return self._connection.execute(
+                "UPDATE responses SET etag = ?, last_modified = ?, fetched_at = ?, last_used = ? "
+                "WHERE endpoint = ? AND force = ? AND date = ?",
+                (etag, last_modified, now, now, STOPS_ENDPOINT, force, year_month),
+            ).rowcount > 0
+
+    def _store(self, force: str, year_month: str, body: bytes, etag: Optional[str],
+               last_modified: Optional[str]) -> None:
+        with self._lock:
+            now = self.clock()
+            connection = self._connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                previous = connection.execute(
+                    "SELECT size_bytes FROM responses WHERE endpoint = ? AND force = ? AND date = ?",
+                    (STOPS_ENDPOINT, force, year_month),
+                ).fetchone()
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(endpoint, force, date, body, etag, last_modified, fetched_at, last_used, size_bytes) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (STOPS_ENDPOINT, force, year_month, body, etag, last_modified, now, now, len(body)),
+                )
+                stored = self.stats.stored_bytes - (previous[0] if previous else 0) + len(body)
+                stored -= self._evict(stored, keep=(force, year_month))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            self.stats.stored_bytes = stored
+
+    def _evict(self, stored: int, keep: tuple) -> int:
+        """Drop least recently used entries until we're under max_bytes; returns bytes freed"""
+        if self.max_bytes is None or stored <= self.max_bytes:
+            return 0
+
+        freed = 0
+        rows = self._connection.execute(
+            "SELECT endpoint, force, date, size_bytes FROM responses ORDER BY last_used"
+        ).fetchall()
+        for endpoint, force, date, size in rows:
+            if stored - freed <= self.max_bytes:
+                break
+            if (force, date) == keep:
+                continue  # never evict what we just stored, even if it alone is over the limit
+            self._connection.execute(
+                "DELETE FROM responses WHERE endpoint = ? AND force = ? AND date = ?",
+                (endpoint, force, date),
+            )
+            freed += size
+            self.stats.evictions += 1
+        return freed
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self.stats, outcome, getattr(self.stats, outcome) + 1)
+
+
+def _line(record: dict) -> bytes:
+    return json.dumps(record, separators=(",", ":")).encode() + b"\n"
+
+
+def _decode(body: bytes) -> List[dict]:
+    return [json.loads(line) for line in zlib.decompress(body).splitlines() if line]
+
+
+def _iter_decode(body: bytes, chunk_size: int = 64 * 1024) -> Iterator[dict]:
+    """Decompress a stored body a chunk at a time, one record per line"""
+    decompressor = zlib.decompressobj()
+    pending = b""
+    for start in range(0, len(body), chunk_size):
+        pending += decompressor.decompress(body[start:start + chunk_size])
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line:
+                yield json.loads(line)
+    pending += decompressor.flush()
+    for line in pending.split(b"\n"):
+        if line:
+            yield json.loads(line)
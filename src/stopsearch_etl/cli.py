@@ -1,17 +1,34 @@
 import argparse
+import os
 import sys
 import logging
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from .config import Config
 from .http_client import HttpPoliceApiClient
+from .availability import AvailabilityCatalogue
 from .sqlite_repository import SqliteStopSearchRepository, Base
+from .storage import create_database_engine
+from .migrations import MaintenanceRequired, reclaim_space, run_migrations
 from .etl_service import EtlService
 from .backfill_service import BackfillService
-from .multi_force_runner import MultiForceRunner
+from .multi_force_runner import ConcurrentMultiForceRunner, MultiForceRunner
+from .adaptive import AimdController
 from .scheduler import EtlScheduler
 from .metrics import MetricsCollector
+from .ledger import IngestionLedger
+from .work_queue import BackfillWorkQueue
+from .archive import RawArchive
+from .replay import ReplayService
+from .caching_client import CachingPoliceApiClient
+from .ratelimit import TokenBucket
+from .metrics_server import MetricsExporter, MetricsServer
+from .logging_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# every command loads data, records progress or changes the schema
+WRITE_COMMANDS = ('backfill', 'retry-failed', 'run-once', 'schedule', 'replay', 'migrate')
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -31,6 +48,15 @@ def create_parser() -> argparse.ArgumentParser:
                                 help='Police force identifiers (e.g., metropolitan, avon-and-somerset)')
     backfill_parser.add_argument('--since', type=str,
                                 help='Start from specific month (YYYY-MM format)')
+    backfill_parser.add_argument('--full', action='store_true',
+                                help='Refetch every month, even ones already in the ingestion ledger')
+    backfill_parser.add_argument('--resume', action='store_true',
+                                help='Only run the months the last backfill queued but never finished')
+
+    # retry failed months
+    retry_parser = subparsers.add_parser('retry-failed', help='Re-run months recorded as failed')
+    retry_parser.add_argument('--force', nargs='+',
+                              help='Police force identifiers (default: every force with failures)')
 
     # run once
     run_once_parser = subparsers.add_parser('run-once', help='Run ETL once for all configured forces')
@@ -39,8 +65,25 @@ def create_parser() -> argparse.ArgumentParser:
     schedule_parser = subparsers.add_parser('schedule', help='Start scheduled ETL service')
     schedule_parser.add_argument('--time', type=str, default='02:00',
                                 help='Daily run time in HH:MM format (default: 02:00)')
+    schedule_parser.add_argument('--metrics-port', type=int,
+                                help='Serve Prometheus metrics on this port (default: METRICS_PORT, 0 = off)')
     # TODO: add timezone option if needed
 
+    # replay archived payloads (no network)
+    replay_parser = subparsers.add_parser('replay', help='Rebuild the database from the raw payload archive')
+    replay_parser.add_argument('--archive', type=str,
+                               help='Archive directory (default: RAW_ARCHIVE_DIR)')
+    replay_parser.add_argument('--force', nargs='+',
+                               help='Only replay these forces (default: everything archived)')
+    replay_parser.add_argument('--workers', type=int,
+                               help='Decode processes (default: one per CPU core)')
+
+    # schema maintenance
+    migrate_parser = subparsers.add_parser(
+        'migrate', help='Apply pending migrations, including ones that rewrite the whole table')
+    migrate_parser.add_argument('--vacuum', action='store_true',
+                                help='VACUUM afterwards to give freed pages back to the filesystem')
+
     return parser
 
 
@@ -50,93 +93,213 @@ def setup_application():
     # configuration
     config = Config()
 
-    # logging
-    logging.basicConfig(
-        level=getattr(logging, config.log_level),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    # logging: through a queue so worker threads never wait on the terminal
+    configure_logging(config.log_level, config.log_format, config.log_sample_every)
 
     # database
-    engine = create_engine(config.database_url)
-    Base.metadata.create_all(engine)
+    engine = create_database_engine(config.database_url, config.sqlite_profile)
+    if config.sqlite_profile != "readonly":
+        Base.metadata.create_all(engine)
+        run_migrations(engine)  # indexes etc. for DBs created by older versions too
+    # readonly (query_only) can't create anything: it reads a database the ETL process maintains
     Session = sessionmaker(bind=engine)
     session = Session()
 
     # components
-    api_client = HttpPoliceApiClient()
+    # one bucket for the whole process, so concurrent workers share the API's rate limit
+    rate_limiter = TokenBucket(config.api_rate_limit, config.api_burst or None) if config.api_rate_limit else None
+    api_client = HttpPoliceApiClient(rate_limiter=rate_limiter)
+    if config.api_cache_dir:
+        # published months rarely change: keep responses and revalidate with ETag/Last-Modified
+        api_client = CachingPoliceApiClient(
+            api_client, os.path.join(config.api_cache_dir, "api_cache.sqlite"),
+            ttl_seconds=config.api_cache_ttl_s,
+            max_bytes=config.api_cache_max_mb * 1024 * 1024 or None,
+        )
     repository = SqliteStopSearchRepository(session)
     metrics_collector = MetricsCollector()
-    etl_service = EtlService(api_client, repository, metrics_collector)
-    backfill_service = BackfillService(api_client, etl_service)
-    multi_force_runner = MultiForceRunner(backfill_service)
-    scheduler = EtlScheduler(multi_force_runner, config.forces)
+    catalogue = AvailabilityCatalogue(api_client)  # one availability fetch shared by every force
+    ledger = IngestionLedger(session)
+    archive = RawArchive(config.raw_archive_dir, config.raw_archive_codec) if config.raw_archive_dir else None
+    etl_service = EtlService(api_client, repository, metrics_collector, ledger,
+                             stream_chunk_size=config.stream_chunk_size or None,
+                             flush_interval_ms=config.stream_flush_interval_ms or None,
+                             archive=archive)
+    backfill_service = BackfillService(api_client, etl_service, catalogue, ledger,
+                                       incremental=config.etl_mode == "incremental",
+                                       work_queue=BackfillWorkQueue(session))
+    concurrency = None
+    if config.max_in_flight > 1:
+        # every force's months on one pool; only the network/parsing is parallel, writes stay here.
+        # Workers fetch whole months (no STREAM_CHUNK_SIZE streaming), so memory grows with the limit
+        # adaptive: start low, grow while responses stay fast and clean, halve on 429s/timeouts
+        if config.adaptive_concurrency:
+            concurrency = AimdController(initial_limit=min(4, config.max_in_flight),
+                                         max_limit=config.max_in_flight)
+        multi_force_runner = ConcurrentMultiForceRunner(
+            backfill_service, max_in_flight=config.max_in_flight,
+            per_force_limit=config.per_force_in_flight or config.max_in_flight,
+            concurrency=concurrency,
+        )
+    else:
+        multi_force_runner = MultiForceRunner(backfill_service)
+    # /metrics for the long-running `schedule` process; only reads existing counters when scraped
+    exporter = MetricsExporter(
+        metrics_collector, rate_limiter=rate_limiter, concurrency=concurrency,
+        api_cache=api_client if isinstance(api_client, CachingPoliceApiClient) else None,
+        database_path=engine.url.database if engine.url.get_backend_name() == "sqlite" else None,
+    )
+    scheduler = EtlScheduler(multi_force_runner, config.forces, catalogue=catalogue,
+                             metrics_server=MetricsServer(exporter, config.metrics_port))
+    exporter.scheduler = scheduler  # last-run timestamps
 
     return api_client, repository, backfill_service, multi_force_runner, scheduler
 
 
 def handle_backfill_command(args, backfill_service):
     """Run backfill for one or more forces"""
-    # TODO: use logger instead of print
     forces = args.force
 
-    print(f"Starting backfill for forces: {forces}")
+    logger.info("Starting backfill for forces: %s", ", ".join(forces), extra={"forces": forces})
 
     for force in forces:
-        print(f"Processing force: {force}")
+        logger.info("Processing force: %s", force, extra={"force": force})
         try:
-            result = backfill_service.backfill_force(force)
-            print(f"Completed {force}: {result.total_records} records from "
-                  f"{result.months_processed} months")
+            if args.resume:
+                result = backfill_service.resume_force(force)
+            elif args.full:
+                result = backfill_service.backfill_force(force, incremental=False)
+            else:
+                result = backfill_service.backfill_force(force)
+            logger.info("Completed %s: %d records from %d months", force, result.total_records,
+                        result.months_processed,
+                        extra={"force": force, "records_ingested": result.total_records,
+                               "months_processed": result.months_processed})
 
             if result.months_failed > 0:
-                print(f"Warning: {result.months_failed} months failed for {force}")
+                logger.warning("%d months failed for %s", result.months_failed, force,
+                               extra={"force": force, "months_failed": result.months_failed})
 
         except Exception as e:
-            print(f"Failed to process {force}: {e}")
+            logger.error("Failed to process %s: %s", force, e, extra={"force": force, "error": str(e)})
             continue
 
-    print("Backfill complete")
+    logger.info("Backfill complete")
+
+
+def handle_retry_failed_command(args, backfill_service):
+    """Re-run only the months the work queue has marked as failed"""
+    forces = args.force or backfill_service.work_queue.failed_forces()
+
+    if not forces:
+        logger.info("No failed months to retry")
+        return
+
+    for force in forces:
+        result = backfill_service.retry_failed(force)
+        logger.info("Retried %s: %d months recovered, %d still failing", force, result.months_processed,
+                    result.months_failed,
+                    extra={"force": force, "months_processed": result.months_processed,
+                           "months_failed": result.months_failed})
 
 
 def handle_run_once_command(args, scheduler):
     """Run ETL one time for all configured forces"""
-    print("Running ETL for all configured forces...")
+    logger.info("Running ETL for all configured forces...")
 
     try:
         result = scheduler.run_once()
-        print(f"ETL completed: {result.total_records} total records, "
-              f"{result.forces_completed}/{result.forces_completed + result.forces_failed} forces successful")
+        logger.info("ETL completed: %d total records, %d/%d forces successful", result.total_records,
+                    result.forces_completed, result.forces_completed + result.forces_failed,
+                    extra={"records_ingested": result.total_records, "forces_completed": result.forces_completed,
+                           "forces_failed": result.forces_failed})
 
         if result.forces_failed > 0:
-            print(f"Warning: {result.forces_failed} forces failed")
+            logger.warning("%d forces failed", result.forces_failed, extra={"forces_failed": result.forces_failed})
             for failure in result.failed_forces:
-                print(f"  - {failure}")
+                logger.warning("  - %s", failure, extra={"error": str(failure)})
 
     except Exception as e:
-        print(f"ETL run failed: {e}")
+        logger.error("ETL run failed: %s", e, extra={"error": str(e)})
         sys.exit(1)
 
 
 def handle_schedule_command(args, scheduler):
     """Start daily scheduler"""
-    print(f"Starting scheduled ETL service (daily at {args.time})...")
+    logger.info("Starting scheduled ETL service (daily at %s)...", args.time, extra={"schedule_time": args.time})
+    if args.metrics_port is not None and scheduler.metrics_server is not None:
+        scheduler.metrics_server.port = args.metrics_port
 
     try:
         scheduler.start()
-        print("Scheduler started. Press Ctrl+C to stop.")
+        logger.info("Scheduler started. Press Ctrl+C to stop.")
 
         # keep process alive
         import signal
         signal.pause()
 
     except KeyboardInterrupt:
-        print("Stopping scheduler...")
+        logger.info("Stopping scheduler...")
         scheduler.stop()
-        print("Scheduler stopped")
+        logger.info("Scheduler stopped")
     except Exception as e:
-        print(f"Failed to start scheduler: {e}")
+        logger.error("Failed to start scheduler: %s", e, extra={"error": str(e)})
+        sys.exit(1)
+
+
+def handle_replay_command(args, backfill_service):
+    """Load every archived payload again, without touching the API"""
+    etl_service = backfill_service.etl_service
+    if args.archive:
+        archive = RawArchive(args.archive)
+    elif etl_service.archive is not None:
+        archive = etl_service.archive
+    else:
+        logger.error("No archive to replay: pass --archive or set RAW_ARCHIVE_DIR")
         sys.exit(1)
 
+    logger.info("Replaying archived payloads from %s...", archive.root, extra={"archive": str(archive.root)})
+    result = ReplayService(archive, etl_service, max_workers=args.workers).replay(args.force)
+    logger.info("Replay complete: %d records from %d months", result.total_records, result.months_replayed,
+                extra={"records_ingested": result.total_records, "months_replayed": result.months_replayed})
+
+    if result.months_failed > 0:
+        logger.warning("%d months failed", result.months_failed, extra={"months_failed": result.months_failed})
+        for failure in result.failures:
+            logger.warning("  - %s", failure, extra={"error": str(failure)})
+
+
+def handle_migrate_command(args):
+    """Run every pending migration, heavy ones too; meant for a quiet period (takes an exclusive lock)"""
+    config = Config()
+    configure_logging(config.log_level, config.log_format, config.log_sample_every)
+
+    engine = create_database_engine(config.database_url, config.sqlite_profile)
+    Base.metadata.create_all(engine)
+    applied = run_migrations(engine, maintenance=True)
+    logger.info("Applied migrations: %s", applied or "none pending", extra={"migrations_applied": applied})
+    if args.vacuum:
+        logger.info("Reclaiming free space (VACUUM)...")
+        reclaim_space(engine)
+    engine.dispose()
+
+
+def log_api_client_stats(api_client) -> None:
+    """Summaries from the response cache / rate limiter, whichever are in use"""
+    if isinstance(api_client, CachingPoliceApiClient):
+        api_client.log_stats()
+        api_client = api_client.inner
+    if isinstance(api_client, HttpPoliceApiClient) and api_client.rate_limiter is not None:
+        api_client.rate_limiter.log_stats()
+
+
+def log_run_metrics(backfill_service) -> None:
+    """Totals plus per-force stage percentiles (fetch/decode/transform/load/commit)"""
+    etl_service = getattr(backfill_service, "etl_service", None)
+    metrics_collector = getattr(etl_service, "metrics_collector", None)
+    if isinstance(metrics_collector, MetricsCollector):
+        metrics_collector.log_summary()
+
 
 def main():
     """Main CLI entry point"""
@@ -147,20 +310,39 @@ def main():
         parser.print_help()
         sys.exit(1)
 
+    if args.command in WRITE_COMMANDS and Config().sqlite_profile == "readonly":
+        parser.error(f"'{args.command}' writes to the database, which SQLITE_PROFILE=readonly refuses; "
+                     f"use bulk or safe for the ETL process")
+
+    if args.command == 'migrate':
+        handle_migrate_command(args)
+        return
+
     # build app
-    api_client, repository, backfill_service, multi_force_runner, scheduler = setup_application()
+    try:
+        api_client, repository, backfill_service, multi_force_runner, scheduler = setup_application()
+    except MaintenanceRequired as e:
+        logger.error(str(e))
+        sys.exit(1)
 
     # route
     if args.command == 'backfill':
         handle_backfill_command(args, backfill_service)
+    elif args.command == 'retry-failed':
+        handle_retry_failed_command(args, backfill_service)
     elif args.command == 'run-once':
         handle_run_once_command(args, scheduler)
     elif args.command == 'schedule':
         handle_schedule_command(args, scheduler)
+    elif args.command == 'replay':
+        handle_replay_command(args, backfill_service)
     else:
-        print(f"Unknown command: {args.command}")
+        logger.error("Unknown command: %s", args.command, extra={"command": args.command})
         sys.exit(1)
 
+    log_api_client_stats(api_client)
+    log_run_metrics(backfill_service)
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,26 +1,71 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
-
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .adaptive import AimdController
 from .api import PoliceApiClient, ApiError
-from .etl_service import EtlService
+from .availability import AvailabilityCatalogue
+from .etl_service import EtlService, ExtractedMonth
+from .ratelimit import rate_limit_wait
 from .backfill_service import BackfillResult
+from .work_queue import BackfillWorkQueue
 
+logger = logging.getLogger(__name__)
 
-class ConcurrentEtlService:
-    """Run ETL for many months at the same time"""
 
-    def __init__(self, api_client: PoliceApiClient, etl_service: EtlService, max_workers: int = 3):
+@dataclass
+class _MonthOutcome:
+    """What the writer reports back for one month"""
+    force: str
+    month: str
+    records_saved: int = 0
+    error: Optional[Exception] = None
+
+
+class ConcurrentEtlService:
+    """
+    Run ETL for many months at the same time.
+
+    Worker threads only fetch and parse. Everything that touches the database
+    (records, ledger, work queue) stays on the calling thread, which acts as
+    the single writer: it drains a bounded queue of parsed months and commits
+    several of them per transaction. SQLAlchemy sessions aren't thread-safe and
+    SQLite only has one writer anyway, so this gets parallel network I/O
+    without the session ever leaving its thread.
+    """
+
+    def __init__(self, api_client: PoliceApiClient, etl_service: EtlService, max_workers: int = 3,
+                 catalogue: Optional[AvailabilityCatalogue] = None,
+                 work_queue: Optional[BackfillWorkQueue] = None,
+                 queue_size: Optional[int] = None, months_per_transaction: int = 8,
+                 concurrency: Optional[AimdController] = None):
         """
         Initialize concurrent ETL service.
 
         Args:
             api_client: used to get which months exist
             etl_service: does the work for each month
-            max_workers: how many threads to run at once
+            max_workers: how many fetch/parse threads to run at once
+            catalogue: shared availability matrix (optional, saves a request per force)
+            work_queue: persisted per-month progress (needed for resume / retry-failed)
+            queue_size: parsed months allowed to wait for the writer (default 2 × workers);
+                workers block when it's full, which caps memory
+            months_per_transaction: most months the writer commits in one go
+            concurrency: adapt how many months are fetched at once instead of a
+                fixed max_workers (the pool is sized to its max_limit)
         """
         self.api_client = api_client
         self.etl_service = etl_service
-        self.max_workers = max_workers
+        self.concurrency = concurrency
+        self.max_workers = concurrency.max_limit if concurrency is not None else max_workers
+        self.catalogue = catalogue
+        self.work_queue = work_queue
+        self.queue_size = queue_size or self.max_workers * 2
+        self.months_per_transaction = months_per_transaction
 
     def backfill_force_concurrent(self, force: str) -> BackfillResult:
         """
@@ -38,47 +83,150 @@ class ConcurrentEtlService:
 
         try:
             # get list of months to process
-            available_months = self.api_client.get_available_months(force)
+            if self.catalogue is not None:
+                available_months = self.catalogue.months_for(force)
+            else:
+                available_months = self.api_client.get_available_months(force)
 
             if not available_months:
                 return result
 
-            print(f"Processing {len(available_months)} months for {force} with {self.max_workers} workers")
-            # TODO: use logging instead of print
-
-            # start work in parallel
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # submit all ETL tasks
-                future_to_month = {
-                    executor.submit(self._process_month, force, month): month
-                    for month in available_months
-                }
-
-                # Collect results as they complete
-                for future in as_completed(future_to_month):
-                    month = future_to_month[future]
-                    try:
-                        records_saved = future.result()
-                        result.total_records += records_saved
-                        result.months_processed += 1
-                        print(f"Completed {force} {month}: {records_saved} records")
-
-                    except Exception as e:
-                        result.months_failed += 1
-                        print(f"Failed {force} {month}: {e}")
-                        # TODO: remember which month failed so we can retry later
+            if self.work_queue is not None:
+                self.work_queue.enqueue(force, available_months)
+
+            self._run_months(force, available_months, result)
 
         except ApiError as e:
-            print(f"Failed to get available months for {force}: {e}")
+            logger.error("Failed to get available months for %s: %s", force, e, extra={"force": force})
             # TODO: decide if we should re-raise here
 
         return result
 
-    def _process_month(self, force: str, month: str) -> int:
-        """
-        Run ETL for one month.
+    def resume_force_concurrent(self, force: str) -> BackfillResult:
+        """Run only the months a previous run queued but never finished"""
+        result = BackfillResult(force=force, total_records=0, months_processed=0, months_failed=0)
+        if self.work_queue is None:
+            raise ValueError("resume needs a work queue")
 
-        Returns:
-            Number of records processed
-        """
-        return self.etl_service.extract_transform_load(force, month)
\ No newline at end of file
+        months = self.work_queue.unfinished_months(force)
+        if months:
+            self._run_months(force, months, result)
+        return result
+
+    def retry_failed_concurrent(self, force: str) -> BackfillResult:
+        """Re-run only the months recorded as failed for this force"""
+        result = BackfillResult(force=force, total_records=0, months_processed=0, months_failed=0)
+        if self.work_queue is None:
+            raise ValueError("retry-failed needs a work queue")
+
+        months = self.work_queue.failed_months(force)
+        if months:
+            self._run_months(force, months, result)
+        return result
+
+    def _run_months(self, force: str, months: List[str], result: BackfillResult) -> None:
+        """Fetch/parse on the pool, write here, roll the outcome into result"""
+        logger.info("Processing %d months for %s with %d workers", len(months), force, self.max_workers,
+                    extra={"force": force, "months": len(months), "workers": self.max_workers})
+
+        if self.work_queue is not None:
+            for month in months:
+                self.work_queue.mark_running(force, month)
+
+        loaded: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        outcomes: List[_MonthOutcome] = []
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for month in months:
+                executor.submit(self._fetch_month, force, month, loaded, stop)
+            # every month puts exactly one item on the queue, good or bad
+            self._drain(loaded, len(months), outcomes)
+        finally:
+            # if the writer blew up (or got Ctrl-C), unblock workers stuck on a full queue
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        for outcome in outcomes:
+            if outcome.error is None:
+                result.total_records += outcome.records_saved
+                result.months_processed += 1
+            else:
+                result.months_failed += 1
+
+    def _fetch_month(self, force: str, month: str, loaded: "queue.Queue", stop: threading.Event) -> None:
+        """Worker: fetch + parse one month and hand it to the writer (waits while the queue is full)"""
+        if self.concurrency is not None:
+            self.concurrency.acquire()
+        start, waited = time.monotonic(), rate_limit_wait()
+        error = None
+        try:
+            item = self.etl_service.extract_transform(force, month)
+        except Exception as e:
+            item = _MonthOutcome(force, month, error=e)
+            error = e
+        if self.concurrency is not None:
+            # waiting for our own rate limiter isn't server latency
+            latency = time.monotonic() - start - (rate_limit_wait() - waited)
+            self.concurrency.release(latency, error)
+
+        while not stop.is_set():
+            try:
+                loaded.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _drain(self, loaded: "queue.Queue", expected: int, outcomes: List[_MonthOutcome]) -> None:
+        """Writer: take months off the queue and load them in multi-month transactions"""
+        received = 0
+        while received < expected:
+            items = [loaded.get()]
+            # grab whatever else is already waiting, up to the transaction size
+            while len(items) < self.months_per_transaction:
+                try:
+                    items.append(loaded.get_nowait())
+                except queue.Empty:
+                    break
+            received += len(items)
+
+            extracted = [item for item in items if isinstance(item, ExtractedMonth)]
+            for item in items:
+                if isinstance(item, _MonthOutcome):  # fetch/parse failed on a worker
+                    self._finish(item, outcomes)
+
+            if extracted:
+                self._write(extracted, outcomes)
+
+    def _write(self, extracted: List[ExtractedMonth], outcomes: List[_MonthOutcome]) -> None:
+        try:
+            # a shared transaction that fails is retried month by month below,
+            # so only the single-month attempt counts as a failure
+            saved_counts = self.etl_service.load_many(extracted, record_failures=len(extracted) == 1)
+        except Exception as e:
+            if len(extracted) == 1:
+                self._finish(_MonthOutcome(extracted[0].force, extracted[0].month, error=e), outcomes)
+                return
+            # one bad month shouldn't sink the others sharing its transaction
+            for month in extracted:
+                self._write([month], outcomes)
+            return
+
+        for month, records_saved in zip(extracted, saved_counts):
+            self._finish(_MonthOutcome(month.force, month.month, records_saved), outcomes)
+
+    def _finish(self, outcome: _MonthOutcome, outcomes: List[_MonthOutcome]) -> None:
+        """Record the month's outcome in the work queue and the run summary"""
+        if outcome.error is None:
+            if self.work_queue is not None:
+                self.work_queue.mark_done(outcome.force, outcome.month)
+            logger.info("Completed %s %s: %d records", outcome.force, outcome.month, outcome.records_saved,
+                        extra={"force": outcome.force, "month": outcome.month,
+                               "records_saved": outcome.records_saved})
+        else:
+            if self.work_queue is not None:
+                self.work_queue.mark_failed(outcome.force, outcome.month, str(outcome.error))
+            logger.error("Failed %s %s: %s", outcome.force, outcome.month, outcome.error,
+                         extra={"force": outcome.force, "month": outcome.month, "error": str(outcome.error)})
+        outcomes.append(outcome)
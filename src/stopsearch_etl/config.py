@@ -1,17 +1,42 @@
 import os
-from typing import List
+from typing import List, Optional
 
 
 class Config:
     """Environment-driven configuration for the ETL app ie config comes from env vars, with sensible fallbacks"""
 
     VALID_LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+    VALID_ETL_MODES = ["incremental", "full"]
+    VALID_SQLITE_PROFILES = ["bulk", "safe", "readonly"]
+    VALID_ARCHIVE_CODECS = ["auto", "gzip", "lzma", "zstd"]
+    VALID_LOG_FORMATS = ["text", "json"]
 
     def __init__(self):
         """Load configuration from environment variables with sensible defaults."""
         self.forces = self._parse_forces()
         self.database_url = self._get_database_url()
         self.log_level = self._get_log_level()
+        self.log_format = self._get_log_format()
+        # keep 1 in N "Failed to parse record" warnings after the first few (1 = all)
+        self.log_sample_every = self._get_non_negative_int("LOG_SAMPLE_EVERY", "1") or 1
+        self.etl_mode = self._get_etl_mode()
+        self.sqlite_profile = self._get_sqlite_profile()
+        self.stream_chunk_size = self._get_stream_chunk_size()
+        self.stream_flush_interval_ms = self._get_stream_flush_interval_ms()
+        self.raw_archive_dir = self._get_raw_archive_dir()
+        self.raw_archive_codec = self._get_raw_archive_codec()
+        self.api_cache_dir = os.environ.get("API_CACHE_DIR") or None  # unset = no response cache
+        self.api_cache_ttl_s = self._get_non_negative_int("API_CACHE_TTL_S", "86400")
+        self.api_cache_max_mb = self._get_non_negative_int("API_CACHE_MAX_MB", "512")
+        self.api_rate_limit = self._get_api_rate_limit()
+        self.api_burst = self._get_non_negative_int("API_BURST", "30")
+        # force-months fetched at once across all forces. 1 = one force after another,
+        # streaming each month in STREAM_CHUNK_SIZE chunks; more fetches whole months
+        # on worker threads (faster, but holds them in memory)
+        self.max_in_flight = self._get_non_negative_int("MAX_IN_FLIGHT", "1")
+        self.per_force_in_flight = self._get_non_negative_int("PER_FORCE_IN_FLIGHT", "2")
+        self.adaptive_concurrency = self._get_adaptive_concurrency()
+        self.metrics_port = self._get_metrics_port()
 
     def _parse_forces(self) -> List[str]:
         """split comma-separated list of forces, default = metropolitan"""
@@ -29,4 +54,115 @@ class Config:
         if log_level not in self.VALID_LOG_LEVELS:
             raise ValueError(f"Invalid log level '{log_level}'. Must be one of: {self.VALID_LOG_LEVELS}")
 
-        return log_level
\ No newline at end of file
+        return log_level
+
+    def _get_log_format(self) -> str:
+        """text (default) or json, which also writes the structured fields (force, month, ...)"""
+        log_format = os.environ.get("LOG_FORMAT", "text").lower()
+
+        if log_format not in self.VALID_LOG_FORMATS:
+            raise ValueError(f"Invalid LOG_FORMAT '{log_format}'. Must be one of: {self.VALID_LOG_FORMATS}")
+
+        return log_format
+
+    def _get_etl_mode(self) -> str:
+        """incremental (default) skips force-months already in the ledger, full refetches everything"""
+        etl_mode = os.environ.get("ETL_MODE", "incremental").lower()
+
+        if etl_mode not in self.VALID_ETL_MODES:
+            raise ValueError(f"Invalid ETL mode '{etl_mode}'. Must be one of: {self.VALID_ETL_MODES}")
+
+        return etl_mode
+
+    def _get_sqlite_profile(self) -> str:
+        """PRAGMA set for SQLite connections (see storage.SQLITE_PROFILES), bulk by default"""
+        sqlite_profile = os.environ.get("SQLITE_PROFILE", "bulk").lower()
+
+        if sqlite_profile not in self.VALID_SQLITE_PROFILES:
+            raise ValueError(
+                f"Invalid SQLite profile '{sqlite_profile}'. Must be one of: {self.VALID_SQLITE_PROFILES}"
+            )
+
+        return sqlite_profile
+
+    def _get_stream_chunk_size(self) -> int:
+        """records per save while streaming a month (0 = load each month in one go)"""
+        value = os.environ.get("STREAM_CHUNK_SIZE", "5000")
+
+        try:
+            stream_chunk_size = int(value)
+        except ValueError:
+            raise ValueError(f"Invalid STREAM_CHUNK_SIZE '{value}'. Must be a whole number")
+        if stream_chunk_size < 0:
+            raise ValueError(f"Invalid STREAM_CHUNK_SIZE '{value}'. Must be 0 or more")
+
+        return stream_chunk_size
+
+    def _get_stream_flush_interval_ms(self) -> int:
+        """also save a partial chunk once it's this old while streaming (0 = only flush on size)"""
+        value = os.environ.get("STREAM_FLUSH_INTERVAL_MS", "0")
+
+        try:
+            flush_interval_ms = int(value)
+        except ValueError:
+            raise ValueError(f"Invalid STREAM_FLUSH_INTERVAL_MS '{value}'. Must be a whole number")
+        if flush_interval_ms < 0:
+            raise ValueError(f"Invalid STREAM_FLUSH_INTERVAL_MS '{value}'. Must be 0 or more")
+
+        return flush_interval_ms
+
+    def _get_raw_archive_dir(self) -> Optional[str]:
+        """where to keep raw API payloads for replay (unset = don't archive)"""
+        return os.environ.get("RAW_ARCHIVE_DIR") or None
+
+    def _get_raw_archive_codec(self) -> Optional[str]:
+        """compression for archived payloads; auto = zstd if installed, else gzip (None)"""
+        codec = os.environ.get("RAW_ARCHIVE_CODEC", "auto").lower()
+
+        if codec not in self.VALID_ARCHIVE_CODECS:
+            raise ValueError(f"Invalid archive codec '{codec}'. Must be one of: {self.VALID_ARCHIVE_CODECS}")
+
+        return None if codec == "auto" else codec
+
+    def _get_api_rate_limit(self) -> float:
+        """requests per second shared by every fetch (data.police.uk allows 15/s; 0 = don't limit)"""
+        value = os.environ.get("API_RATE_LIMIT", "15")
+
+        try:
+            rate_limit = float(value)
+        except ValueError:
+            raise ValueError(f"Invalid API_RATE_LIMIT '{value}'. Must be a number")
+        if rate_limit < 0:
+            raise ValueError(f"Invalid API_RATE_LIMIT '{value}'. Must be 0 or more")
+
+        return rate_limit
+
+    def _get_adaptive_concurrency(self) -> bool:
+        """let AIMD pick the in-flight count (MAX_IN_FLIGHT is then the ceiling)"""
+        value = os.environ.get("ADAPTIVE_CONCURRENCY", "true").lower()
+
+        if value not in ("true", "false", "1", "0"):
+            raise ValueError(f"Invalid ADAPTIVE_CONCURRENCY '{value}'. Must be true or false")
+
+        return value in ("true", "1")
+
+    def _get_metrics_port(self) -> int:
+        """port for the Prometheus /metrics endpoint of `schedule` (0 = don't serve)"""
+        port = self._get_non_negative_int("METRICS_PORT", "0")
+
+        if port > 65535:
+            raise ValueError(f"Invalid METRICS_PORT '{port}'. Must be 65535 or less")
+
+        return port
+
+    def _get_non_negative_int(self, name: str, default: str) -> int:
+        value = os.environ.get(name, default)
+
+        try:
+            number = int(value)
+        except ValueError:
+            raise ValueError(f"Invalid {name} '{value}'. Must be a whole number")
+        if number < 0:
+            raise ValueError(f"Invalid {name} '{value}'. Must be 0 or more")
+
+        return number
@@ -1,12 +1,15 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
 
+from .timestamps import parse_api_datetime
 
-@dataclass
+
+@dataclass(slots=True)
 class StopSearchRecord:
     """A stop and search record from UK Police data."""
     # keeping it simple: one row in the DB = one police stop/search record
+    # slots: no per-instance __dict__, which adds up over a multi-million row backfill
     type: str
     datetime: datetime
     gender: Optional[str]
@@ -22,13 +25,14 @@ class StopSearchRecord:
     longitude: Optional[float]
     street_id: Optional[int]
     street_name: Optional[str]
+    force: Optional[str] = None  # the API doesn't send it; it's whichever force we asked for
 
     @classmethod
-    def from_api_data(cls, data: dict) -> "StopSearchRecord":
+    def from_api_data(cls, data: dict, force: Optional[str] = None) -> "StopSearchRecord":
         """Create a StopSearchRecord from Police API JSON data."""
 
-        # datetime comes as a string like "2023-01-15T14:30:00+00:00"
-        dt = datetime.fromisoformat(data["datetime"].replace("Z", "+00:00"))
+        # datetime comes as a string like "2023-01-15T14:30:00+00:00" (memoised: cheaper when they repeat)
+        dt = parse_api_datetime(data["datetime"])
 
         # location might be missing or half-empty
         location = data.get("location", {})
@@ -50,4 +54,32 @@ class StopSearchRecord:
             longitude=location.get("longitude"),
             street_id=street.get("id"),
             street_name=street.get("name"),
-        )
\ No newline at end of file
+            force=force,
+        )
+
+    def as_tuple(self) -> tuple:
+        """Field values in RECORD_FIELDS order (StopSearchRecord(*t) gives the record back)"""
+        return (
+            self.type, self.datetime, self.gender, self.age_range, self.self_defined_ethnicity,
+            self.officer_defined_ethnicity, self.legislation, self.object_of_search, self.outcome,
+            self.outcome_linked_to_object_of_search, self.removal_of_more_than_outer_clothing,
+            self.latitude, self.longitude, self.street_id, self.street_name, self.force,
+        )
+
+
+# field order of StopSearchRecord; the DB columns use the same names
+RECORD_FIELDS = tuple(f.name for f in fields(StopSearchRecord))
+
+# low-cardinality text fields: a few dozen distinct values over millions of records
+CATEGORY_FIELDS = (
+    'type', 'gender', 'age_range', 'self_defined_ethnicity', 'officer_defined_ethnicity',
+    'legislation', 'object_of_search', 'outcome',
+)
+
+
+def month_bounds(year_month: str) -> Tuple[datetime, datetime]:
+    """YYYY-MM -> [first instant of the month, first instant of the next month)"""
+    year, month = (int(part) for part in year_month.split('-'))
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
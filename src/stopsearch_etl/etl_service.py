@@ -1,9 +1,72 @@
-from typing import List, Optional
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Union
 
 from .api import PoliceApiClient, ApiError
+from .archive import RawArchive
+from .batch import StopSearchBatch
 from .domain import StopSearchRecord
 from .repository import StopSearchRepository
 from .metrics import MetricsCollector
+from .ledger import IngestionLedger, PayloadHasher, payload_hash
+from .timing import StageTimer, add_stage_time, stage, timed
+from .logging_setup import RECORDS_LOGGER
+
+# one warning per bad record: on its own logger so LOG_SAMPLE_EVERY can thin it out
+record_logger = logging.getLogger(RECORDS_LOGGER)
+
+
+@dataclass
+class ExtractedMonth:
+    """A fetched + transformed force-month waiting to be loaded"""
+    force: str
+    month: str
+    records: Union[List[StopSearchRecord], StopSearchBatch]
+    raw_count: int
+    payload_hash: Optional[str] = None  # only worked out when there's a ledger
+    timings: Dict[str, float] = field(default_factory=dict)  # fetch/decode/transform seconds
+
+
+@dataclass
+class ChunkMetrics:
+    """What happened to one chunk of a streamed load"""
+    index: int
+    raw_count: int
+    parsed_count: int
+    saved_count: int
+    parse_ms: float  # pulling + transforming the chunk (overlaps the previous write)
+    write_ms: float  # save_batch incl. commit
+
+
+@dataclass
+class LoadResult:
+    """Totals for one load_records call, plus the per-chunk breakdown"""
+    force: str
+    month: str
+    chunks: List[ChunkMetrics] = field(default_factory=list)
+
+    @property
+    def raw_count(self) -> int:
+        return sum(chunk.raw_count for chunk in self.chunks)
+
+    @property
+    def parsed_count(self) -> int:
+        return sum(chunk.parsed_count for chunk in self.chunks)
+
+    @property
+    def saved_count(self) -> int:
+        return sum(chunk.saved_count for chunk in self.chunks)
+
+    @property
+    def deduplicated_count(self) -> int:
+        return self.parsed_count - self.saved_count
+
+
+# producer -> writer: nothing more coming
+_END_OF_STREAM = object()
 
 
 class EtlService:
@@ -11,10 +74,20 @@ class EtlService:
 
     # pull from API -> map to domain -> save
     def __init__(self, api_client: PoliceApiClient, repository: StopSearchRepository,
-                 metrics_collector: Optional[MetricsCollector] = None):
+                 metrics_collector: Optional[MetricsCollector] = None,
+                 ledger: Optional[IngestionLedger] = None,
+                 stream_chunk_size: Optional[int] = None,
+                 flush_interval_ms: Optional[float] = None,
+                 archive: Optional[RawArchive] = None):
         self.api_client = api_client
         self.repository = repository
         self.metrics_collector = metrics_collector #optional
+        self.ledger = ledger  # optional: remember which force-months are loaded
+        # set = extract_transform_load streams the month and saves every N records
+        # (or every flush_interval_ms, whichever comes first)
+        self.stream_chunk_size = stream_chunk_size
+        self.flush_interval_ms = flush_interval_ms
+        self.archive = archive  # optional: keep every fetched payload for offline replay
 
     def extract_transform_load(self, force: str, year_month: str) -> int:
         """
@@ -24,43 +97,317 @@ class EtlService:
             Number of records saved
         """
         try:
-            # Extract: Get raw data from API
-            raw_records = self.api_client.fetch_stops(force, year_month)
-
-            if not raw_records:
-                # still call repo for consistency
-                result = self.repository.save_batch([])
-                if self.metrics_collector:
-                    self.metrics_collector.record_successful_batch(force, year_month, 0, 0)
-                return result
-
-            # Transform: map raw -> domain, skip bad ones
-            domain_records = []
-            for raw_record in raw_records:
-                try:
-                    domain_record = StopSearchRecord.from_api_data(raw_record)
-                    domain_records.append(domain_record)
-                except (KeyError, ValueError) as e:
-                    # TODO: use logger instead of print
-                    print(f"Warning: Failed to parse record: {e}")
-                    continue
+            # every stage below (and in the client/repository) reports into this timer
+            with timed() as timer:
+                if self.stream_chunk_size:
+                    saved_count = self._stream_transform_load(force, year_month)
+                else:
+                    # Extract: Get raw data from API
+                    with stage("fetch"):
+                        raw_records = self.api_client.fetch_stops(force, year_month)
+                    saved_count = self._transform_load(force, year_month, raw_records)
+            self._record_timings(force, timer.seconds)
+            return saved_count
 
-            # Load: save
-            original_count = len(domain_records)
-            saved_count = self.repository.save_batch(domain_records)
-            deduplicated_count = original_count - saved_count
+        except Exception as e:
+            # Record failure metrics
+            # TODO: narrow exceptions where possible; keep this as last-resort
+            self.record_failure(force, year_month, e)
+            raise  # Re-raise for caller to handle
 
-            # Record metrics if collector is available
-            if self.metrics_collector:
-                self.metrics_collector.record_successful_batch(
-                    force, year_month, saved_count, deduplicated_count
-                )
+    def transform_load(self, force: str, year_month: str, raw_records: List[dict]) -> int:
+        """
+        Transform + load records that were already fetched (e.g. by the async driver)
 
+        Returns:
+            Number of records saved
+        """
+        try:
+            with timed() as timer:
+                saved_count = self._transform_load(force, year_month, raw_records)
+            self._record_timings(force, timer.seconds)
             return saved_count
+        except Exception as e:
+            self.record_failure(force, year_month, e)
+            raise
 
+    def extract_transform(self, force: str, year_month: str) -> ExtractedMonth:
+        """
+        Fetch and transform one month without touching the database, so it is
+        safe to run on worker threads. Pair with load_many on a single writer.
+        """
+        try:
+            with timed() as timer:
+                with stage("fetch"):
+                    raw_records = self.api_client.fetch_stops(force, year_month)
+                with stage("transform"):
+                    records = self.transform_batch(raw_records, force)
+            digest = self._archive_payload(force, year_month, raw_records)
+            if digest is None and self.ledger is not None:
+                digest = payload_hash(raw_records)
+            return ExtractedMonth(force, year_month, records, len(raw_records), digest, timer.seconds)
         except Exception as e:
-            # Record failure metrics
-            # TODO: narrow exceptions where possible; keep this as last-resort
+            self.record_failure(force, year_month, e)
+            raise
+
+    def load_many(self, months: List[ExtractedMonth], record_failures: bool = True) -> List[int]:
+        """
+        Load several extracted months in one transaction
+
+        The transaction's load/commit time is split evenly between its months
+        when recording stage timings.
+
+        Args:
+            months: extracted months to write together
+            record_failures: count a failed transaction as a failure of every
+                month in it; callers that retry the months one by one pass False,
+                so only months that fail on their own are counted
+
+        Returns:
+            Number of records saved per month, in order
+        """
+        try:
+            with timed() as timer, stage("load"):
+                if self.ledger is not None:
+                    # same transaction as the records, committed by save_batches
+                    for month in months:
+                        self.ledger.record_load(month.force, month.month, month.raw_count,
+                                                month.payload_hash, commit=False)
+                saved_counts = self.repository.save_batches([month.records for month in months])
+        except Exception as e:
+            if record_failures:
+                for month in months:
+                    self.record_failure(month.force, month.month, e)
+            raise
+
+        if self.metrics_collector:
+            for month, saved_count in zip(months, saved_counts):
+                self.metrics_collector.record_successful_batch(
+                    month.force, month.month, saved_count, len(month.records) - saved_count
+                )
+            for month in months:
+                seconds = dict(month.timings)
+                for name, value in timer.seconds.items():
+                    seconds[name] = seconds.get(name, 0.0) + value / len(months)
+                self._record_timings(month.force, seconds)
+        return saved_counts
+
+    def transform(self, raw_records: List[dict], force: Optional[str] = None) -> List[StopSearchRecord]:
+        """Map raw API dicts to domain objects (tagged with force), skipping bad ones"""
+        domain_records = []
+        for raw_record in raw_records:
+            try:
+                domain_record = StopSearchRecord.from_api_data(raw_record, force)
+                domain_records.append(domain_record)
+            except (KeyError, ValueError) as e:
+                record_logger.warning("Failed to parse record: %s", e, extra={"force": force, "error": str(e)})
+                continue
+        return domain_records
+
+    def transform_batch(self, raw_records: List[dict], force: Optional[str] = None) -> StopSearchBatch:
+        """Same as transform, but straight into columns (no object/dict per record)"""
+        return StopSearchBatch.from_api_data(raw_records, force)
+
+    def load(self, force: str, year_month: str, records: List[StopSearchRecord]) -> int:
+        """
+        Save transformed records and record success metrics
+
+        Returns:
+            Number of records saved
+        """
+        if not records:
+            # still call repo for consistency
+            result = self.repository.save_batch([])
             if self.metrics_collector:
-                self.metrics_collector.record_failed_batch(force, year_month, str(e))
-            raise  # Re-raise for caller to handle
\ No newline at end of file
+                self.metrics_collector.record_successful_batch(force, year_month, 0, 0)
+            return result
+
+        original_count = len(records)
+        saved_count = self.repository.save_batch(records)
+        deduplicated_count = original_count - saved_count
+
+        # Record metrics if collector is available
+        if self.metrics_collector:
+            self.metrics_collector.record_successful_batch(
+                force, year_month, saved_count, deduplicated_count
+            )
+
+        return saved_count
+
+    def record_failure(self, force: str, year_month: str, error: Exception) -> None:
+        """Record a failed force-month in metrics (if we have a collector)"""
+        if self.metrics_collector:
+            self.metrics_collector.record_failed_batch(force, year_month, str(error))
+
+    def _record_timings(self, force: str, seconds: Dict[str, float]) -> None:
+        """Per-stage seconds for one loaded force-month into the metrics histograms"""
+        if self.metrics_collector:
+            self.metrics_collector.record_stage_timings(force, seconds)
+
+    def _archive_payload(self, force: str, year_month: str, raw_records: List[dict]) -> Optional[str]:
+        """Archive a fetched payload if we have an archive; returns its hash (= payload_hash)"""
+        if self.archive is None:
+            return None
+        return self.archive.put(force, year_month, raw_records).sha256
+
+    def _transform_load(self, force: str, year_month: str, raw_records: List[dict]) -> int:
+        digest = self._archive_payload(force, year_month, raw_records)
+
+        # Transform: map raw -> domain, skip bad ones
+        with stage("transform"):
+            domain_records = self.transform(raw_records, force) if raw_records else []
+
+        # Load: save (the repository/ledger time their own commits)
+        with stage("load"):
+            saved_count = self.load(force, year_month, domain_records)
+
+            if self.ledger is not None:
+                self.ledger.record_load(force, year_month, len(raw_records), digest or payload_hash(raw_records))
+
+        return saved_count
+
+    def _stream_transform_load(self, force: str, year_month: str) -> int:
+        """Fetch a month as a stream and load it stream_chunk_size records at a time"""
+        raw_records = self.api_client.iter_stops(force, year_month)
+        writer = self.archive.writer(force, year_month) if self.archive is not None else None
+        if writer is not None:
+            raw_records = writer.tee(raw_records)  # compressed to disk as the records go by
+
+        try:
+            result = self.load_records(force, year_month, raw_records,
+                                       chunk_size=self.stream_chunk_size,
+                                       flush_interval_ms=self.flush_interval_ms)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+
+        if writer is not None:
+            writer.commit()
+        return result.saved_count
+
+    def load_records(self, force: str, year_month: str, raw_records: Iterable[dict],
+                     chunk_size: int = 5000, flush_interval_ms: Optional[float] = None) -> LoadResult:
+        """
+        Transform + load any iterable of raw records in chunks.
+
+        Records are pulled and transformed on a helper thread while the previous
+        chunk is being written here, so network/parsing overlaps the inserts but
+        the repository is still only used from the calling thread. A chunk is
+        flushed at chunk_size records, or once flush_interval_ms has passed
+        since it was started (checked as each record arrives), so slow streams
+        still land steadily.
+
+        Each chunk commits on its own; if the month fails halfway the rerun just
+        dedupes the part that already landed, and the ledger is only written at
+        the end.
+        """
+        hasher = PayloadHasher() if self.ledger is not None else None
+        result = LoadResult(force, year_month)
+        producer_timer = StageTimer()  # the parse thread's stages, merged in at the end
+
+        chunks: "queue.Queue" = queue.Queue(maxsize=2)  # parsed chunks waiting for the writer
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._produce_chunks,
+            args=(force, raw_records, chunk_size, flush_interval_ms, hasher, chunks, stop, producer_timer),
+            name=f"etl-parse-{force}-{year_month}", daemon=True,
+        )
+        producer.start()
+
+        try:
+            while True:
+                item = chunks.get()
+                if item is _END_OF_STREAM:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                records, raw_count, parse_ms = item
+                start = time.perf_counter()
+                with stage("load"):
+                    saved = self.repository.save_batch(records) if records else 0
+                result.chunks.append(ChunkMetrics(
+                    index=len(result.chunks), raw_count=raw_count, parsed_count=len(records),
+                    saved_count=saved, parse_ms=parse_ms, write_ms=(time.perf_counter() - start) * 1000,
+                ))
+        finally:
+            stop.set()  # unblocks the producer if we bailed out early
+            producer.join()
+            for name, seconds in producer_timer.seconds.items():
+                add_stage_time(name, seconds)
+
+        if self.metrics_collector:
+            self.metrics_collector.record_successful_batch(
+                force, year_month, result.saved_count, result.deduplicated_count
+            )
+        if self.ledger is not None:
+            with stage("load"):
+                self.ledger.record_load(force, year_month, result.raw_count, hasher.hexdigest())
+
+        return result
+
+    def _produce_chunks(self, force: str, raw_records: Iterable[dict], chunk_size: int,
+                        flush_interval_ms: Optional[float], hasher: Optional[PayloadHasher],
+                        chunks: "queue.Queue", stop: threading.Event, timer: StageTimer) -> None:
+        """
+        Parse thread for load_records: hands (records, raw_count, parse_ms) to the writer.
+
+        Time spent pulling records goes to "fetch" on timer: with a streamed
+        response the network and the JSON decoding are interleaved, so decode
+        isn't split out here.
+        """
+
+        def hand_over(item) -> bool:
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        pull_s = 0.0  # time spent waiting on raw_records
+        try:
+            chunk: List[dict] = []
+            started = time.perf_counter()
+            parse_s = 0.0  # time spent in this thread, minus waiting on the writer
+
+            def flush() -> bool:
+                nonlocal chunk, started, parse_s
+                transform_start = time.perf_counter()
+                records = self.transform_batch(chunk, force)
+                transform_s = time.perf_counter() - transform_start
+                timer.add("transform", transform_s)
+                parse_s += transform_s
+                item = (records, len(chunk), parse_s * 1000)
+                chunk, parse_s = [], 0.0
+                handed = hand_over(item)
+                started = time.perf_counter()
+                return handed
+
+            pull_start = time.perf_counter()
+            for raw_record in raw_records:
+                if hasher is not None:
+                    hasher.update(raw_record)
+                chunk.append(raw_record)
+                pulled = time.perf_counter() - pull_start
+                parse_s += pulled
+                pull_s += pulled
+
+                overdue = (flush_interval_ms is not None
+                           and (time.perf_counter() - started) * 1000 >= flush_interval_ms)
+                if len(chunk) >= chunk_size or overdue:
+                    if not flush():
+                        return
+                pull_start = time.perf_counter()
+                if stop.is_set():
+                    return
+
+            if chunk and not flush():
+                return
+            hand_over(_END_OF_STREAM)
+        except BaseException as e:  # fetch/decode errors go to the writer to re-raise
+            hand_over(e)
+        finally:
+            timer.add("fetch", pull_s)
@@ -0,0 +1,27 @@
+import math
+from typing import Tuple
+
+EARTH_RADIUS_KM = 6371.0088  # mean radius
+KM_PER_DEGREE_LAT = 111.0
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    (min_lat, max_lat, min_lon, max_lon) that fully contains the circle.
+
+    Slightly generous on purpose; the haversine check trims the corners.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE_LAT * 1.01
+    # cos -> 0 at the poles; clamp so the box just covers every longitude there
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    lon_delta = min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat) * 1.01)
+    return lat - lat_delta, lat + lat_delta, lon - lon_delta, lon + lon_delta
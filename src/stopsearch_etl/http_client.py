@@ -1,10 +1,12 @@
 import time
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
 import requests
 from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
-from .api import PoliceApiClient, ApiError
+from .api import PoliceApiClient, ApiError, ConditionalStops
+from .jsonstream import iter_json_array
+from .ratelimit import RateLimitedRetry, TokenBucket
+from .timing import stage
 
 
 class HttpPoliceApiClient(PoliceApiClient):
@@ -14,11 +16,14 @@ class HttpPoliceApiClient(PoliceApiClient):
 
     # Police API client that talks over HTTP, with retries and timeouts
 
-    def __init__(self, timeout: int = 30, max_retries: int = 3, backoff_factor: float = 1.0):
-        self.base_url = "https://data.police.uk/api"
+    def __init__(self, timeout: int = 30, max_retries: int = 3, backoff_factor: float = 1.0,
+                 base_url: str = "https://data.police.uk/api", rate_limiter: Optional[TokenBucket] = None):
+        self.base_url = base_url
         self.timeout = timeout
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
+        # optional: share one bucket between every client/thread to stay under the API's limit
+        self.rate_limiter = rate_limiter
         self.session = self._create_session()
 
     def _create_session(self) -> requests.Session:
@@ -26,11 +31,12 @@ class HttpPoliceApiClient(PoliceApiClient):
         session = requests.Session()
 
         # Configure retry strategy with configurable parameters
-        retry_strategy = Retry(
+        retry_strategy = RateLimitedRetry(
             total=self.max_retries,
             backoff_factor=self.backoff_factor,
             status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"]
+            allowed_methods=["HEAD", "GET", "OPTIONS"],
+            rate_limiter=self.rate_limiter,  # retries take a token too; Retry-After slows everyone
         )
         # NOTE: urllib3 may warn about allowed_methods type in older versions
 
@@ -40,6 +46,12 @@ class HttpPoliceApiClient(PoliceApiClient):
 
         return session
 
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """session.get, after waiting for the rate limiter (if any)"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return self.session.get(url, timeout=self.timeout, **kwargs)
+
     def fetch_stops(self, force: str, year_month: str) -> List[Dict]:
         """Get stop & search data for one force and month"""
         url = f"{self.base_url}/stops-force"
@@ -49,12 +61,78 @@ class HttpPoliceApiClient(PoliceApiClient):
         }
 
         try:
-            response = self.session.get(url, params=params, timeout=self.timeout)
-            response.raise_for_status()
-            return response.json()
+            with stage("fetch"):
+                response = self._get(url, params=params)
+                response.raise_for_status()
+            with stage("decode"):
+                return response.json()
+
+        except requests.exceptions.HTTPError as e:
+            raise ApiError(f"HTTP error {response.status_code}: {e}", status_code=response.status_code)
+        except requests.exceptions.RequestException as e:
+            raise ApiError(f"Request failed: {e}")
+        except ValueError as e:
+            raise ApiError(f"Invalid JSON response: {e}")
+
+    def fetch_stops_conditional(self, force: str, year_month: str, etag: Optional[str] = None,
+                                last_modified: Optional[str] = None) -> ConditionalStops:
+        """
+        fetch_stops, but send the validators from a previous response
+        (If-None-Match / If-Modified-Since). A 304 comes back as
+        ConditionalStops(records=None) so the caller can keep its copy.
+        """
+        url = f"{self.base_url}/stops-force"
+        params = {
+            "force": force,
+            "date": year_month
+        }
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        try:
+            with stage("fetch"):
+                response = self._get(url, params=params, headers=headers)
+                response.raise_for_status()
+            if response.status_code == 304:
+                # servers may leave the validators off a 304; the ones we sent still hold then
+                return ConditionalStops(None, response.headers.get("ETag") or etag,
+                                        response.headers.get("Last-Modified") or last_modified)
+            with stage("decode"):
+                records = response.json()
+            return ConditionalStops(records, response.headers.get("ETag"),
+                                    response.headers.get("Last-Modified"))
+
+        except requests.exceptions.HTTPError as e:
+            raise ApiError(f"HTTP error {response.status_code}: {e}", status_code=response.status_code)
+        except requests.exceptions.RequestException as e:
+            raise ApiError(f"Request failed: {e}")
+        except ValueError as e:
+            raise ApiError(f"Invalid JSON response: {e}")
+
+    def iter_stops(self, force: str, year_month: str, chunk_size: int = 64 * 1024) -> Iterator[Dict]:
+        """
+        Stream stop & search records for one force and month.
+
+        The body is decoded element by element as it comes off the socket, so
+        memory use is one chunk + one record, however big the month is.
+        Errors surface as ApiError while iterating.
+        """
+        url = f"{self.base_url}/stops-force"
+        params = {
+            "force": force,
+            "date": year_month
+        }
+
+        try:
+            with self._get(url, params=params, stream=True) as response:
+                response.raise_for_status()
+                yield from iter_json_array(response.iter_content(chunk_size=chunk_size))
 
         except requests.exceptions.HTTPError as e:
-            raise ApiError(f"HTTP error {response.status_code}: {e}")
+            raise ApiError(f"HTTP error {response.status_code}: {e}", status_code=response.status_code)
         except requests.exceptions.RequestException as e:
             raise ApiError(f"Request failed: {e}")
         except ValueError as e:
@@ -66,7 +144,7 @@ class HttpPoliceApiClient(PoliceApiClient):
         params = {"force": force}
 
         try:
-            response = self.session.get(url, params=params, timeout=self.timeout)
+            response = self._get(url, params=params)
             response.raise_for_status()
             availability_data = response.json()
 
@@ -80,8 +158,27 @@ class HttpPoliceApiClient(PoliceApiClient):
 
         except requests.exceptions.HTTPError as e:
             # NOTE: same as above; consider e.response.status_code
-            raise ApiError(f"HTTP error {response.status_code}: {e}")
+            raise ApiError(f"HTTP error {response.status_code}: {e}", status_code=response.status_code)
+        except requests.exceptions.RequestException as e:
+            raise ApiError(f"Request failed: {e}")
+        except ValueError as e:
+            raise ApiError(f"Invalid JSON response: {e}")
+
+    def get_availability(self) -> List[Dict]:
+        """
+        Full availability matrix: every month, with the forces that have
+        stop & search data for it. One call covers all forces.
+        """
+        url = f"{self.base_url}/crimes-street-dates"
+
+        try:
+            response = self._get(url)
+            response.raise_for_status()
+            return response.json()
+
+        except requests.exceptions.HTTPError as e:
+            raise ApiError(f"HTTP error {response.status_code}: {e}", status_code=response.status_code)
         except requests.exceptions.RequestException as e:
             raise ApiError(f"Request failed: {e}")
         except ValueError as e:
-            raise ApiError(f"Invalid JSON response: {e}")
\ No newline at end of file
+            raise ApiError(f"Invalid JSON response: {e}")
@@ -0,0 +1,93 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Union
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(chunks: Iterable[Union[bytes, str]]) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array as its bytes arrive.
+
+    Only the element being decoded (plus whatever is left of the current
+    chunk) is held in memory, never the whole document. Raises ValueError
+    (json.JSONDecodeError) if the input isn't a well-formed array.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    state = "start"  # start -> first (after '[') -> value / separator -> done
+    chunks = iter(chunks)
+    eof = False
+
+    while True:
+        # skip whitespace; refill when we run out
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+
+        if pos >= len(buffer):
+            if eof:
+                break
+            buffer, pos, eof = _refill(buffer, pos, chunks, utf8)
+            continue
+
+        char = buffer[pos]
+        if state == "start":
+            if char != "[":
+                raise json.JSONDecodeError("Expected a JSON array", buffer, pos)
+            pos += 1
+            state = "first"
+        elif state == "separator":
+            if char == ",":
+                pos += 1
+                state = "value"
+            elif char == "]":
+                pos += 1
+                state = "done"
+            else:
+                raise json.JSONDecodeError("Expected ',' or ']'", buffer, pos)
+        elif state == "first" and char == "]":
+            pos += 1
+            state = "done"
+        elif state in ("first", "value"):
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # most likely the element continues in the next chunk
+                buffer, pos, eof = _refill(buffer, pos, chunks, utf8)
+                continue
+            if not eof and _number_may_continue(value, buffer, end):
+                # "12" might be the start of "123", "-0." of "-0.5"
+                buffer, pos, eof = _refill(buffer, pos, chunks, utf8)
+                continue
+            pos = end
+            state = "separator"
+            yield value
+        else:  # done: only whitespace may follow
+            raise json.JSONDecodeError("Extra data after JSON array", buffer, pos)
+
+    if state != "done":
+        raise json.JSONDecodeError("Unterminated JSON array", buffer, pos)
+
+
+def _number_may_continue(value: Any, buffer: str, end: int) -> bool:
+    """Only numbers can be cut short by a chunk boundary and still decode"""
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return False
+    rest = buffer[end:].lstrip(_WHITESPACE)
+    return not rest or rest[0] not in ",]"
+
+
+def _refill(buffer: str, pos: int, chunks: Iterator, utf8) -> tuple:
+    """Drop what's been consumed and append the next chunk; returns (buffer, pos, eof)"""
+    buffer = buffer[pos:]
+    for chunk in chunks:
+        if not chunk:
+            continue
+        text = utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if text:
+            return buffer + text, 0, False
+    return buffer + utf8.decode(b"", final=True), 0, True
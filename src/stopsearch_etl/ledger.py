@@ -0,0 +1,146 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from .sqlite_repository import Base
+from .timing import stage
+
+
+class IngestionLedgerTable(Base):
+    """One row per force-month we've loaded"""
+    __tablename__ = 'ingestion_ledger'
+
+    force = Column(String(100), primary_key=True)
+    month = Column(String(7), primary_key=True)  # YYYY-MM
+    record_count = Column(Integer)  # records in the API payload
+    payload_hash = Column(String(64))
+    availability_hash = Column(String(64))  # availability entry seen when we loaded it
+    loaded_at = Column(DateTime)
+
+
+@dataclass
+class LedgerEntry:
+    """What we know about a loaded force-month"""
+    force: str
+    month: str
+    record_count: int
+    payload_hash: Optional[str]
+    availability_hash: Optional[str]
+    loaded_at: datetime
+
+
+class PayloadHasher:
+    """Build payload_hash one record at a time (for streamed months)"""
+
+    def __init__(self):
+        self._digest = hashlib.sha256()
+
+    def update(self, raw_record: dict) -> None:
+        self._digest.update(json.dumps(raw_record, sort_keys=True, separators=(",", ":")).encode())
+        self._digest.update(b"\n")
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def payload_hash(raw_records: Iterable[dict]) -> str:
+    """
+    Stable sha256 of an API payload.
+
+    Hashes each record separately (keys sorted) so the same value can be built
+    up one record at a time when we don't hold the whole month in memory.
+    """
+    hasher = PayloadHasher()
+    for raw_record in raw_records:
+        hasher.update(raw_record)
+    return hasher.hexdigest()
+
+
+class IngestionLedger:
+    """Persistent record of which force-months are already in the database"""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def record_load(self, force: str, month: str, record_count: int, payload_hash: str,
+                    commit: bool = True) -> None:
+        """
+        Mark a force-month as loaded (overwrites the previous load)
+
+        commit=False leaves it in the session's transaction so it commits (or
+        rolls back) together with the records themselves.
+        """
+        values = {
+            "force": force,
+            "month": month,
+            "record_count": record_count,
+            "payload_hash": payload_hash,
+            "loaded_at": datetime.utcnow(),
+        }
+        stmt = insert(IngestionLedgerTable).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["force", "month"],
+            set_={k: v for k, v in values.items() if k not in ("force", "month")},
+        )
+        self.session.execute(stmt)
+        if commit:
+            with stage("commit"):
+                self.session.commit()
+
+    def record_availability(self, force: str, month: str, availability_hash: Optional[str]) -> None:
+        """Remember the availability entry a loaded force-month was fetched under"""
+        self.session.query(IngestionLedgerTable).filter_by(force=force, month=month).update(
+            {"availability_hash": availability_hash}
+        )
+        self.session.commit()
+
+    def entries_for(self, force: str) -> Dict[str, LedgerEntry]:
+        """Ledger rows for a force, keyed by month"""
+        rows = self.session.query(IngestionLedgerTable).filter_by(force=force).all()
+        return {
+            row.month: LedgerEntry(
+                force=row.force,
+                month=row.month,
+                record_count=row.record_count,
+                payload_hash=row.payload_hash,
+                availability_hash=row.availability_hash,
+                loaded_at=row.loaded_at,
+            )
+            for row in rows
+        }
+
+    def months_to_fetch(self, force: str, available_months: List[str],
+                        availability_hashes: Optional[Dict[str, str]] = None) -> List[str]:
+        """
+        Filter available months down to the ones an incremental run needs
+
+        A month is fetched when it isn't in the ledger yet, or when we know its
+        current availability entry and it differs from the one we loaded under.
+        Rows without a stored entry count as unchanged (see fill_missing_availability).
+        """
+        loaded = self.entries_for(force)
+        availability_hashes = availability_hashes or {}
+
+        months = []
+        for month in available_months:
+            entry = loaded.get(month)
+            if entry is None:
+                months.append(month)
+            elif (entry.availability_hash is not None and month in availability_hashes
+                  and availability_hashes[month] != entry.availability_hash):
+                months.append(month)
+        return months
+
+    def fill_missing_availability(self, force: str, availability_hashes: Dict[str, str]) -> None:
+        """Baseline loaded months that were recorded without an availability entry"""
+        for month, availability_hash in availability_hashes.items():
+            self.session.query(IngestionLedgerTable).filter_by(
+                force=force, month=month, availability_hash=None
+            ).update({"availability_hash": availability_hash})
+        self.session.commit()
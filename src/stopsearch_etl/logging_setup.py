@@ -0,0 +1,152 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Tuple
+
+# per-record warnings (one per bad API record) log here, so they can be sampled
+RECORDS_LOGGER = "stopsearch_etl.records"
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# everything a LogRecord has before `extra=` is applied; the rest is ours to emit
+_STANDARD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime"}
+
+# fields JsonFormatter fills itself; an extra with one of these names is
+# written as extra_<name> instead of replacing it
+RESERVED_FIELDS = ("timestamp", "level", "logger", "message", "exception")
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, logger, message, plus every
+    field passed with extra= (force, month, records_ingested, ...), which the
+    plain text format drops. Extras named like a RESERVED_FIELDS entry get an
+    extra_ prefix, so they can't pass for the record's own timestamp/level.
+    Values JSON can't handle are written as str().
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRIBUTES and not key.startswith("_"):
+                entry[f"extra_{key}" if key in RESERVED_FIELDS else key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Thin out repetitive records: for each message template, let the first
+    `burst` through, then one in every `every`. The record that does get
+    through carries `suppressed` = how many of its kind were dropped since
+    the last one, so totals can still be worked out from the logs.
+    """
+
+    def __init__(self, every: int, burst: int = 10):
+        super().__init__()
+        if every < 1:
+            raise ValueError("every must be at least 1")
+        self.every = every
+        self.burst = burst
+        self._seen: Dict[Tuple[str, object], int] = {}
+        self._suppressed: Dict[Tuple[str, object], int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.msg)
+        with self._lock:
+            seen = self._seen.get(key, 0) + 1
+            self._seen[key] = seen
+            if seen > self.burst and (seen - self.burst) % self.every:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _QueueListener(QueueListener):
+    """QueueListener whose stop() is safe to call again (atexit after a reconfigure)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.running = False
+
+    def start(self) -> None:
+        super().start()
+        self.running = True
+
+    def stop(self) -> None:
+        if self.running:
+            self.running = False
+            super().stop()
+
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler that keeps the exception apart from the message (so JSON gets its own field)"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level: str = "INFO", log_format: str = "text", sample_every: int = 1,
+                      stream=None) -> QueueListener:
+    """
+    Route all logging through a queue to one background writer thread.
+
+    Worker threads only put the record on an unbounded queue, so a slow
+    terminal or log shipper never stalls a fetch. Replaces whatever handlers
+    the root logger had; the listener is flushed and stopped at exit.
+
+    Args:
+        level: root log level
+        log_format: "text" (the usual one-liner) or "json" (one object per line, extras included)
+        sample_every: keep 1 in N per-record parse warnings after the first few (1 = keep all)
+        stream: where the writer thread writes (default stderr)
+    """
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    listener = _QueueListener(log_queue, handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+        if isinstance(existing, _QueueHandler):
+            existing.listener.stop()  # configured before (tests, repeated setup)
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.listener = listener
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level))
+
+    records_logger = logging.getLogger(RECORDS_LOGGER)
+    for existing in list(records_logger.filters):
+        if isinstance(existing, SamplingFilter):
+            records_logger.removeFilter(existing)
+    if sample_every > 1:
+        records_logger.addFilter(SamplingFilter(sample_every))
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -1,8 +1,12 @@
 import logging
-from dataclasses import dataclass, field
-from typing import List, Dict, Any
+import threading
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Deque, List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
+from .timing import STAGES, LatencyHistogram, StageSummary
+
 # Set up structured logging
 logger = logging.getLogger(__name__)
 
@@ -14,25 +18,38 @@ class EtlMetrics:
     total_records_deduplicated: int = 0
     total_batches_processed: int = 0
     total_batches_failed: int = 0
-    failed_batches: List[Dict[str, Any]] = field(default_factory=list)
-    # TODO: if this grows large, cap the list size or stream to storage
+    failed_batches: List[Dict[str, Any]] = field(default_factory=list)  # most recent ones only
 
 
 class MetricsCollector:
-    """Collects and tracks ETL operation metrics with structured logging."""
-
-    def __init__(self):
-        self.metrics = EtlMetrics()
-        # TODO: thread-safety: add a lock if called from multiple threads
+    """
+    Collects and tracks ETL operation metrics with structured logging.
+
+    Safe to call from any number of threads: counters are updated under one
+    lock, and get_current_metrics() hands back a copy, so a caller can read it
+    while workers keep recording. Only the last max_failures failures are
+    kept (total_batches_failed still counts all of them).
+
+    Per-stage timings (fetch, decode, transform, load, commit) go into one
+    log-bucketed histogram per force and stage; get_stage_summaries() and
+    log_summary() report their p50/p95/p99.
+    """
+
+    def __init__(self, max_failures: int = 1000):
+        self.max_failures = max_failures
+        self._metrics = EtlMetrics()
+        self._failures: Deque[Dict[str, Any]] = deque(maxlen=max_failures)
+        self._stage_histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
 
     def record_successful_batch(self, force: str, month: str, records_ingested: int, records_deduplicated: int) -> None:
         """Record a successful batch processing operation."""
-        self.metrics.total_records_ingested += records_ingested
-        self.metrics.total_records_deduplicated += records_deduplicated
-        self.metrics.total_batches_processed += 1
+        with self._lock:
+            self._metrics.total_records_ingested += records_ingested
+            self._metrics.total_records_deduplicated += records_deduplicated
+            self._metrics.total_batches_processed += 1
 
         # structured log (extra adds fields to the record)
-        # TODO: consider JSON formatter so these are easy to parse
         logger.info(
             "Batch completed successfully",
             extra={
@@ -46,8 +63,6 @@ class MetricsCollector:
 
     def record_failed_batch(self, force: str, month: str, error_message: str) -> None:
         """Record a failed batch processing operation."""
-        self.metrics.total_batches_failed += 1
-
         failure_info = {
             "batch_id": f"{force}-{month}",
             "force": force,
@@ -56,7 +71,9 @@ class MetricsCollector:
             "timestamp": datetime.utcnow().isoformat()
         }
 
-        self.metrics.failed_batches.append(failure_info)
+        with self._lock:
+            self._metrics.total_batches_failed += 1
+            self._failures.append(failure_info)  # oldest drops off once full
 
         # Structured logging
         logger.error(
@@ -64,32 +81,71 @@ class MetricsCollector:
             extra=failure_info
         )
 
+    def record_stage_timings(self, force: str, seconds: Dict[str, float]) -> None:
+        """Add one force-month's per-stage seconds (e.g. StageTimer.seconds) to the histograms"""
+        with self._lock:
+            for stage, value in seconds.items():
+                histogram = self._stage_histograms.get((force, stage))
+                if histogram is None:
+                    histogram = self._stage_histograms[(force, stage)] = LatencyHistogram()
+                histogram.record(value)
+
+    def get_stage_summaries(self, force: Optional[str] = None) -> Dict[str, Dict[str, StageSummary]]:
+        """p50/p95/p99 per force and stage (seconds), stages in pipeline order; one force if given"""
+        order = {stage: index for index, stage in enumerate(STAGES)}
+        summaries: Dict[str, Dict[str, StageSummary]] = {}
+        with self._lock:
+            keys = sorted(self._stage_histograms, key=lambda key: (key[0], order.get(key[1], len(order)), key[1]))
+            for key in keys:
+                if force is None or key[0] == force:
+                    summaries.setdefault(key[0], {})[key[1]] = self._stage_histograms[key].summary()
+        return summaries
+
+    @property
+    def metrics(self) -> EtlMetrics:
+        """Same snapshot as get_current_metrics(); assigning to it won't reach the collector"""
+        return self.get_current_metrics()
+
     def get_current_metrics(self) -> EtlMetrics:
-        """Return current totals"""
-        return self.metrics
+        """Return a snapshot of the current totals (later recording doesn't change it)"""
+        with self._lock:
+            return replace(self._metrics, failed_batches=list(self._failures))
 
     def reset(self) -> None:
         """Reset all counters"""
-        self.metrics = EtlMetrics()
+        with self._lock:
+            self._metrics = EtlMetrics()
+            self._failures.clear()
+            self._stage_histograms.clear()
 
     def log_summary(self) -> None:
         """log summary of current metrics."""
+        metrics = self.get_current_metrics()
         logger.info(
             "ETL operation summary",
             extra={
-                "total_records_ingested": self.metrics.total_records_ingested,
-                "total_records_deduplicated": self.metrics.total_records_deduplicated,
-                "total_batches_processed": self.metrics.total_batches_processed,
-                "total_batches_failed": self.metrics.total_batches_failed,
-                "success_rate": self._calculate_success_rate(),
+                "total_records_ingested": metrics.total_records_ingested,
+                "total_records_deduplicated": metrics.total_records_deduplicated,
+                "total_batches_processed": metrics.total_batches_processed,
+                "total_batches_failed": metrics.total_batches_failed,
+                "success_rate": self._calculate_success_rate(metrics),
                 "timestamp": datetime.utcnow().isoformat()
             }
         )
 
-    def _calculate_success_rate(self) -> float:
+        # one line per force: where its time went
+        for force, stages in self.get_stage_summaries().items():
+            extra: Dict[str, Any] = {"force": force}
+            for stage, summary in stages.items():
+                extra[f"{stage}_count"] = summary.count
+                for name in ("p50", "p95", "p99"):
+                    extra[f"{stage}_{name}_ms"] = round(getattr(summary, name) * 1000, 3)
+            logger.info("Stage timings", extra=extra)
+
+    def _calculate_success_rate(self, metrics: EtlMetrics) -> float:
         """Return success ratio"""
-        total_batches = self.metrics.total_batches_processed + self.metrics.total_batches_failed
+        total_batches = metrics.total_batches_processed + metrics.total_batches_failed
         if total_batches == 0:
             return 0.0
         # TODO: if you want percent, multiply by 100.0 in the caller/formatter
-        return self.metrics.total_batches_processed / total_batches
\ No newline at end of file
+        return metrics.total_batches_processed / total_batches
\ No newline at end of file
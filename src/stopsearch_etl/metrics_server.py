@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional
+
+from .adaptive import AimdController
+from .caching_client import CachingPoliceApiClient
+from .metrics import MetricsCollector
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "stopsearch"
+QUANTILES = (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))
+
+
+class MetricsExporter:
+    """
+    Renders what the process already tracks in Prometheus text format.
+
+    Nothing is sampled or aggregated in the background: every number is read
+    from the collector / limiter / cache / scheduler when render() is called,
+    so a process nobody scrapes pays nothing for having an exporter. Every
+    source is optional; missing ones are just left out.
+    """
+
+    def __init__(self, metrics_collector: Optional[MetricsCollector] = None,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 api_cache: Optional[CachingPoliceApiClient] = None,
+                 concurrency: Optional[AimdController] = None,
+                 database_path: Optional[str] = None, scheduler=None):
+        """
+        Args:
+            metrics_collector: batch counters and stage-latency histograms
+            rate_limiter: shared TokenBucket (requests, wait time, throttles)
+            api_cache: response cache (hits, misses, size)
+            concurrency: AIMD controller (current limit, in flight)
+            database_path: SQLite file whose size (incl. WAL) to report
+            scheduler: EtlScheduler, for the last-run timestamps
+        """
+        self.metrics_collector = metrics_collector
+        self.rate_limiter = rate_limiter
+        self.api_cache = api_cache
+        self.concurrency = concurrency
+        self.database_path = database_path
+        self.scheduler = scheduler
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        if self.metrics_collector is not None:
+            metrics = self.metrics_collector.get_current_metrics()
+            _metric(lines, "records_ingested_total", "counter", "Records inserted",
+                    metrics.total_records_ingested)
+            _metric(lines, "records_deduplicated_total", "counter", "Records skipped as already stored",
+                    metrics.total_records_deduplicated)
+            _metric(lines, "batches_processed_total", "counter", "Force-months loaded",
+                    metrics.total_batches_processed)
+            _metric(lines, "batches_failed_total", "counter", "Force-months that failed",
+                    metrics.total_batches_failed)
+            self._render_stages(lines)
+
+        if self.rate_limiter is not None:
+            stats = self.rate_limiter.stats
+            _metric(lines, "rate_limit_requests_total", "counter", "Requests that took a token", stats.requests)
+            _metric(lines, "rate_limit_delayed_total", "counter", "Requests that waited for a token",
+                    stats.delayed)
+            _metric(lines, "rate_limit_wait_seconds_total", "counter", "Time spent waiting for tokens",
+                    stats.wait_seconds)
+            _metric(lines, "rate_limit_throttled_total", "counter", "Retry-After responses seen",
+                    stats.throttled)
+            _metric(lines, "rate_limit_rate", "gauge", "Current requests per second allowed",
+                    self.rate_limiter.rate)
+
+        if self.api_cache is not None:
+            stats = self.api_cache.stats
+            for name in ("hits", "revalidated", "misses", "evictions"):
+                _metric(lines, f"api_cache_{name}_total", "counter", f"Response cache {name}",
+                        getattr(stats, name))
+            _metric(lines, "api_cache_stored_bytes", "gauge", "Compressed bodies in the response cache",
+                    stats.stored_bytes)
+
+        if self.concurrency is not None:
+            _metric(lines, "concurrency_limit", "gauge", "Current adaptive in-flight limit",
+                    self.concurrency.limit)
+            _metric(lines, "concurrency_in_flight", "gauge", "Fetches in flight", self.concurrency.in_flight)
+
+        if self.database_path:
+            _metric(lines, "database_size_bytes", "gauge", "SQLite database size incl. WAL",
+                    _database_size(self.database_path))
+
+        if self.scheduler is not None:
+            for name, help_text in [("last_run_start", "Start of the last ETL run"),
+                                    ("last_run_end", "End of the last ETL run"),
+                                    ("last_success", "End of the last ETL run that didn't raise")]:
+                value = getattr(self.scheduler, f"{name}_at", None)
+                if value is not None:
+                    _metric(lines, f"{name}_timestamp_seconds", "gauge", help_text, value)
+
+        return "\n".join(lines) + "\n"
+
+    def _render_stages(self, lines: List[str]) -> None:
+        summaries = self.metrics_collector.get_stage_summaries()
+        if not summaries:
+            return
+        name = f"{PREFIX}_stage_duration_seconds"
+        lines.append(f"# HELP {name} Time per force-month spent in each ETL stage")
+        lines.append(f"# TYPE {name} summary")
+        for force, stages in summaries.items():
+            for stage, summary in stages.items():
+                labels = f'force="{_escape(force)}",stage="{_escape(stage)}"'
+                for quantile, field in QUANTILES:
+                    lines.append(f'{name}{{{labels},quantile="{quantile}"}} {_format(getattr(summary, field))}')
+                lines.append(f"{name}_sum{{{labels}}} {_format(summary.total)}")
+                lines.append(f"{name}_count{{{labels}}} {summary.count}")
+
+
+class MetricsServer:
+    """
+    Serves MetricsExporter.render() at GET /metrics on a daemon thread
+    (stdlib http.server, nothing to install). port=0 picks a free port.
+    """
+
+    def __init__(self, exporter: MetricsExporter, port: int, host: str = "0.0.0.0"):
+        self.exporter = exporter
+        self.port = port
+        self.host = host
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> "MetricsServer":
+        if self._server is not None:
+            return self
+        exporter = self.exporter
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                try:
+                    body = exporter.render().encode()
+                except Exception as e:  # a broken source shouldn't kill the scrape thread
+                    logger.exception("Rendering metrics failed")
+                    self.send_error(500, str(e))
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # scrapes every few seconds would drown the ETL's own logs
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%d/metrics", self.host, self.port)
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _metric(lines: List[str], name: str, kind: str, help_text: str, value: Any) -> None:
+    lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+    lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+    lines.append(f"{PREFIX}_{name} {_format(value)}")
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _database_size(path: str) -> int:
+    total = 0
+    for suffix in ("", "-wal"):
+        try:
+            total += os.path.getsize(path + suffix)
+        except OSError:
+            pass
+    return total
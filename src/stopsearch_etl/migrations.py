@@ -0,0 +1,385 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Set
+
+from sqlalchemy import Column, DateTime, Integer, String, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from .domain import month_bounds
+from .sqlite_repository import Base, StopSearchTable
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaMigrationTable(Base):
+    """Which schema migrations have already run on this database"""
+    __tablename__ = 'schema_migrations'
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String(200), nullable=False)
+    applied_at = Column(DateTime, nullable=False)
+
+
+@dataclass
+class Migration:
+    """
+    One schema change.
+
+    apply() normally gets a Connection inside the migration's transaction.
+    transactional=False migrations get the Engine and commit in their own
+    small steps instead (long data backfills); they must be safe to rerun,
+    since a crash halfway leaves them unrecorded.
+
+    heavy(connection) says whether applying it to this database would rewrite
+    or lock the whole table. Those only run from the `migrate` command
+    (run_migrations(..., maintenance=True)), never as a side effect of startup.
+
+    superseded(connection) says this database was created after a later
+    migration replaced what this one changes; it's then recorded as applied
+    without running. Lets a shipped migration stay as it was while new
+    databases start from a different schema.
+    """
+    version: int
+    name: str
+    apply: Callable[..., None]
+    transactional: bool = True
+    heavy: Optional[Callable[[Connection], bool]] = None
+    superseded: Optional[Callable[[Connection], bool]] = None
+
+
+class MaintenanceRequired(RuntimeError):
+    """A pending migration needs an explicit `migrate` run before the app can use the database"""
+
+
+# point per located record (min == max); ids match stop_search_records.id
+SPATIAL_INDEX_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS stop_search_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    """CREATE TRIGGER IF NOT EXISTS stop_search_rtree_insert
+       AFTER INSERT ON stop_search_records
+       WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL
+       BEGIN
+           INSERT INTO stop_search_rtree (id, min_lat, max_lat, min_lon, max_lon)
+           VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS stop_search_rtree_update
+       AFTER UPDATE OF latitude, longitude ON stop_search_records
+       BEGIN
+           DELETE FROM stop_search_rtree WHERE id = old.id;
+           INSERT INTO stop_search_rtree (id, min_lat, max_lat, min_lon, max_lon)
+           SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+           WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS stop_search_rtree_delete
+       AFTER DELETE ON stop_search_records
+       BEGIN
+           DELETE FROM stop_search_rtree WHERE id = old.id;
+       END""",
+]
+
+
+def create_spatial_index(connection: Connection) -> None:
+    """R*Tree + the triggers that keep it in step with stop_search_records"""
+    for statement in SPATIAL_INDEX_DDL:
+        connection.exec_driver_sql(statement)
+
+
+def _columns(connection: Connection, table: str = "stop_search_records") -> Set[str]:
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def _add_secondary_indexes(connection: Connection) -> None:
+    # No separate datetime index: unique_stop_search starts with datetime, so its
+    # autoindex already serves the month range scan.
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_stop_search_outcome ON stop_search_records (outcome)"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_stop_search_type ON stop_search_records (type)"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_stop_search_lat_lon ON stop_search_records (latitude, longitude)"
+    )
+    # fresh stats so the planner actually picks the new indexes
+    connection.exec_driver_sql("ANALYZE stop_search_records")
+
+
+def _add_spatial_index(connection: Connection) -> None:
+    create_spatial_index(connection)
+    # index what's already there; the triggers handle everything from now on
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO stop_search_rtree (id, min_lat, max_lat, min_lon, max_lon) "
+        "SELECT id, latitude, latitude, longitude, longitude FROM stop_search_records "
+        "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    )
+
+
+def _add_force_column(connection: Connection) -> None:
+    # new databases already have it from create_all
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(stop_search_records)")}
+    if "force" not in columns:
+        # constant default, so SQLite only touches the schema, not every row
+        connection.exec_driver_sql(
+            "ALTER TABLE stop_search_records ADD COLUMN force VARCHAR(100) NOT NULL DEFAULT ''"
+        )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_stop_search_force_datetime ON stop_search_records (force, datetime)"
+    )
+
+
+FORCE_BACKFILL_CHUNK = 5000
+
+
+def _backfill_force(engine: Engine) -> None:
+    """
+    Fill in force for rows loaded before it was stored, using the ingestion ledger.
+
+    A month that only one force ever loaded can only be that force's rows.
+    Months several forces loaded are ambiguous and stay '' (unknown). Each
+    chunk is its own short transaction, so readers and the ETL keep going.
+    """
+    with engine.connect() as connection:
+        has_ledger = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ingestion_ledger'"
+        ).first() is not None
+        if not has_ledger:
+            return
+        months = connection.exec_driver_sql(
+            "SELECT month, min(force), count(*) FROM ingestion_ledger GROUP BY month ORDER BY month"
+        ).all()
+
+    ambiguous = 0
+    for month, force, force_count in months:
+        if force_count != 1:
+            ambiguous += 1
+            continue
+
+        start, end = month_bounds(month)
+        unknown_ids = select(StopSearchTable.id).where(
+            StopSearchTable.force == '',
+            StopSearchTable.datetime >= start,
+            StopSearchTable.datetime < end,
+        ).limit(FORCE_BACKFILL_CHUNK)
+        stmt = update(StopSearchTable).where(StopSearchTable.id.in_(unknown_ids)).values(force=force)
+
+        while True:
+            with engine.begin() as connection:
+                updated = connection.execute(stmt).rowcount
+            if updated < FORCE_BACKFILL_CHUNK:
+                break
+
+    if ambiguous:
+        logger.warning("%d months were loaded by more than one force; their rows keep an unknown force",
+                       ambiguous)
+
+
+# dictionary-encoded text columns, as of migration 5 (frozen here on purpose:
+# the migration must do the same thing whatever the model looks like later)
+ENCODED_COLUMNS = (
+    "type", "gender", "age_range", "self_defined_ethnicity", "officer_defined_ethnicity",
+    "legislation", "object_of_search", "outcome",
+)
+
+ENCODED_TABLE_DDL = """
+CREATE TABLE stop_search_records_encoded (
+    id INTEGER NOT NULL,
+    type_id INTEGER,
+    datetime DATETIME,
+    gender_id INTEGER,
+    age_range_id INTEGER,
+    self_defined_ethnicity_id INTEGER,
+    officer_defined_ethnicity_id INTEGER,
+    legislation_id INTEGER,
+    object_of_search_id INTEGER,
+    outcome_id INTEGER,
+    outcome_linked_to_object_of_search BOOLEAN,
+    removal_of_more_than_outer_clothing BOOLEAN,
+    latitude FLOAT,
+    longitude FLOAT,
+    street_id INTEGER,
+    street_name VARCHAR(500),
+    force VARCHAR(100) DEFAULT '' NOT NULL,
+    PRIMARY KEY (id),
+    CONSTRAINT unique_stop_search UNIQUE ({unique_key}),
+    FOREIGN KEY(type_id) REFERENCES category_values (id),
+    FOREIGN KEY(gender_id) REFERENCES category_values (id),
+    FOREIGN KEY(age_range_id) REFERENCES category_values (id),
+    FOREIGN KEY(self_defined_ethnicity_id) REFERENCES category_values (id),
+    FOREIGN KEY(officer_defined_ethnicity_id) REFERENCES category_values (id),
+    FOREIGN KEY(legislation_id) REFERENCES category_values (id),
+    FOREIGN KEY(object_of_search_id) REFERENCES category_values (id),
+    FOREIGN KEY(outcome_id) REFERENCES category_values (id)
+)
+"""
+
+UNIQUE_KEY = "datetime, latitude, longitude, type_id, legislation_id, force"
+# the key from before force was stored: kept while rows of unknown force ('')
+# remain, or reloading those months would insert every row again with its force
+LEGACY_UNIQUE_KEY = "datetime, latitude, longitude, type_id, legislation_id"
+
+# the same (non-category) columns before and after the rebuild
+_PLAIN_COLUMNS = (
+    "id", "datetime", "outcome_linked_to_object_of_search", "removal_of_more_than_outer_clothing",
+    "latitude", "longitude", "street_id", "street_name", "force",
+)
+
+
+def _decoded_view_sql() -> str:
+    """stop_search_records with the category ids swapped back for text, for ad-hoc SQL"""
+    joins = " ".join(
+        f"LEFT JOIN category_values c_{name} ON c_{name}.id = r.{name}_id" for name in ENCODED_COLUMNS
+    )
+    selected = ", ".join(
+        [f"r.{name}" for name in _PLAIN_COLUMNS] + [f"c_{name}.value AS {name}" for name in ENCODED_COLUMNS]
+    )
+    return f"CREATE VIEW IF NOT EXISTS stop_search_records_decoded AS SELECT {selected} FROM stop_search_records r {joins}"
+
+
+def _has_text_columns(connection: Connection) -> bool:
+    return "outcome" in _columns(connection)
+
+
+def _created_encoded(connection: Connection) -> bool:
+    # new databases come from create_all already dictionary encoded; migration 5
+    # gives them the outcome_id/type_id and lat/lon indexes instead of migration 1's
+    return not _has_text_columns(connection)
+
+
+def _dictionary_encode(connection: Connection) -> None:
+    """
+    Move the low-cardinality text columns into category_values and keep ids.
+
+    SQLite can't change column types in place, so this is the usual table
+    rebuild: new table, copy, drop, rename. Dropping the old table takes its
+    indexes and the R*Tree triggers with it, so they're all recreated here
+    (the R*Tree rows themselves survive, ids are kept). New databases
+    already have the encoded table from create_all and only get the extras.
+
+    Rows whose force migration 4 couldn't work out still have force = '', so
+    the rebuilt table keeps the old force-less unique key while any remain.
+    """
+    if _has_text_columns(connection):
+        for name in ENCODED_COLUMNS:
+            connection.exec_driver_sql(
+                f"INSERT OR IGNORE INTO category_values (category, value) "
+                f"SELECT DISTINCT '{name}', {name} FROM stop_search_records WHERE {name} IS NOT NULL"
+            )
+
+        unknown_force = connection.exec_driver_sql(
+            "SELECT 1 FROM stop_search_records WHERE force = '' LIMIT 1"
+        ).first() is not None
+        connection.exec_driver_sql(
+            ENCODED_TABLE_DDL.format(unique_key=LEGACY_UNIQUE_KEY if unknown_force else UNIQUE_KEY)
+        )
+        joins = " ".join(
+            f"LEFT JOIN category_values c_{name} ON c_{name}.category = '{name}' AND c_{name}.value = r.{name}"
+            for name in ENCODED_COLUMNS
+        )
+        connection.exec_driver_sql(
+            f"INSERT INTO stop_search_records_encoded "
+            f"({', '.join(_PLAIN_COLUMNS)}, {', '.join(f'{name}_id' for name in ENCODED_COLUMNS)}) "
+            f"SELECT {', '.join(f'r.{name}' for name in _PLAIN_COLUMNS)}, "
+            f"{', '.join(f'c_{name}.id' for name in ENCODED_COLUMNS)} "
+            f"FROM stop_search_records r {joins}"
+        )
+        connection.exec_driver_sql("DROP TABLE stop_search_records")
+        connection.exec_driver_sql("ALTER TABLE stop_search_records_encoded RENAME TO stop_search_records")
+
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_stop_search_outcome_id ON stop_search_records (outcome_id)"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_stop_search_type_id ON stop_search_records (type_id)"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_stop_search_lat_lon ON stop_search_records (latitude, longitude)"
+    )
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_stop_search_force_datetime ON stop_search_records (force, datetime)"
+    )
+    create_spatial_index(connection)
+    connection.exec_driver_sql(_decoded_view_sql())
+    connection.exec_driver_sql("ANALYZE stop_search_records")
+
+
+def reclaim_space(engine: Engine) -> None:
+    """
+    VACUUM: give back the pages a table rebuild freed. Rewrites the whole
+    file under an exclusive lock, so it's only run on request (`migrate --vacuum`).
+    """
+    # VACUUM can't run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("VACUUM")
+
+
+# append only; never renumber or edit one that has shipped
+MIGRATIONS: List[Migration] = [
+    Migration(1, "secondary indexes on outcome, type, lat/lon", _add_secondary_indexes,
+              superseded=_created_encoded),
+    Migration(2, "R*Tree spatial index on stop_search_records", _add_spatial_index),
+    Migration(3, "force column and (force, datetime) index", _add_force_column),
+    Migration(4, "backfill force from the ingestion ledger", _backfill_force, transactional=False),
+    Migration(5, "dictionary-encode the categorical columns", _dictionary_encode, heavy=_has_text_columns),
+]
+
+
+def applied_versions(engine: Engine) -> Set[int]:
+    """Versions already recorded in schema_migrations"""
+    with engine.connect() as connection:
+        return set(connection.execute(select(SchemaMigrationTable.version)).scalars())
+
+
+def run_migrations(engine: Engine, migrations: List[Migration] = MIGRATIONS,
+                   maintenance: bool = False) -> List[int]:
+    """
+    Apply pending migrations in version order, one transaction each.
+
+    Expects Base.metadata.create_all to have run first (tables exist).
+
+    Args:
+        maintenance: also apply migrations that would rewrite the whole table
+            on this database (the `migrate` command); otherwise stop at the first one
+
+    Returns:
+        Versions applied by this call
+
+    Raises:
+        MaintenanceRequired: a heavy migration is pending and maintenance is False
+            (the ones before it are still applied)
+    """
+    SchemaMigrationTable.__table__.create(engine, checkfirst=True)
+    done = applied_versions(engine)
+
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        if migration.heavy is not None and not maintenance:
+            with engine.connect() as connection:
+                if migration.heavy(connection):
+                    raise MaintenanceRequired(
+                        f"Migration {migration.version} ({migration.name}) rewrites the whole table; "
+                        f"run `stopsearch-etl migrate` while nothing else is using the database"
+                    )
+
+        logger.info("Applying migration %d: %s", migration.version, migration.name)
+        if not migration.transactional:
+            migration.apply(engine)
+
+        with engine.begin() as connection:
+            if migration.transactional:
+                if connection.dialect.name == "sqlite":
+                    # pysqlite doesn't BEGIN before DDL, so without this a failed
+                    # migration would leave its CREATE/DROP statements behind
+                    connection.exec_driver_sql("BEGIN")
+                if migration.superseded is not None and migration.superseded(connection):
+                    logger.info("Migration %d is superseded on this database, recording it only",
+                                migration.version)
+                else:
+                    migration.apply(connection)
+            connection.execute(SchemaMigrationTable.__table__.insert().values(
+                version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+            ))
+        applied.append(migration.version)
+
+    return applied
@@ -1,7 +1,17 @@
+import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
-from typing import List
+from typing import Deque, Dict, List, Optional, Tuple, Union
 
-from .backfill_service import BackfillService
+from .adaptive import AimdController
+from .api import ApiError
+from .backfill_service import BackfillResult, BackfillService
+from .etl_service import ExtractedMonth
+from .ratelimit import rate_limit_wait
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -33,11 +43,11 @@ class MultiForceRunner:
         if not forces:
             return summary
 
-        print(f"Starting backfill for {len(forces)} forces...")
+        logger.info("Starting backfill for %d forces...", len(forces), extra={"forces": len(forces)})
 
         for force in forces:
             try:
-                print(f"Processing force: {force}")
+                logger.info("Processing force: %s", force, extra={"force": force})
 
                 result = self.backfill_service.backfill_force(force)
 
@@ -47,16 +57,205 @@ class MultiForceRunner:
                 summary.total_months_failed += result.months_failed
                 summary.forces_completed += 1
 
-                print(f"Completed {force}: {result.total_records} records from {result.months_processed} months")
+                _log_force_completed(force, result)
                 # TODO: progress callback / hook for UI
 
             except Exception as e:
                 summary.forces_failed += 1
                 summary.failed_forces.append(force)
-                print(f"Failed to process force {force}: {e}")
+                logger.error("Failed to process force %s: %s", force, e, extra={"force": force, "error": str(e)})
                 # TODO: consider fail-fast flag to stop on first error
                 # Continue with other forces
 
-        print(f"Backfill complete: {summary.total_records} total records, {summary.forces_completed}/{len(forces)} forces successful")
+        _log_backfill_complete(summary, forces)
+
+        return summary
+
+
+class ConcurrentMultiForceRunner(MultiForceRunner):
+    """
+    Backfill many forces at once from one shared worker pool.
+
+    Every force's months go into one schedule of (force, month) tasks. At most
+    max_in_flight are being fetched/parsed at any time, and at most
+    per_force_limit of those belong to the same force, handed out round-robin
+    so one force with a long history can't starve the rest. Workers only fetch
+    and parse; the calling thread does all the writing (several months per
+    transaction) and the ledger / work queue bookkeeping, like
+    ConcurrentEtlService does for a single force.
+
+    Month discovery and incremental skipping go through BackfillService, so the
+    summary comes out the same as MultiForceRunner's, just sooner.
+    """
+
+    def __init__(self, backfill_service: BackfillService, max_in_flight: int = 8,
+                 per_force_limit: int = 2, months_per_transaction: int = 8,
+                 concurrency: Optional[AimdController] = None):
+        """
+        Args:
+            backfill_service: plans each force's months and does the bookkeeping
+            max_in_flight: months being fetched/parsed at once, across all forces
+            per_force_limit: most in-flight months one force may have (fairness cap)
+            months_per_transaction: most finished months written in one commit
+            concurrency: adapt the in-flight limit at runtime (between its bounds,
+                never above max_in_flight) instead of always using max_in_flight
+        """
+        if max_in_flight < 1 or per_force_limit < 1:
+            raise ValueError("max_in_flight and per_force_limit must be at least 1")
+
+        super().__init__(backfill_service)
+        self.etl_service = backfill_service.etl_service
+        self.max_in_flight = max_in_flight
+        self.per_force_limit = per_force_limit
+        self.months_per_transaction = months_per_transaction
+        self.concurrency = concurrency
+
+    def run_backfill(self, forces: List[str]) -> MultiForceRunSummary:
+        """Run backfill for every force in the list concurrently"""
+        summary = MultiForceRunSummary()
+
+        if not forces:
+            return summary
+
+        logger.info("Starting backfill for %d forces (%d in flight, %d per force)...",
+                    len(forces), self.max_in_flight, self.per_force_limit,
+                    extra={"forces": len(forces), "max_in_flight": self.max_in_flight,
+                           "per_force_limit": self.per_force_limit})
+
+        pending: Dict[str, Deque[str]] = {}
+        results: Dict[str, BackfillResult] = {}
+        for force in forces:
+            try:
+                months = self.backfill_service.plan_months(force)
+            except ApiError as e:
+                # same as backfill_force: no month list = nothing to do for this force
+                logger.error("Failed to get available months for %s: %s", force, e, extra={"force": force})
+                months = []
+            except Exception as e:
+                summary.forces_failed += 1
+                summary.failed_forces.append(force)
+                logger.error("Failed to process force %s: %s", force, e, extra={"force": force, "error": str(e)})
+                continue
+            pending[force] = deque(months)
+            results[force] = BackfillResult(force=force, total_records=0, months_processed=0, months_failed=0)
+
+        self._run_tasks(pending, results)
+
+        for force, result in results.items():
+            summary.total_records += result.total_records
+            summary.total_months_processed += result.months_processed
+            summary.total_months_failed += result.months_failed
+            summary.forces_completed += 1
+            _log_force_completed(force, result)
+
+        _log_backfill_complete(summary, forces)
+
+        return summary
+
+    def _run_tasks(self, pending: Dict[str, Deque[str]], results: Dict[str, BackfillResult]) -> None:
+        """Dispatch fairly, write finished months here, until every queue is empty"""
+        in_flight: Dict[str, int] = {force: 0 for force in pending}
+        running: Dict[Future, Tuple[str, str]] = {}
+        rotation = deque(force for force, months in pending.items() if months)
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="etl-force") as executor:
+            while rotation or running:
+                # top up: walk the forces round-robin, skipping ones at their cap
+                checked = 0
+                while rotation and self._has_capacity(running) and checked < len(rotation):
+                    force = rotation[0]
+                    rotation.rotate(-1)
+                    if in_flight[force] >= self.per_force_limit:
+                        checked += 1
+                        continue
+                    checked = 0
+                    month = pending[force].popleft()
+                    if not pending[force]:
+                        rotation.remove(force)
+                    self._mark_running(force, month)
+                    if self.concurrency is not None:
+                        self.concurrency.acquire()  # has capacity, so this doesn't block
+                    in_flight[force] += 1
+                    running[executor.submit(self._fetch, force, month)] = (force, month)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                finished = [(future, running.pop(future)) for future in list(done)[:self.months_per_transaction]]
+                for _, (force, _month) in finished:
+                    in_flight[force] -= 1
+                self._write([future.result() for future, _ in finished], results)
+
+    def _has_capacity(self, running: Dict[Future, Tuple[str, str]]) -> bool:
+        if len(running) >= self.max_in_flight:
+            return False
+        return self.concurrency is None or self.concurrency.has_capacity()
+
+    def _fetch(self, force: str, month: str) -> Union[ExtractedMonth, Tuple[str, str, Exception]]:
+        """Worker: fetch + parse, never touches the database"""
+        start, waited = time.monotonic(), rate_limit_wait()
+        try:
+            item = self.etl_service.extract_transform(force, month)
+        except Exception as e:
+            item = force, month, e
+        if self.concurrency is not None:
+            # waiting for our own rate limiter isn't server latency
+            latency = time.monotonic() - start - (rate_limit_wait() - waited)
+            self.concurrency.release(latency, item[2] if isinstance(item, tuple) else None)
+        return item
+
+    def _write(self, items: List[Union[ExtractedMonth, tuple]], results: Dict[str, BackfillResult]) -> None:
+        extracted = [item for item in items if isinstance(item, ExtractedMonth)]
+        for item in items:
+            if not isinstance(item, ExtractedMonth):
+                self._finish(results, *item)
+        if extracted:
+            self._load(extracted, results)
+
+    def _load(self, extracted: List[ExtractedMonth], results: Dict[str, BackfillResult]) -> None:
+        try:
+            # a shared transaction that fails is retried month by month below,
+            # so only the single-month attempt counts as a failure
+            saved_counts = self.etl_service.load_many(extracted, record_failures=len(extracted) == 1)
+        except Exception as e:
+            if len(extracted) == 1:
+                self._finish(results, extracted[0].force, extracted[0].month, e)
+                return
+            # one bad month shouldn't sink the others sharing its transaction
+            for month in extracted:
+                self._load([month], results)
+            return
+
+        for month, records_saved in zip(extracted, saved_counts):
+            self._finish(results, month.force, month.month, None, records_saved)
+
+    def _finish(self, results: Dict[str, BackfillResult], force: str, month: str,
+                error: Optional[Exception], records_saved: int = 0) -> None:
+        """Roll one month's outcome into its force's result + ledger/work queue"""
+        result = results[force]
+        if error is None:
+            result.total_records += records_saved
+            result.months_processed += 1
+            self.backfill_service.month_loaded(force, month)
+            logger.info("Processed %s %s: %d records", force, month, records_saved,
+                        extra={"force": force, "month": month, "records_saved": records_saved})
+        else:
+            result.months_failed += 1
+            self.backfill_service.month_failed(force, month, error)
+            logger.error("Failed to process %s %s: %s", force, month, error,
+                         extra={"force": force, "month": month, "error": str(error)})
+
+    def _mark_running(self, force: str, month: str) -> None:
+        if self.backfill_service.work_queue is not None:
+            self.backfill_service.work_queue.mark_running(force, month)
+
+
+def _log_force_completed(force: str, result: BackfillResult) -> None:
+    logger.info("Completed %s: %d records from %d months", force, result.total_records, result.months_processed,
+                extra={"force": force, "records": result.total_records, "months_processed": result.months_processed,
+                       "months_failed": result.months_failed})
+
 
-        return summary
\ No newline at end of file
+def _log_backfill_complete(summary: MultiForceRunSummary, forces: List[str]) -> None:
+    logger.info("Backfill complete: %d total records, %d/%d forces successful",
+                summary.total_records, summary.forces_completed, len(forces),
+                extra={"records": summary.total_records, "forces_completed": summary.forces_completed,
+                       "forces_failed": summary.forces_failed, "months_failed": summary.total_months_failed})
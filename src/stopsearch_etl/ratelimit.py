@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# statuses whose Retry-After we treat as "slow down" (same set urllib3 honours)
+RETRY_AFTER_STATUSES = (413, 429, 503)
+
+# seconds this thread/task has waited for tokens, across every bucket
+_waited: ContextVar[float] = ContextVar("stopsearch_rate_limit_wait", default=0.0)
+
+
+def rate_limit_wait() -> float:
+    """
+    Running total of the time the current thread/task has spent waiting in
+    TokenBucket.acquire. Read it before and after a block to get the block's
+    own wait, e.g. to take it out of a latency measurement.
+    """
+    return _waited.get()
+
+
+@dataclass
+class RateLimitStats:
+    """What the limiter has done so far"""
+    requests: int = 0  # tokens handed out
+    delayed: int = 0  # requests that had to wait for a token
+    wait_seconds: float = 0.0  # total time callers spent waiting
+    max_wait_seconds: float = 0.0
+    throttled: int = 0  # Retry-After responses seen
+
+
+class TokenBucket:
+    """
+    Shared request budget: `rate` requests per second on average, with up to
+    `burst` in quick succession after a quiet spell.
+
+    One bucket is meant to be shared by every thread (acquire) and coroutine
+    (acquire_async) that talks to the API, so the process as a whole stays
+    under the limit instead of each worker pacing itself. Callers reserve
+    their slot under the lock and then sleep outside it, so waiters are served
+    in arrival order and nobody spins.
+
+    When the server still answers 429/503 with Retry-After, throttled() pauses
+    everyone until then and halves the rate; the rate then climbs back to the
+    configured one over recovery_seconds.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, recovery_seconds: float = 60.0,
+                 clock=time.monotonic):
+        """
+        Args:
+            rate: requests per second to allow on average
+            burst: bucket size (default: one second's worth of requests)
+            recovery_seconds: how long after a throttle it takes to get back to full rate
+            clock: monotonic time source, for tests
+        """
+        if rate <= 0:
+            raise ValueError("TokenBucket rate must be greater than 0")
+
+        self.target_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate)
+        self.recovery_seconds = recovery_seconds
+        self.clock = clock
+        self.stats = RateLimitStats()
+        self._tokens = self.burst
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may go out; returns the seconds waited"""
+        wait = self._reserve()
+        if wait > 0:
+            _waited.set(_waited.get() + wait)
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """acquire() for coroutines: waits without blocking the event loop"""
+        wait = self._reserve()
+        if wait > 0:
+            _waited.set(_waited.get() + wait)
+            await asyncio.sleep(wait)
+        return wait
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """The server pushed back: pause every caller for retry_after seconds and slow down"""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.stats.throttled += 1
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            self.rate = max(self.target_rate / 16, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)  # the burst is gone too
+        logger.warning("API asked us to slow down", extra={"retry_after": retry_after, "rate": self.rate})
+
+    def log_stats(self) -> None:
+        logger.info(
+            "API rate limiter summary",
+            extra={
+                "rate_limit_requests": self.stats.requests,
+                "rate_limit_delayed": self.stats.delayed,
+                "rate_limit_wait_seconds": round(self.stats.wait_seconds, 3),
+                "rate_limit_max_wait_seconds": round(self.stats.max_wait_seconds, 3),
+                "rate_limit_throttled": self.stats.throttled,
+            }
+        )
+
+    def _reserve(self) -> float:
+        """Take a token (possibly one that only exists in the future); returns how long to wait for it"""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._tokens -= 1
+            # negative balance = callers queued ahead of us, each worth 1/rate seconds,
+            # counted from the end of any pause (tokens only start refilling then)
+            wait = max(self._paused_until - now, 0.0) + max(-self._tokens, 0.0) / self.rate
+
+            self.stats.requests += 1
+            if wait > 0:
+                self.stats.delayed += 1
+                self.stats.wait_seconds += wait
+                self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, wait)
+            return wait
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - max(self._updated, self._paused_until))
+        self._updated = max(self._updated, now)
+        if self.rate < self.target_rate and self.recovery_seconds > 0:
+            self.rate = min(self.target_rate, self.rate + self.target_rate * elapsed / self.recovery_seconds)
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+
+
+class RateLimitedRetry(Retry):
+    """
+    urllib3 Retry that also goes through a TokenBucket: retries wait for a
+    token like any other request, and Retry-After responses throttle the
+    bucket for every thread, not just the one that got them.
+    """
+
+    def __init__(self, *args, rate_limiter: Optional[TokenBucket] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter
+
+    def new(self, **kw) -> "RateLimitedRetry":
+        # urllib3 builds a fresh Retry per attempt; keep the limiter on it
+        kw.setdefault("rate_limiter", self.rate_limiter)
+        return super().new(**kw)
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if self.rate_limiter is not None and response is not None and response.status in RETRY_AFTER_STATUSES:
+            self.rate_limiter.throttled(self.get_retry_after(response))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+    def sleep(self, response=None) -> None:
+        super().sleep(response)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
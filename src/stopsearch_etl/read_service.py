@@ -1,17 +1,19 @@
-from typing import List, Dict, Any, Optional
-from sqlalchemy import func, extract, and_
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from sqlalchemy import func, and_, text
 from sqlalchemy.orm import Session
 from datetime import datetime
-import math
 
-from .domain import StopSearchRecord
+from .domain import StopSearchRecord, month_bounds
+from .geo import bounding_box, haversine_km
 from .repository import StopSearchRepository
-from .sqlite_repository import StopSearchTable
+from .sqlite_repository import RECORD_COLUMNS, CategoryCodec, StopSearchTable
 
 
 class ReadService:
     """Simple read/query layer for stored stop & search data"""
 
+    ID_BATCH_SIZE = 500  # ids per IN (...) when loading full rows
+
     def __init__(self, repository: StopSearchRepository):
         self.repository = repository
         # if repo exposes a SQLAlchemy session, use it for richer queries
@@ -20,6 +22,9 @@ class ReadService:
             self.session = repository.session
         else:
             self.session = None
+        # text <-> id for the dictionary-encoded columns (shared with the repo when it has one)
+        self.categories = getattr(repository, 'categories', None) or CategoryCodec(self.session)
+        self._spatial_index: Optional[bool] = None
 
     def get_records_by_month(self, year_month: str, limit: Optional[int] = None) -> List[StopSearchRecord]:
         """
@@ -30,51 +35,55 @@ class ReadService:
         """
         if not self.session:
             # fallback: use repo method if we don't have a session
-            # NOTE: force not stored yet, so pass empty string
+            # NOTE: empty string = rows whose force we don't know
             return self.repository.find_by_force_and_month("", year_month)
 
         try:
-            year, month = year_month.split('-')
-            year, month = int(year), int(month)
+            start, end = month_bounds(year_month)
         except ValueError:
             return []
 
-        # filter by year and month
-        # TODO: add an index on datetime for faster month queries
-        query = self.session.query(StopSearchTable).filter(
-            and_(
-                extract('year', StopSearchTable.datetime) == year,
-                extract('month', StopSearchTable.datetime) == month
-            )
+        # half-open range on the raw column so the datetime index can answer it
+        # (extract() on the column forces a full table scan)
+        query = self.session.query(*RECORD_COLUMNS).filter(
+            StopSearchTable.datetime >= start,
+            StopSearchTable.datetime < end,
         )
 
         if limit:
             query = query.limit(limit)
 
-        db_records = query.all()
-        return [self._db_record_to_domain(record) for record in db_records]
+        return [self._row_to_domain(row) for row in query.all()]
 
     def get_records_by_outcome(self, outcome: str) -> List[StopSearchRecord]:
         """Get all records with this outcome"""
         if not self.session:
             return []
 
-        db_records = self.session.query(StopSearchTable).filter(
-            StopSearchTable.outcome == outcome
+        outcome_id = self.categories.id_for('outcome', outcome)
+        if outcome_id is None:
+            return []  # never stored, so nothing can match
+
+        rows = self.session.query(*RECORD_COLUMNS).filter(
+            StopSearchTable.outcome_id == outcome_id
         ).all()
 
-        return [self._db_record_to_domain(record) for record in db_records]
+        return [self._row_to_domain(row) for row in rows]
 
     def get_records_by_type(self, search_type: str) -> List[StopSearchRecord]:
         """Get all records for this search type"""
         if not self.session:
             return []
 
-        db_records = self.session.query(StopSearchTable).filter(
-            StopSearchTable.type == search_type
+        type_id = self.categories.id_for('type', search_type)
+        if type_id is None:
+            return []  # never stored, so nothing can match
+
+        rows = self.session.query(*RECORD_COLUMNS).filter(
+            StopSearchTable.type_id == type_id
         ).all()
 
-        return [self._db_record_to_domain(record) for record in db_records]
+        return [self._row_to_domain(row) for row in rows]
 
     def get_summary_stats(self) -> Dict[str, Any]:
         """Basic counts: total, by type, by outcome"""
@@ -84,21 +93,21 @@ class ReadService:
         # total
         total_records = self.session.query(StopSearchTable).count()
 
-        # count by type
+        # count by type (grouping on the integer ids; names are looked up after)
         search_type_counts = self.session.query(
-            StopSearchTable.type,
-            func.count(StopSearchTable.type)
-        ).group_by(StopSearchTable.type).all()
+            StopSearchTable.type_id,
+            func.count(StopSearchTable.type_id)
+        ).group_by(StopSearchTable.type_id).all()
 
-        search_types = {search_type: count for search_type, count in search_type_counts}
+        search_types = {self.categories.value_for(type_id): count for type_id, count in search_type_counts}
 
         # counts by outcome (skip NULL)
         outcome_counts = self.session.query(
-            StopSearchTable.outcome,
-            func.count(StopSearchTable.outcome)
-        ).filter(StopSearchTable.outcome.isnot(None)).group_by(StopSearchTable.outcome).all()
+            StopSearchTable.outcome_id,
+            func.count(StopSearchTable.outcome_id)
+        ).filter(StopSearchTable.outcome_id.isnot(None)).group_by(StopSearchTable.outcome_id).all()
 
-        outcomes = {outcome: count for outcome, count in outcome_counts}
+        outcomes = {self.categories.value_for(outcome_id): count for outcome_id, count in outcome_counts}
 
         return {
             "total_records": total_records,
@@ -108,46 +117,92 @@ class ReadService:
 
     def get_records_near_location(self, lat: float, lon: float, radius_km: float = 1.0) -> List[StopSearchRecord]:
         """
-        Get records near a lat/lon within a small radius (km)
+        Get records within radius_km of a lat/lon (great-circle distance)
 
         Returns:
-            List of StopSearchRecord objects within the radius
+            List of StopSearchRecord objects within the radius, nearest first
         """
         if not self.session:
             return []
 
-        # rough bounding box (good enough for small distances)
-        # TODO: for real geo queries, use PostGIS or geodesic distance
-        lat_delta = radius_km / 111.0  # km per degree conversion
-        lon_delta = radius_km / (111.0 * math.cos(math.radians(lat)))
-
-        db_records = self.session.query(StopSearchTable).filter(
-            and_(
-                StopSearchTable.latitude.between(lat - lat_delta, lat + lat_delta),
-                StopSearchTable.longitude.between(lon - lon_delta, lon + lon_delta),
-                StopSearchTable.latitude.isnot(None),
-                StopSearchTable.longitude.isnot(None)
+        nearby = [(distance, record_id) for distance, record_id in self._candidates(lat, lon, radius_km)
+                  if distance <= radius_km]
+        nearby.sort()
+        return self._records_by_id([record_id for _, record_id in nearby])
+
+    def get_nearest_records(self, lat: float, lon: float, k: int = 10,
+                            max_radius_km: float = 50.0) -> List[StopSearchRecord]:
+        """
+        The k records closest to a lat/lon (searching no further than max_radius_km)
+
+        Returns:
+            Up to k StopSearchRecord objects, nearest first
+        """
+        if not self.session or k <= 0:
+            return []
+
+        # grow the search circle until it holds k records; anything outside the
+        # circle could still be beaten by an unseen row just past the box edge
+        radius_km = min(0.25, max_radius_km)
+        while True:
+            nearby = sorted(
+                (distance, record_id) for distance, record_id in self._candidates(lat, lon, radius_km)
+                if distance <= radius_km
+            )
+            if len(nearby) >= k or radius_km >= max_radius_km:
+                break
+            radius_km = min(radius_km * 4, max_radius_km)
+
+        return self._records_by_id([record_id for _, record_id in nearby[:k]])
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> Iterator[Tuple[float, int]]:
+        """(distance_km, id) for every located row in the radius' bounding box"""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+
+        if self._has_spatial_index():
+            # R*Tree boxes are float32 rounded outwards, so this is a superset;
+            # distances use the real columns
+            rows = self.session.execute(text(
+                "SELECT r.id, r.latitude, r.longitude FROM stop_search_rtree t "
+                "JOIN stop_search_records r ON r.id = t.id "
+                "WHERE t.max_lat >= :min_lat AND t.min_lat <= :max_lat "
+                "AND t.max_lon >= :min_lon AND t.min_lon <= :max_lon"
+            ), {"min_lat": min_lat, "max_lat": max_lat, "min_lon": min_lon, "max_lon": max_lon})
+        else:
+            rows = self.session.query(
+                StopSearchTable.id, StopSearchTable.latitude, StopSearchTable.longitude
+            ).filter(
+                and_(
+                    StopSearchTable.latitude.between(min_lat, max_lat),
+                    StopSearchTable.longitude.between(min_lon, max_lon),
+                )
             )
-        ).all()
 
-        return [self._db_record_to_domain(record) for record in db_records]
-
-    def _db_record_to_domain(self, db_record: StopSearchTable) -> StopSearchRecord:
-        """Map DB row to domain object"""
-        return StopSearchRecord(
-            type=db_record.type or "Unknown",
-            datetime=db_record.datetime,
-            gender=db_record.gender,
-            age_range=db_record.age_range,
-            self_defined_ethnicity=db_record.self_defined_ethnicity,
-            officer_defined_ethnicity=db_record.officer_defined_ethnicity,
-            legislation=db_record.legislation or "",
-            object_of_search=db_record.object_of_search,
-            outcome=db_record.outcome,
-            outcome_linked_to_object_of_search=db_record.outcome_linked_to_object_of_search,
-            removal_of_more_than_outer_clothing=db_record.removal_of_more_than_outer_clothing,
-            latitude=db_record.latitude,
-            longitude=db_record.longitude,
-            street_id=db_record.street_id,
-            street_name=db_record.street_name
-        )
\ No newline at end of file
+        for record_id, record_lat, record_lon in rows:
+            yield haversine_km(lat, lon, record_lat, record_lon), record_id
+
+    def _records_by_id(self, record_ids: List[int]) -> List[StopSearchRecord]:
+        """Load full rows in id batches, keeping the order of record_ids"""
+        by_id = {}
+        for start in range(0, len(record_ids), self.ID_BATCH_SIZE):
+            batch = record_ids[start:start + self.ID_BATCH_SIZE]
+            for record_id, *row in self.session.query(StopSearchTable.id, *RECORD_COLUMNS).filter(
+                    StopSearchTable.id.in_(batch)):
+                by_id[record_id] = self._row_to_domain(row)
+        return [by_id[record_id] for record_id in record_ids if record_id in by_id]
+
+    def _has_spatial_index(self) -> bool:
+        """Is the R*Tree from migration 2 there? (checked once per service)"""
+        if self._spatial_index is None:
+            self._spatial_index = self.session.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stop_search_rtree'"
+            )).first() is not None
+        return self._spatial_index
+
+    def _row_to_domain(self, row) -> StopSearchRecord:
+        """Map a RECORD_COLUMNS row (plain tuple, no ORM object) to a domain object"""
+        record = self.categories.decode_row(row)
+        record.type = record.type or "Unknown"
+        record.legislation = record.legislation or ""
+        record.force = record.force or None
+        return record
@@ -0,0 +1,116 @@
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .archive import ArchiveEntry, RawArchive
+from .batch import StopSearchBatch
+from .etl_service import EtlService, ExtractedMonth
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayResult:
+    """Summary of a replay run"""
+    months_replayed: int = 0
+    total_records: int = 0
+    months_failed: int = 0
+    failures: List[str] = field(default_factory=list)
+
+
+def decode_entry(archive_root: str, entry: ArchiveEntry) -> ExtractedMonth:
+    """
+    Archived payload -> ExtractedMonth ready for load_many.
+
+    Module level so it can run in a worker process: only the archive path and
+    the entry cross the process boundary, the columnar batch comes back.
+    """
+    archive = RawArchive(archive_root, entry.codec)
+    raw_records = list(archive.read(entry))
+    records = StopSearchBatch.from_api_data(raw_records, entry.force)
+    return ExtractedMonth(entry.force, entry.month, records, len(raw_records), entry.sha256)
+
+
+class ReplayService:
+    """
+    Rebuild the database from a RawArchive, no network involved.
+
+    Decompressing, JSON decoding and transforming are CPU bound, so they run in
+    a process pool (one process per core by default). Loading stays in the
+    calling process: SQLite has one writer and the session isn't shareable, so
+    parsed months come back here and go through EtlService.load_many, which
+    also updates the ledger and metrics exactly like a live run.
+    """
+
+    def __init__(self, archive: RawArchive, etl_service: EtlService, max_workers: Optional[int] = None):
+        """
+        Args:
+            archive: where the payloads were archived
+            etl_service: loads each decoded month (its repository/ledger decide where to)
+            max_workers: decode processes (default: CPU count; 0 = decode in this process)
+        """
+        self.archive = archive
+        self.etl_service = etl_service
+        self.max_workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+
+    def replay(self, forces: Optional[List[str]] = None) -> ReplayResult:
+        """Load every archived force-month (optionally only some forces)"""
+        entries = self.archive.entries(forces)
+        result = ReplayResult()
+        logger.info("Replaying %d force-months from %s", len(entries), self.archive.root)
+
+        if self.max_workers == 0:
+            for entry in entries:
+                try:
+                    extracted = decode_entry(self.archive.root, entry)
+                except Exception as e:
+                    self._record_failure(entry, e, result)
+                    continue
+                self._load(entry, extracted, result)
+            return result
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = iter(entries)
+            running: Dict[Future, ArchiveEntry] = {}
+
+            def submit_next() -> None:
+                entry = next(pending, None)
+                if entry is not None:
+                    running[executor.submit(decode_entry, self.archive.root, entry)] = entry
+
+            # keep a couple of months per worker in flight; more would only pile up
+            # decoded batches in memory waiting for the single writer
+            for _ in range(self.max_workers * 2):
+                submit_next()
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry = running.pop(future)
+                    submit_next()
+                    try:
+                        extracted = future.result()
+                    except Exception as e:
+                        self._record_failure(entry, e, result)
+                        continue
+                    self._load(entry, extracted, result)
+
+        return result
+
+    def _load(self, entry: ArchiveEntry, extracted: ExtractedMonth, result: ReplayResult) -> None:
+        try:
+            saved = self.etl_service.load_many([extracted])[0]
+        except Exception as e:  # load_many already recorded it in the metrics
+            result.months_failed += 1
+            result.failures.append(f"{entry.force} {entry.month}: {e}")
+            return
+        result.months_replayed += 1
+        result.total_records += saved
+
+    def _record_failure(self, entry: ArchiveEntry, error: Exception, result: ReplayResult) -> None:
+        logger.warning("Could not decode archived %s %s: %s", entry.force, entry.month, error)
+        self.etl_service.record_failure(entry.force, entry.month, error)
+        result.months_failed += 1
+        result.failures.append(f"{entry.force} {entry.month}: {error}")
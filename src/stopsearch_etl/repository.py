@@ -16,13 +16,23 @@ class StopSearchRepository(ABC):
     @abstractmethod
     def save_batch(self, records: List[StopSearchRecord]) -> int:
         """
-        Save multiple at once
+        Save multiple at once (a list of records or a columnar StopSearchBatch)
 
         Returns:
             Number of records actually saved (after deduplication)
         """
         pass
 
+    def save_batches(self, batches: List[List[StopSearchRecord]]) -> List[int]:
+        """
+        Save several batches, ideally in one transaction
+
+        Returns:
+            Number of records saved per batch, in order
+        """
+        # default: one save_batch each; implementations can do better
+        return [self.save_batch(records) for records in batches]
+
     @abstractmethod
     def find_by_force_and_month(self, force: str, year_month: str) -> List[StopSearchRecord]:
         """Find all records for a specific force and month"""
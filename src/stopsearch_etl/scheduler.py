@@ -1,9 +1,12 @@
 import logging
+import time as clock
 from datetime import time
 from typing import List, Optional
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
+from .availability import AvailabilityCatalogue
+from .metrics_server import MetricsServer
 from .multi_force_runner import MultiForceRunner, MultiForceRunSummary
 
 logger = logging.getLogger(__name__)
@@ -13,7 +16,9 @@ class EtlScheduler:
     """Run ETL every day at a set time"""
 
     def __init__(self, multi_force_runner: MultiForceRunner, forces: List[str],
-                 schedule_time: time = time(2, 0)):
+                 schedule_time: time = time(2, 0),
+                 catalogue: Optional[AvailabilityCatalogue] = None,
+                 metrics_server: Optional[MetricsServer] = None):
         """
         Initialize the ETL scheduler.
 
@@ -21,11 +26,21 @@ class EtlScheduler:
             multi_force_runner: runs ETL for many forces
             forces: which forces to process
             schedule_time: daily time to run (default 02:00)
+            catalogue: availability matrix shared with the runner; dropped at the
+                start of each run so every run sees newly published months
+            metrics_server: /metrics endpoint to serve while the scheduler is running
+                (only started if its port is set, 0 = off)
         """
         self.multi_force_runner = multi_force_runner
         self.forces = forces
         self.schedule_time = schedule_time
+        self.catalogue = catalogue
+        self.metrics_server = metrics_server
         self.scheduler: Optional[BackgroundScheduler] = None
+        # unix timestamps of the last run, for the metrics endpoint
+        self.last_run_start_at: Optional[float] = None
+        self.last_run_end_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
 
     def start(self) -> None:
         """Start background scheduler"""
@@ -48,6 +63,8 @@ class EtlScheduler:
 
         self.scheduler.start()
         logger.info(f"ETL scheduler started, will run daily at {self.schedule_time}")
+        if self.metrics_server is not None and self.metrics_server.port:
+            self.metrics_server.start()
 
     def stop(self) -> None:
         """Stop the scheduler"""
@@ -55,6 +72,8 @@ class EtlScheduler:
             self.scheduler.shutdown()
             self.scheduler = None
             logger.info("ETL scheduler stopped")
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
 
     def run_once(self) -> MultiForceRunSummary:
         """
@@ -65,12 +84,19 @@ class EtlScheduler:
         """
         logger.info(f"Starting immediate ETL run for forces: {self.forces}")
 
+        if self.catalogue is not None:
+            # one availability fetch per run, made lazily by the first force
+            self.catalogue.invalidate()
+
+        self.last_run_start_at = clock.time()
         try:
             result = self.multi_force_runner.run_backfill(self.forces)
             logger.info(f"ETL run completed: {result.total_records} records, "
                        f"{result.forces_completed}/{len(self.forces)} forces successful")
+            self.last_run_end_at = self.last_success_at = clock.time()
             return result
         except Exception as e:
+            self.last_run_end_at = clock.time()
             logger.error(f"ETL run failed: {e}")
             raise
 
@@ -1,133 +1,248 @@
 from datetime import datetime
-from typing import List
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, UniqueConstraint
+from typing import Dict, Iterable, List, Optional, Union
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Float, Boolean, Text, UniqueConstraint
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import Session
-from sqlalchemy.dialects.sqlite import insert
 
-from .domain import StopSearchRecord
+from .batch import StopSearchBatch
+from .domain import CATEGORY_FIELDS, RECORD_FIELDS, StopSearchRecord, month_bounds
 from .repository import StopSearchRepository
+from .timing import stage
 
 Base = declarative_base()
 
 
+class CategoryValueTable(Base):
+    """Distinct values of the categorical columns; stop_search_records stores their ids"""
+    __tablename__ = 'category_values'
+
+    id = Column(Integer, primary_key=True)
+    category = Column(String(50), nullable=False)  # which column, e.g. 'outcome'
+    value = Column(Text, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('category', 'value', name='unique_category_value'),
+    )
+
+
+def _category_id():
+    return Column(Integer, ForeignKey('category_values.id'))
+
+
 class StopSearchTable(Base):
     """SQLAlchemy table model for stop & search records."""
     __tablename__ = 'stop_search_records'
 
+    # CATEGORY_FIELDS are dictionary encoded: <field>_id -> category_values.id
+    # (the stop_search_records_decoded view shows them as text)
     id = Column(Integer, primary_key=True)
-    type = Column(String(100))
+    type_id = _category_id()
     datetime = Column(DateTime)
-    gender = Column(String(20))
-    age_range = Column(String(20))
-    self_defined_ethnicity = Column(String(200))
-    officer_defined_ethnicity = Column(String(200))
-    legislation = Column(Text)
-    object_of_search = Column(String(100))
-    outcome = Column(Text)
+    gender_id = _category_id()
+    age_range_id = _category_id()
+    self_defined_ethnicity_id = _category_id()
+    officer_defined_ethnicity_id = _category_id()
+    legislation_id = _category_id()
+    object_of_search_id = _category_id()
+    outcome_id = _category_id()
     outcome_linked_to_object_of_search = Column(Boolean)
     removal_of_more_than_outer_clothing = Column(Boolean)
     latitude = Column(Float)
     longitude = Column(Float)
     street_id = Column(Integer)
     street_name = Column(String(500))
+    # '' = unknown (rows from before force was stored); NULL would never clash in the unique constraint
+    force = Column(String(100), nullable=False, default='', server_default='')
 
-    # TODO: consider adding 'force' if/when you store it (same place/time across forces is possible)
+    # force goes last so the constraint's index still serves datetime range scans;
+    # (force, datetime) lookups use ix_stop_search_force_datetime (see migrations)
     __table_args__ = (
-        UniqueConstraint('datetime', 'latitude', 'longitude', 'type', 'legislation',
+        UniqueConstraint('datetime', 'latitude', 'longitude', 'type_id', 'legislation_id', 'force',
                         name='unique_stop_search'),
     )
 
 
+def stored_column(field: str) -> str:
+    """StopSearchRecord field -> stop_search_records column"""
+    return f"{field}_id" if field in CATEGORY_FIELDS else field
+
+
+# StopSearchTable columns in StopSearchRecord field order, for row-tuple selects
+# (category columns come back as ids; CategoryCodec.decode_row turns them into text)
+RECORD_COLUMNS = tuple(getattr(StopSearchTable, stored_column(name)) for name in RECORD_FIELDS)
+
+# bulk insert straight through the driver: one tuple per record, no per-row dicts
+# or SQLAlchemy bind processing (so values must already be in stored form, see _batch_params)
+_INSERT_SQL = (
+    f"INSERT OR IGNORE INTO {StopSearchTable.__tablename__} "
+    f"({', '.join(stored_column(name) for name in RECORD_FIELDS)}) "
+    f"VALUES ({', '.join('?' * len(RECORD_FIELDS))})"
+)
+
+# where the category ids sit in a RECORD_COLUMNS row
+_CATEGORY_POSITIONS = [position for position, name in enumerate(RECORD_FIELDS) if name in CATEGORY_FIELDS]
+
+
+def _stored_datetime(value: datetime) -> str:
+    # DateTime on SQLite is naive 'YYYY-MM-DD HH:MM:SS.ffffff' (any offset is dropped, not
+    # converted); has to match exactly or the unique constraint stops catching duplicates
+    return value.isoformat(" ", "microseconds")[:26]
+
+
+class CategoryCodec:
+    """
+    In-memory copy of category_values: text <-> id for the categorical columns.
+
+    The table is tiny (a few hundred rows), so it's read once and kept. New
+    values are inserted through the session's connection, i.e. in the same
+    transaction as the rows that use them; call reset() if that transaction
+    rolls back. Decoded values are shared str objects, so a million decoded
+    records hold a few dozen outcome strings, not a million.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self._ids: Optional[Dict[str, Dict[str, int]]] = None  # category -> value -> id
+        self._values: Dict[int, str] = {}
+
+    def encode(self, category: str, values: Iterable[Optional[str]]) -> List[Optional[int]]:
+        """Ids for a column of values (None stays None), adding values not seen before"""
+        values = values if isinstance(values, list) else list(values)
+        ids = self._category(category)
+        missing = {value for value in set(values) if value is not None and value not in ids}
+        if missing:
+            self._add(category, missing)
+            ids = self._category(category)
+        get = ids.get
+        return [get(value) for value in values]
+
+    def id_for(self, category: str, value: Optional[str]) -> Optional[int]:
+        """Id of an existing value (None if it has never been stored); doesn't insert"""
+        if value is None:
+            return None
+        if value not in self._category(category):
+            self._load()  # someone else may have added it since
+        return self._category(category).get(value)
+
+    def value_for(self, category_id: Optional[int]) -> Optional[str]:
+        if category_id is None:
+            return None
+        if category_id not in self._values:
+            self._load()
+        return self._values.get(category_id)
+
+    def decode_row(self, row) -> StopSearchRecord:
+        """RECORD_COLUMNS row (plain tuple, category ids) -> domain object"""
+        values = list(row)
+        value_for = self.value_for
+        for position in _CATEGORY_POSITIONS:
+            values[position] = value_for(values[position])
+        return StopSearchRecord(*values)
+
+    def reset(self) -> None:
+        """Forget everything (after a rollback may have undone inserted values)"""
+        self._ids = None
+        self._values = {}
+
+    def _category(self, category: str) -> Dict[str, int]:
+        if self._ids is None:
+            self._load()
+        return self._ids.setdefault(category, {})
+
+    def _load(self) -> None:
+        ids: Dict[str, Dict[str, int]] = {}
+        values: Dict[int, str] = {}
+        rows = self.session.connection().exec_driver_sql(
+            f"SELECT id, category, value FROM {CategoryValueTable.__tablename__}"
+        )
+        for category_id, category, value in rows:
+            ids.setdefault(category, {})[value] = category_id
+            values[category_id] = value
+        self._ids, self._values = ids, values
+
+    def _add(self, category: str, values: set) -> None:
+        # OR IGNORE: another process may have added some of them already
+        self.session.connection().exec_driver_sql(
+            f"INSERT OR IGNORE INTO {CategoryValueTable.__tablename__} (category, value) VALUES (?, ?)",
+            [(category, value) for value in sorted(values)],
+        )
+        self._load()
+
+
 class SqliteStopSearchRepository(StopSearchRepository):
     """SQLite implementation of the stop search repository."""
 
     def __init__(self, session: Session):
         self.session = session
+        self.categories = CategoryCodec(session)
 
     def save(self, record: StopSearchRecord) -> None:
         """Save a single record with upsert behavior."""
-        db_record = StopSearchTable(
-            type=record.type,
-            datetime=record.datetime,
-            gender=record.gender,
-            age_range=record.age_range,
-            self_defined_ethnicity=record.self_defined_ethnicity,
-            officer_defined_ethnicity=record.officer_defined_ethnicity,
-            legislation=record.legislation,
-            object_of_search=record.object_of_search,
-            outcome=record.outcome,
-            outcome_linked_to_object_of_search=record.outcome_linked_to_object_of_search,
-            removal_of_more_than_outer_clothing=record.removal_of_more_than_outer_clothing,
-            latitude=record.latitude,
-            longitude=record.longitude,
-            street_id=record.street_id,
-            street_name=record.street_name
-        )
-
-        # Use INSERT OR IGNORE for idempotency (SQLite specific)
-        stmt = insert(StopSearchTable).values(
-            type=record.type,
-            datetime=record.datetime,
-            gender=record.gender,
-            age_range=record.age_range,
-            self_defined_ethnicity=record.self_defined_ethnicity,
-            officer_defined_ethnicity=record.officer_defined_ethnicity,
-            legislation=record.legislation,
-            object_of_search=record.object_of_search,
-            outcome=record.outcome,
-            outcome_linked_to_object_of_search=record.outcome_linked_to_object_of_search,
-            removal_of_more_than_outer_clothing=record.removal_of_more_than_outer_clothing,
-            latitude=record.latitude,
-            longitude=record.longitude,
-            street_id=record.street_id,
-            street_name=record.street_name
-        )
-
-        # Use ON CONFLICT IGNORE for idempotency
-        stmt = stmt.on_conflict_do_nothing()
-        self.session.execute(stmt)
-        self.session.commit()
+        # INSERT OR IGNORE for idempotency, same path as the batches
+        self.save_batch([record])
 
-    def save_batch(self, records: List[StopSearchRecord]) -> int:
-        """Save multiple records efficiently."""
+    def save_batch(self, records: Union[List[StopSearchRecord], StopSearchBatch]) -> int:
+        """Save multiple records (objects or a columnar batch) efficiently."""
         if not records:
             return 0
 
-        # Convert domain objects to dict for bulk insert
-        record_dicts = []
-        for record in records:
-            record_dicts.append({
-                'type': record.type,
-                'datetime': record.datetime,
-                'gender': record.gender,
-                'age_range': record.age_range,
-                'self_defined_ethnicity': record.self_defined_ethnicity,
-                'officer_defined_ethnicity': record.officer_defined_ethnicity,
-                'legislation': record.legislation,
-                'object_of_search': record.object_of_search,
-                'outcome': record.outcome,
-                'outcome_linked_to_object_of_search': record.outcome_linked_to_object_of_search,
-                'removal_of_more_than_outer_clothing': record.removal_of_more_than_outer_clothing,
-                'latitude': record.latitude,
-                'longitude': record.longitude,
-                'street_id': record.street_id,
-                'street_name': record.street_name
-            })
-
-        stmt = insert(StopSearchTable).on_conflict_do_nothing()
-
-        # Execute batch insert and track affected rows
-        # TODO: if performance matters, try driver rowcount or a changes() call (when supported)
-        initial_count = self.session.query(StopSearchTable).count()
-        self.session.execute(stmt, record_dicts)
-        self.session.commit()
-        final_count = self.session.query(StopSearchTable).count()
-
-        return final_count - initial_count
+        return self.save_batches([records])[0]
+
+    def save_batches(self, batches: List[Union[List[StopSearchRecord], StopSearchBatch]]) -> List[int]:
+        """Save several batches in a single transaction, counting inserts per batch."""
+        connection = self.session.connection()
+
+        saved_counts = []
+        try:
+            for records in batches:
+                if not records:
+                    saved_counts.append(0)
+                    continue
+
+                if not isinstance(records, StopSearchBatch):
+                    records = StopSearchBatch.from_records(records)
+                # sqlite3 sums rowcount over executemany and ignored (duplicate) rows
+                # don't count. it's per statement, so other writers on the same DB can't skew it
+                result = connection.exec_driver_sql(_INSERT_SQL, self._batch_params(records))
+                saved_counts.append(result.rowcount)
+
+            with stage("commit"):
+                self.session.commit()
+        except Exception:
+            self.session.rollback()
+            self.categories.reset()  # values added in this transaction are gone again
+            raise
+
+        return saved_counts
+
+    def _batch_params(self, batch: StopSearchBatch) -> List[tuple]:
+        """Columnar batch -> insert parameters; only the columns that need it get touched"""
+        columns = batch.to_columns()
+        for name in CATEGORY_FIELDS:
+            columns[name] = self.categories.encode(name, columns[name])
+        columns['datetime'] = [_stored_datetime(value) for value in columns['datetime']]
+        columns['force'] = [force or '' for force in columns['force']]
+        return list(zip(*columns.values()))
 
     def find_by_force_and_month(self, force: str, year_month: str) -> List[StopSearchRecord]:
         """Find all records for a specific force and month."""
-        # Note: We don't store force in the record yet, so this is a placeholder
-        # In a real implementation, we'd filter by force and date range
-        return []
\ No newline at end of file
+        try:
+            start, end = month_bounds(year_month)
+        except ValueError:
+            return []
+
+        # equality on force + half-open datetime range = one range scan on (force, datetime)
+        # plain column tuples, not ORM objects: no identity map / instance state per row
+        rows = self.session.query(*RECORD_COLUMNS).filter(
+            StopSearchTable.force == force,
+            StopSearchTable.datetime >= start,
+            StopSearchTable.datetime < end,
+        ).order_by(StopSearchTable.datetime).all()
+
+        return [self._to_domain(row) for row in rows]
+
+    def _to_domain(self, row) -> StopSearchRecord:
+        """RECORD_COLUMNS row -> domain object"""
+        record = self.categories.decode_row(row)
+        record.force = record.force or None
+        return record
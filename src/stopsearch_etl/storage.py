@@ -0,0 +1,68 @@
+from typing import Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+# PRAGMAs applied to every new SQLite connection, per profile.
+# cache_size is negative = KiB (so -262144 is 256 MiB), mmap_size is bytes.
+SQLITE_PROFILES: Dict[str, Dict[str, object]] = {
+    # ETL ingest: WAL + synchronous=NORMAL only fsyncs at checkpoints. A power cut
+    # can lose the last few commits, but loads are idempotent and the ledger/work
+    # queue just rerun those months.
+    "bulk": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -262144,
+        "mmap_size": 1024 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+    # WAL so readers still don't block, but fsync on every commit
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -65536,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+    # reporting / read service: never writes, so leave the journal mode to the
+    # writer and refuse any write at the connection level
+    "readonly": {
+        "query_only": "ON",
+        "cache_size": -65536,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+}
+
+
+def apply_sqlite_profile(engine: Engine, profile: str) -> None:
+    """
+    Run the profile's PRAGMAs on every connection the engine opens.
+
+    Does nothing for non-SQLite engines so DATABASE_URL can still point elsewhere.
+    """
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Invalid SQLite profile '{profile}'. Must be one of: {list(SQLITE_PROFILES)}")
+    if engine.dialect.name != "sqlite":
+        return
+
+    pragmas = SQLITE_PROFILES[profile]
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def create_database_engine(database_url: str, sqlite_profile: str = "bulk") -> Engine:
+    """create_engine + the SQLite profile (if it's a SQLite URL)"""
+    engine = create_engine(database_url)
+    apply_sqlite_profile(engine, sqlite_profile)
+    return engine
@@ -0,0 +1,128 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+# where a force-month's time goes, in pipeline order
+STAGES = ("fetch", "decode", "transform", "load", "commit")
+
+
+class StageTimer:
+    """
+    Seconds spent per stage for one unit of work (usually one force-month).
+
+    Stages can nest: the outer one is only charged for its own time, so
+    "fetch" around an HTTP call that contains a "decode" doesn't count the
+    JSON parsing twice. Not thread-safe: one timer per thread/task.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self._nested: List[float] = []  # time spent in child stages, per open stage
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._nested.pop()
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed - nested
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def add(self, name: str, seconds: float) -> None:
+        """Charge time measured some other way (e.g. on another thread) to a stage"""
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+
+_current: ContextVar[Optional[StageTimer]] = ContextVar("stopsearch_stage_timer", default=None)
+
+
+@contextmanager
+def timed(timer: Optional[StageTimer] = None) -> Iterator[StageTimer]:
+    """Collect stage() timings from everything called inside the block (this thread/task only)"""
+    timer = timer if timer is not None else StageTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Charge the block to `name` on the current timer. Does nothing outside a
+    timed() block, so clients and repositories can be instrumented without
+    knowing who (if anyone) is measuring.
+    """
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def add_stage_time(name: str, seconds: float) -> None:
+    """StageTimer.add on the current timer, if there is one"""
+    timer = _current.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+@dataclass
+class StageSummary:
+    """Percentiles for one stage (seconds)"""
+    count: int
+    total: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram: bucket i holds values up to min_value × growth^i,
+    so every percentile is within one bucket (~9% with the default growth) of
+    the true value, whatever the range. Memory is one counter per bucket that
+    has been hit. Not locked: MetricsCollector guards it.
+    """
+
+    def __init__(self, min_value: float = 1e-6, growth: float = 2 ** 0.125):
+        self.min_value = min_value
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        index = 0 if value <= self.min_value else math.ceil(math.log(value / self.min_value) / self._log_growth)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (0 < p <= 100); 0.0 if empty"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(p / 100 * self.count)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.max, self.min_value * self.growth ** index)
+        return self.max
+
+    def summary(self) -> StageSummary:
+        return StageSummary(self.count, self.total, self.percentile(50), self.percentile(95),
+                            self.percentile(99), self.max)
@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, String, Text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from .sqlite_repository import Base
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class BackfillTaskTable(Base):
+    """One row per (force, month) a backfill has been asked to do"""
+    __tablename__ = 'backfill_tasks'
+
+    force = Column(String(100), primary_key=True)
+    month = Column(String(7), primary_key=True)  # YYYY-MM
+    state = Column(String(10), nullable=False, default=PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    updated_at = Column(DateTime)
+
+
+@dataclass
+class BackfillTask:
+    """A persisted backfill task"""
+    force: str
+    month: str
+    state: str
+    attempts: int
+    last_error: Optional[str]
+    updated_at: Optional[datetime]
+
+
+class BackfillWorkQueue:
+    """
+    Backfill progress kept in the database instead of in memory.
+
+    A run enqueues its months as pending and moves each one through
+    running -> done/failed as it goes, so after a crash we know exactly which
+    months never finished (pending/running) and which ones failed.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def enqueue(self, force: str, months: Iterable[str]) -> None:
+        """Queue months as pending (re-queues ones left over from earlier runs)"""
+        now = datetime.utcnow()
+        rows = [
+            {"force": force, "month": month, "state": PENDING, "attempts": 0, "updated_at": now}
+            for month in months
+        ]
+        if not rows:
+            return
+
+        stmt = insert(BackfillTaskTable)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["force", "month"],
+            set_={"state": stmt.excluded.state, "updated_at": stmt.excluded.updated_at},
+        )
+        self.session.execute(stmt, rows)
+        self.session.commit()
+
+    def mark_running(self, force: str, month: str) -> None:
+        """Task picked up; counts as an attempt"""
+        self._update(force, month, state=RUNNING, attempts=BackfillTaskTable.attempts + 1)
+
+    def mark_done(self, force: str, month: str) -> None:
+        self._update(force, month, state=DONE, last_error=None)
+
+    def mark_failed(self, force: str, month: str, error: str) -> None:
+        self._update(force, month, state=FAILED, last_error=error)
+
+    def months_in_state(self, force: str, states: Iterable[str]) -> List[str]:
+        """Months for a force in any of the given states, newest first"""
+        rows = self.session.query(BackfillTaskTable.month).filter(
+            BackfillTaskTable.force == force,
+            BackfillTaskTable.state.in_(list(states)),
+        ).order_by(BackfillTaskTable.month.desc()).all()
+        return [row.month for row in rows]
+
+    def unfinished_months(self, force: str) -> List[str]:
+        """Months a previous run never finished (still pending, or interrupted mid-run)"""
+        return self.months_in_state(force, [PENDING, RUNNING])
+
+    def failed_months(self, force: str) -> List[str]:
+        return self.months_in_state(force, [FAILED])
+
+    def failed_forces(self) -> List[str]:
+        """Every force that has at least one failed month"""
+        rows = self.session.query(BackfillTaskTable.force).filter(
+            BackfillTaskTable.state == FAILED
+        ).distinct().order_by(BackfillTaskTable.force).all()
+        return [row.force for row in rows]
+
+    def tasks_for(self, force: str) -> List[BackfillTask]:
+        """All persisted tasks for a force, newest month first"""
+        rows = self.session.query(BackfillTaskTable).filter_by(force=force).order_by(
+            BackfillTaskTable.month.desc()
+        ).all()
+        return [
+            BackfillTask(
+                force=row.force,
+                month=row.month,
+                state=row.state,
+                attempts=row.attempts,
+                last_error=row.last_error,
+                updated_at=row.updated_at,
+            )
+            for row in rows
+        ]
+
+    def _update(self, force: str, month: str, **values) -> None:
+        values["updated_at"] = datetime.utcnow()
+        self.session.query(BackfillTaskTable).filter_by(force=force, month=month).update(values)
+        self.session.commit()
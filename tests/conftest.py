@@ -0,0 +1,97 @@
+import json
+import threading
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# one request the stub served
+StubRequest = namedtuple("StubRequest", "path query client_address if_none_match status")
+
+
+class StubPoliceApi:
+    """
+    Tiny local data.police.uk for the HTTP client tests.
+
+    Queued add() responses are played back first, in order; after that,
+    months put up with publish() are served with an ETag (304 when the
+    client's If-None-Match still matches); anything else is a 404.
+    """
+
+    def __init__(self):
+        self.responses = []  # (status, body, headers)
+        self.months = {}  # (force, date) -> records
+        self.versions = {}  # (force, date) -> etag
+        self.requests = []  # StubRequest per request served
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if_none_match = self.headers.get("If-None-Match")
+                status, body, headers = stub._respond(query, if_none_match)
+                stub.requests.append(StubRequest(url.path, query, self.client_address, if_none_match, status))
+
+                payload = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/api"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def add(self, status, body=None, headers=None):
+        self.responses.append((status, body, headers or {}))
+
+    def publish(self, force, date, records):
+        self.months[(force, date)] = records
+        self.versions[(force, date)] = f'"v{len(self.requests)}-{len(records)}"'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _respond(self, query, if_none_match):
+        if self.responses:
+            return self.responses.pop(0)
+        key = (query.get("force", [None])[0], query.get("date", [None])[0])
+        if key not in self.months:
+            return 404, None, {}
+        etag = self.versions[key]
+        if if_none_match == etag:
+            return 304, None, {"ETag": etag}
+        return 200, self.months[key], {"ETag": etag}
+
+
+@pytest.fixture
+def stub_api():
+    stub = StubPoliceApi()
+    yield stub
+    stub.close()
+
+
+class FakeClock:
+    """Callable time source that only moves when a test moves it"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+
+from unittest.mock import Mock
+
+from stopsearch_etl.adaptive import AimdController, is_congestion
+from stopsearch_etl.api import ApiError
+from stopsearch_etl.concurrent_etl import ConcurrentEtlService
+from stopsearch_etl.etl_service import ExtractedMonth
+from stopsearch_etl.multi_force_runner import ConcurrentMultiForceRunner
+from stopsearch_etl.ratelimit import TokenBucket
+
+
+def complete(controller, count, latency=0.1, error=None):
+    for _ in range(count):
+        controller.acquire()
+        controller.release(latency, error)
+
+
+def test_limit_grows_by_one_per_clean_window_up_to_the_max():
+    # Arrange
+    controller = AimdController(initial_limit=2, max_limit=4)
+
+    # Act
+    complete(controller, 2)  # one window at limit 2
+    after_first_window = controller.limit
+    complete(controller, 50)
+
+    # Assert
+    assert after_first_window == 3
+    assert controller.limit == 4
+    assert controller.stats.increases == 2
+
+
+def test_throttling_halves_the_limit_once_per_burst_and_respects_min():
+    # Arrange
+    controller = AimdController(initial_limit=8, min_limit=2, max_limit=16)
+    throttled = ApiError("HTTP error 429", status_code=429)
+    for _ in range(4):
+        controller.acquire()
+
+    # Act: four requests sent at limit 8 all come back 429
+    for _ in range(4):
+        controller.release(0.1, throttled)
+    after_burst = controller.limit
+    for _ in range(10):
+        complete(controller, 1, error=throttled)
+
+    # Assert
+    assert after_burst == 4
+    assert controller.limit == 2
+    assert controller.stats.congested == 14
+
+
+def test_rising_latency_counts_as_congestion_but_a_404_does_not():
+    # Arrange
+    controller = AimdController(initial_limit=6, max_limit=6)
+    complete(controller, 5, latency=0.1)
+
+    # Act
+    complete(controller, 1, error=ApiError("HTTP error 404", status_code=404))
+    after_404 = controller.limit
+    complete(controller, 10, latency=0.6)
+
+    # Assert
+    assert after_404 == 6
+    assert controller.limit < 6
+    assert is_congestion(ApiError("Request failed: read timed out"))
+    assert not is_congestion(ValueError("bad record"))
+
+
+def test_concurrent_etl_never_exceeds_the_adaptive_limit(caplog):
+    # Arrange
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def fetch_stops(force, month):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.01)
+        with lock:
+            active["now"] -= 1
+        return []
+
+    api_client = Mock()
+    api_client.get_available_months.return_value = [f"{year}-{m:02d}" for year in (2020, 2021, 2022)
+                                                    for m in range(1, 13)]
+    etl_service = Mock()
+    etl_service.extract_transform.side_effect = \
+        lambda force, month: ExtractedMonth(force, month, fetch_stops(force, month), 0)
+    etl_service.load_many.side_effect = lambda months, **kwargs: [0] * len(months)
+    controller = AimdController(initial_limit=2, max_limit=6)
+    service = ConcurrentEtlService(api_client, etl_service, concurrency=controller)
+
+    # Act
+    with caplog.at_level(logging.INFO, logger="stopsearch_etl.adaptive"):
+        result = service.backfill_force_concurrent("metropolitan")
+
+    # Assert
+    assert result.months_processed == 36
+    assert service.max_workers == 6
+    assert service.queue_size == 12  # sized from the controller's max, not the default 3 workers
+    assert active["peak"] <= controller.stats.peak_limit
+    assert controller.stats.increases > 0
+    assert "Concurrency limit 2 -> 3" in caplog.text
+
+
+def test_latency_reported_to_the_controller_leaves_out_rate_limiter_waits():
+    # Arrange: the bucket makes every fetch after the first wait 0.1s; the "server" takes 0.01s
+    bucket = TokenBucket(rate=10, burst=1)
+
+    def extract_transform(force, month):
+        bucket.acquire()
+        time.sleep(0.01)
+        return ExtractedMonth(force, month, [], 0)
+
+    api_client = Mock()
+    api_client.get_available_months.return_value = ["2023-01", "2023-02", "2023-03"]
+    etl_service = Mock()
+    etl_service.extract_transform.side_effect = extract_transform
+    etl_service.load_many.side_effect = lambda months, **kwargs: [0] * len(months)
+    latencies = []
+
+    class RecordingController(AimdController):
+        def release(self, latency_s, error=None):
+            latencies.append(latency_s)
+            super().release(latency_s, error)
+
+    controller = RecordingController(initial_limit=1, max_limit=1)
+    service = ConcurrentEtlService(api_client, etl_service, concurrency=controller)
+    runner = ConcurrentMultiForceRunner(Mock(api_client=api_client, etl_service=etl_service), concurrency=controller)
+
+    # Act
+    service.backfill_force_concurrent("metropolitan")
+    controller.acquire()  # the runner's loop takes the slot, _fetch hands it back
+    runner._fetch("metropolitan", "2023-04")
+
+    # Assert
+    assert len(latencies) == 4
+    assert bucket.stats.wait_seconds > 0.25
+    assert max(latencies) < 0.08
+
@@ -0,0 +1,96 @@
+import asyncio
+from unittest.mock import Mock
+
+from stopsearch_etl.api import ApiError
+from stopsearch_etl.async_etl import AsyncEtlService
+
+
+class FakeAsyncClient:
+    """Async client double that records how many fetches overlap"""
+
+    def __init__(self, months_by_force, fail_months=()):
+        self.months_by_force = months_by_force
+        self.fail_months = set(fail_months)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_availability(self):
+        self.availability_calls = getattr(self, "availability_calls", 0) + 1
+        months = sorted({m for ms in self.months_by_force.values() for m in ms}, reverse=True)
+        return [
+            {"date": month,
+             "stop-and-search": [f for f, ms in self.months_by_force.items() if month in ms]}
+            for month in months
+        ]
+
+    async def fetch_stops(self, force, month):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if (force, month) in self.fail_months:
+            raise ApiError("HTTP error 500: boom")
+        return [{"force": force, "month": month}]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+def test_async_etl_fetches_hundreds_of_months_concurrently(): # 3 forces × 100 months
+    # Arrange
+    months = [f"{2000 + i // 12}-{i % 12 + 1:02d}" for i in range(100)]
+    client = FakeAsyncClient({"metropolitan": months, "kent": months, "essex": months})
+    mock_etl_service = Mock()
+    mock_etl_service.transform_load.return_value = 10
+
+    service = AsyncEtlService(client, mock_etl_service, max_concurrency=300)
+
+    # Act
+    results = service.run_backfill(["metropolitan", "kent", "essex"])
+
+    # Assert
+    assert [r.force for r in results] == ["metropolitan", "kent", "essex"]
+    assert all(r.months_processed == 100 and r.total_records == 1000 for r in results)
+    assert mock_etl_service.transform_load.call_count == 300
+    assert client.max_in_flight > 100  # genuinely overlapping, not one by one
+    assert client.availability_calls == 1  # one matrix request for all three forces
+
+
+def test_async_etl_respects_max_concurrency():
+    # Arrange
+    client = FakeAsyncClient({"metropolitan": [f"2023-{m:02d}" for m in range(1, 13)]})
+    mock_etl_service = Mock()
+    mock_etl_service.transform_load.return_value = 1
+
+    service = AsyncEtlService(client, mock_etl_service, max_concurrency=3)
+
+    # Act
+    service.run_backfill(["metropolitan"])
+
+    # Assert
+    assert client.max_in_flight <= 3
+
+
+def test_async_etl_counts_failed_months_and_unknown_forces():
+    # Arrange
+    client = FakeAsyncClient(
+        {"metropolitan": ["2023-01", "2023-02", "2023-03"]},
+        fail_months=[("metropolitan", "2023-02")],
+    )
+    mock_etl_service = Mock()
+    mock_etl_service.transform_load.return_value = 5
+
+    service = AsyncEtlService(client, mock_etl_service)
+
+    # Act
+    met, unknown = service.run_backfill(["metropolitan", "nonexistent-force"])
+
+    # Assert
+    assert met.months_processed == 2
+    assert met.months_failed == 1
+    assert met.total_records == 10
+    mock_etl_service.record_failure.assert_called_once()
+    assert unknown.months_processed == 0
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from stopsearch_etl.api import ApiError
+from stopsearch_etl.async_http_client import AsyncPoliceApiClient
+
+
+def _run(client, coro_factory):
+    async def _main():
+        async with client:
+            return await coro_factory()
+    return asyncio.run(_main())
+
+
+def test_async_client_fetches_stops(stub_api):
+    # Arrange
+    stub_api.add(200, [{"type": "Person search", "gender": "Male"}])
+    client = AsyncPoliceApiClient(base_url=stub_api.base_url)
+
+    # Act
+    result = _run(client, lambda: client.fetch_stops("metropolitan", "2023-01"))
+
+    # Assert
+    assert result == [{"type": "Person search", "gender": "Male"}]
+    request = stub_api.requests[0]
+    assert request.path == "/api/stops-force"
+    assert request.query == {"force": ["metropolitan"], "date": ["2023-01"]}
+
+
+def test_async_client_filters_available_months(stub_api):
+    # Arrange
+    stub_api.add(200, [
+        {"date": "2023-12", "stop-and-search": ["metropolitan"]},
+        {"date": "2023-11", "stop-and-search": ["avon-and-somerset"]},
+    ])
+    client = AsyncPoliceApiClient(base_url=stub_api.base_url)
+
+    # Act
+    result = _run(client, lambda: client.get_available_months("metropolitan"))
+
+    # Assert
+    assert result == ["2023-12"]
+
+
+def test_async_client_retries_server_errors_then_succeeds(stub_api): # 500, 503 then 200
+    # Arrange
+    stub_api.add(500)
+    stub_api.add(503)
+    stub_api.add(200, [{"type": "Vehicle search"}])
+    client = AsyncPoliceApiClient(base_url=stub_api.base_url, max_retries=3, backoff_factor=0.01)
+
+    # Act
+    result = _run(client, lambda: client.fetch_stops("metropolitan", "2023-01"))
+
+    # Assert
+    assert result == [{"type": "Vehicle search"}]
+    assert len(stub_api.requests) == 3
+
+
+def test_async_client_gives_up_after_max_retries(stub_api):
+    # Arrange
+    for _ in range(5):
+        stub_api.add(503)
+    client = AsyncPoliceApiClient(base_url=stub_api.base_url, max_retries=3, backoff_factor=0.01)
+
+    # Act & Assert
+    with pytest.raises(ApiError) as exc_info:
+        _run(client, lambda: client.fetch_stops("metropolitan", "2023-01"))
+
+    assert "503" in str(exc_info.value)
+    assert len(stub_api.requests) == 4  # 1 initial + 3 retries
+
+
+def test_async_client_does_not_retry_404(stub_api):
+    # Arrange
+    stub_api.add(404)
+    client = AsyncPoliceApiClient(base_url=stub_api.base_url, max_retries=3, backoff_factor=0.01)
+
+    # Act & Assert
+    with pytest.raises(ApiError) as exc_info:
+        _run(client, lambda: client.fetch_stops("nonexistent-force", "2023-01"))
+
+    assert "404" in str(exc_info.value)
+    assert len(stub_api.requests) == 1
+
+
+def test_async_client_backoff_matches_urllib3_retry():
+    # Arrange
+    from urllib3.util.retry import Retry
+    client = AsyncPoliceApiClient(backoff_factor=0.5)
+
+    # Act & Assert - same sleep for the same number of consecutive errors
+    for errors in range(1, 6):
+        retry = Retry(total=10, backoff_factor=0.5)
+        for _ in range(errors):
+            retry = retry.increment(method="GET", url="/")
+        assert client._backoff_time(errors) == retry.get_backoff_time()
+
+
+def test_async_client_reuses_keep_alive_connections(stub_api): # many requests, one pool
+    # Arrange
+    for _ in range(20):
+        stub_api.add(200, [])
+    client = AsyncPoliceApiClient(base_url=stub_api.base_url, max_per_host=2)
+
+    async def _fetch_many():
+        return await asyncio.gather(
+            *(client.fetch_stops("metropolitan", f"2023-{m:02d}") for m in range(1, 21))
+        )
+
+    # Act
+    results = _run(client, _fetch_many)
+
+    # Assert
+    assert len(results) == 20
+    client_ports = {request.client_address[1] for request in stub_api.requests}
+    assert len(client_ports) <= 2  # per-host limit, connections reused
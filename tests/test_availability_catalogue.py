@@ -0,0 +1,200 @@
+import responses
+from unittest.mock import Mock
+
+from stopsearch_etl.api import ApiError, PoliceApiClient
+from stopsearch_etl.availability import AvailabilityCatalogue
+from stopsearch_etl.backfill_service import BackfillService
+from stopsearch_etl.concurrent_etl import ConcurrentEtlService
+from stopsearch_etl.etl_service import ExtractedMonth
+from stopsearch_etl.http_client import HttpPoliceApiClient
+from stopsearch_etl.multi_force_runner import MultiForceRunner
+from stopsearch_etl.scheduler import EtlScheduler
+
+AVAILABILITY = [
+    {"date": "2023-11", "stop-and-search": ["metropolitan", "kent"]},
+    {"date": "2023-12", "stop-and-search": ["metropolitan"]},
+    {"date": "2023-10", "stop-and-search": ["kent", "metropolitan"]},
+]
+
+
+def test_catalogue_indexes_both_ways():
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_availability.return_value = AVAILABILITY
+    catalogue = AvailabilityCatalogue(mock_api_client)
+
+    # Act & Assert
+    assert catalogue.months_for("metropolitan") == ["2023-12", "2023-11", "2023-10"]  # newest first
+    assert catalogue.months_for("kent") == ["2023-11", "2023-10"]
+    assert catalogue.months_for("nonexistent-force") == []
+    assert catalogue.forces_for("2023-11") == ["kent", "metropolitan"]
+    assert catalogue.forces() == ["kent", "metropolitan"]
+    mock_api_client.get_availability.assert_called_once()  # all lookups from one fetch
+
+
+def test_catalogue_refetches_after_ttl():
+    # Arrange
+    now = [0.0]
+    mock_api_client = Mock()
+    mock_api_client.get_availability.return_value = AVAILABILITY
+    catalogue = AvailabilityCatalogue(mock_api_client, ttl_seconds=60, clock=lambda: now[0])
+
+    # Act
+    catalogue.months_for("metropolitan")
+    now[0] = 59
+    catalogue.months_for("kent")
+    calls_within_ttl = mock_api_client.get_availability.call_count
+    now[0] = 60
+    catalogue.months_for("kent")
+
+    # Assert
+    assert calls_within_ttl == 1
+    assert mock_api_client.get_availability.call_count == 2
+
+
+def test_catalogue_invalidate_forces_refetch():
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_availability.return_value = AVAILABILITY
+    catalogue = AvailabilityCatalogue(mock_api_client)
+    catalogue.months_for("metropolitan")
+
+    # Act
+    catalogue.invalidate()
+    catalogue.months_for("metropolitan")
+
+    # Assert
+    assert mock_api_client.get_availability.call_count == 2
+
+
+def test_invalidate_keeps_a_loaded_matrix_without_an_api_client():
+    # Arrange
+    catalogue = AvailabilityCatalogue()
+    catalogue.load(AVAILABILITY)
+
+    # Act
+    catalogue.invalidate()
+
+    # Assert: nothing to refetch from, so the loaded matrix stays usable
+    assert catalogue.months_for("kent") == ["2023-11", "2023-10"]
+
+
+def test_catalogue_falls_back_to_months_per_force_without_a_matrix():
+    # Arrange: a client that only implements the abstract methods
+    class MonthsOnlyClient(PoliceApiClient):
+        def __init__(self):
+            self.calls = []
+
+        def fetch_stops(self, force, date):
+            return []
+
+        def get_available_months(self, force):
+            self.calls.append(force)
+            return {"metropolitan": ["2023-10", "2023-12", "2023-11"], "kent": ["2023-11"]}.get(force, [])
+
+    api_client = MonthsOnlyClient()
+    catalogue = AvailabilityCatalogue(api_client)
+
+    # Act & Assert
+    assert catalogue.months_for("metropolitan") == ["2023-12", "2023-11", "2023-10"]
+    assert catalogue.months_for("kent") == ["2023-11"]
+    assert catalogue.months_for("metropolitan") == ["2023-12", "2023-11", "2023-10"]
+    assert api_client.calls == ["metropolitan", "kent"]  # cached per force
+    assert catalogue.forces_for("2023-11") == ["kent", "metropolitan"]
+    assert catalogue.availability_hash("2023-11") is None  # can't tell a republish from a partial list
+    catalogue.invalidate()
+    catalogue.months_for("kent")
+    assert api_client.calls == ["metropolitan", "kent", "kent"]
+
+
+def test_multi_force_run_makes_one_availability_request(): # 3 forces -> 1 request
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_availability.return_value = AVAILABILITY
+    mock_etl_service = Mock()
+    mock_etl_service.extract_transform_load.return_value = 10
+
+    catalogue = AvailabilityCatalogue(mock_api_client)
+    backfill_service = BackfillService(mock_api_client, mock_etl_service, catalogue)
+    runner = MultiForceRunner(backfill_service)
+
+    # Act
+    summary = runner.run_backfill(["metropolitan", "kent", "nonexistent-force"])
+
+    # Assert
+    assert summary.total_months_processed == 5  # 3 metropolitan + 2 kent
+    mock_api_client.get_availability.assert_called_once()
+    mock_api_client.get_available_months.assert_not_called()
+
+
+def test_concurrent_etl_uses_catalogue():
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_availability.return_value = AVAILABILITY
+    mock_etl_service = Mock()
+    mock_etl_service.extract_transform.side_effect = lambda force, month: ExtractedMonth(force, month, [], 0)
+    mock_etl_service.load_many.side_effect = lambda months, **kwargs: [0 for _ in months]
+    catalogue = AvailabilityCatalogue(mock_api_client)
+
+    service = ConcurrentEtlService(mock_api_client, mock_etl_service, max_workers=2, catalogue=catalogue)
+
+    # Act
+    result = service.backfill_force_concurrent("kent")
+
+    # Assert
+    assert result.months_processed == 2
+    mock_api_client.get_available_months.assert_not_called()
+
+
+def test_backfill_service_handles_catalogue_api_error(): # matrix fetch fails -> empty summary, no crash
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_availability.side_effect = ApiError("HTTP error 503: down")
+    mock_etl_service = Mock()
+    backfill_service = BackfillService(mock_api_client, mock_etl_service, AvailabilityCatalogue(mock_api_client))
+
+    # Act
+    result = backfill_service.backfill_force("metropolitan")
+
+    # Assert
+    assert result.months_processed == 0
+    mock_etl_service.extract_transform_load.assert_not_called()
+
+
+def test_scheduler_run_once_refreshes_catalogue_each_run():
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_availability.return_value = AVAILABILITY
+    catalogue = AvailabilityCatalogue(mock_api_client)
+    mock_runner = Mock()
+
+    def run_backfill(forces):
+        for force in forces:
+            catalogue.months_for(force)
+        return Mock()
+
+    mock_runner.run_backfill.side_effect = run_backfill
+
+    scheduler = EtlScheduler(mock_runner, ["metropolitan", "kent"], catalogue=catalogue)
+
+    # Act
+    scheduler.run_once()
+    scheduler.run_once()
+
+    # Assert
+    assert mock_api_client.get_availability.call_count == 2  # once per run, not per force
+
+
+@responses.activate
+def test_http_client_fetches_full_availability_matrix():
+    # Arrange
+    responses.add(responses.GET, "https://data.police.uk/api/crimes-street-dates",
+                  json=AVAILABILITY, status=200)
+    client = HttpPoliceApiClient()
+
+    # Act
+    result = client.get_availability()
+
+    # Assert
+    assert result == AVAILABILITY
+    assert len(responses.calls) == 1
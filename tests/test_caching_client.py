@@ -0,0 +1,132 @@
+import random
+import string
+from unittest.mock import Mock
+
+from stopsearch_etl.caching_client import CachingPoliceApiClient
+from stopsearch_etl.http_client import HttpPoliceApiClient
+
+
+def month(count):
+    return [{"type": "Person search", "datetime": f"2023-01-15T10:{i:02d}:00+00:00"} for i in range(count)]
+
+
+def test_fresh_entries_are_served_without_the_network(stub_api, tmp_path):
+    # Arrange
+    stub_api.publish("metropolitan", "2023-01", month(3))
+    client = CachingPoliceApiClient(HttpPoliceApiClient(base_url=stub_api.base_url),
+                                    str(tmp_path / "cache.sqlite"), ttl_seconds=3600)
+
+    # Act
+    first = client.fetch_stops("metropolitan", "2023-01")
+    second = client.fetch_stops("metropolitan", "2023-01")
+    streamed = list(client.iter_stops("metropolitan", "2023-01"))
+
+    # Assert
+    assert first == second == streamed == month(3)
+    assert len(stub_api.requests) == 1
+    assert (client.stats.hits, client.stats.misses) == (2, 1)
+
+
+def test_stale_entries_are_revalidated_with_etag(stub_api, fake_clock, tmp_path):
+    # Arrange
+    clock = fake_clock
+    stub_api.publish("metropolitan", "2023-01", month(3))
+    client = CachingPoliceApiClient(HttpPoliceApiClient(base_url=stub_api.base_url),
+                                    str(tmp_path / "cache.sqlite"), ttl_seconds=60, clock=clock)
+    client.fetch_stops("metropolitan", "2023-01")
+
+    # Act
+    clock.now += 120
+    unchanged = client.fetch_stops("metropolitan", "2023-01")
+    stub_api.publish("metropolitan", "2023-01", month(5))  # month republished
+    clock.now += 120
+    changed = list(client.iter_stops("metropolitan", "2023-01"))
+
+    # Assert
+    assert unchanged == month(3)
+    assert changed == month(5)
+    statuses = [(request.if_none_match is not None, request.status) for request in stub_api.requests]
+    assert statuses == [(False, 200), (True, 304), (True, 200)]
+    assert (client.stats.revalidated, client.stats.misses) == (1, 2)
+
+
+def test_not_modified_without_a_cached_entry_is_refetched(stub_api, tmp_path):
+    # Arrange: something in between answers 304 though this cache has nothing
+    stub_api.add(304, headers={"ETag": '"stale"'})
+    stub_api.publish("metropolitan", "2023-01", month(3))
+    client = CachingPoliceApiClient(HttpPoliceApiClient(base_url=stub_api.base_url),
+                                    str(tmp_path / "cache.sqlite"), ttl_seconds=3600)
+
+    # Act
+    records = client.fetch_stops("metropolitan", "2023-01")
+
+    # Assert
+    assert records == month(3)
+    assert [(request.if_none_match, request.status) for request in stub_api.requests] == [(None, 304), (None, 200)]
+    assert (client.stats.revalidated, client.stats.misses) == (0, 1)
+    assert client.fetch_stops("metropolitan", "2023-01") == month(3)  # and it's cached now
+    assert len(stub_api.requests) == 2
+
+
+def test_cache_persists_across_instances(stub_api, tmp_path):
+    # Arrange
+    stub_api.publish("metropolitan", "2023-01", month(2))
+    path = str(tmp_path / "cache.sqlite")
+    CachingPoliceApiClient(HttpPoliceApiClient(base_url=stub_api.base_url), path).fetch_stops(
+        "metropolitan", "2023-01")
+
+    # Act
+    client = CachingPoliceApiClient(HttpPoliceApiClient(base_url=stub_api.base_url), path)
+    records = client.fetch_stops("metropolitan", "2023-01")
+
+    # Assert
+    assert records == month(2)
+    assert len(stub_api.requests) == 1
+    assert client.stats.stored_bytes > 0
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_limit(fake_clock, tmp_path):
+    # Arrange
+    clock = fake_clock
+    inner = Mock(spec=["fetch_stops", "iter_stops", "get_available_months"])
+    noise = random.Random(42)  # incompressible, so each entry is ~800 bytes stored
+    inner.fetch_stops.side_effect = lambda force, date: [
+        {"date": date, "pad": "".join(noise.choices(string.ascii_letters, k=1000))}
+    ]
+    client = CachingPoliceApiClient(inner, str(tmp_path / "cache.sqlite"), ttl_seconds=None,
+                                    max_bytes=2000, clock=clock)  # room for two
+    for date in ["2023-01", "2023-02"]:
+        clock.now += 1
+        client.fetch_stops("kent", date)
+    clock.now += 1
+    client.fetch_stops("kent", "2023-01")  # 2023-02 is now the least recently used
+
+    # Act
+    clock.now += 1
+    client.fetch_stops("kent", "2023-03")
+    client.fetch_stops("kent", "2023-01")
+    client.fetch_stops("kent", "2023-02")
+
+    # Assert
+    assert client.stats.evictions == 2
+    fetched = [call.args[1] for call in inner.fetch_stops.call_args_list]
+    assert fetched == ["2023-01", "2023-02", "2023-03", "2023-02"]
+
+
+def test_streamed_miss_is_cached_and_availability_passes_through(tmp_path):
+    # Arrange
+    inner = Mock()
+    inner.iter_stops.side_effect = lambda force, date: iter(month(4))
+    inner.get_available_months.return_value = ["2023-01"]
+    client = CachingPoliceApiClient(inner, str(tmp_path / "cache.sqlite"))
+
+    # Act
+    streamed = list(client.iter_stops("kent", "2023-01"))
+    cached = client.fetch_stops("kent", "2023-01")
+    client.get_available_months("kent")
+    client.get_available_months("kent")
+
+    # Assert
+    assert streamed == cached == month(4)
+    inner.iter_stops.assert_called_once()
+    assert inner.get_available_months.call_count == 2
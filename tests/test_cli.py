@@ -1,3 +1,4 @@
+import logging
 import pytest
 from unittest.mock import Mock, patch
 import sys
@@ -53,7 +54,7 @@ def test_parser_handles_run_once_command(): # run-now command
 
 
 @patch('stopsearch_etl.cli.setup_application')
-def test_main_executes_backfill_command(mock_setup):
+def test_main_executes_backfill_command(mock_setup, caplog):
     # Arrange
     mock_backfill_service = Mock()
     mock_multi_runner = Mock()
@@ -72,11 +73,13 @@ def test_main_executes_backfill_command(mock_setup):
     test_args = ['backfill', '--force', 'metropolitan']
 
     # Act
-    with patch.object(sys, 'argv', ['cli.py'] + test_args):
+    with patch.object(sys, 'argv', ['cli.py'] + test_args), caplog.at_level(logging.INFO, logger="stopsearch_etl.cli"):
         main()
 
     # Assert
     mock_backfill_service.backfill_force.assert_called_once_with('metropolitan')
+    completed = next(r for r in caplog.records if r.getMessage().startswith("Completed"))
+    assert (completed.force, completed.records_ingested, completed.months_processed) == ("metropolitan", 1500, 12)
 
 
 @patch('stopsearch_etl.cli.setup_application')
@@ -121,4 +124,110 @@ def test_parser_validates_since_format(): # valid YYYY-MM passes
     args = parser.parse_args(['backfill', '--force', 'metropolitan', '--since', '2023-12'])
 
     # Assert
-    assert args.since == '2023-12'
\ No newline at end of file
+    assert args.since == '2023-12'
+
+def test_parser_handles_full_flag(): # --full opts out of incremental mode
+    # Arrange
+    parser = create_parser()
+
+    # Act
+    args = parser.parse_args(['backfill', '--force', 'metropolitan', '--full'])
+
+    # Assert
+    assert args.full is True
+
+
+def test_parser_handles_replay_command():
+    # Arrange
+    parser = create_parser()
+
+    # Act
+    args = parser.parse_args(['replay', '--archive', '/data/raw', '--force', 'metropolitan', '--workers', '4'])
+
+    # Assert
+    assert args.command == 'replay'
+    assert args.archive == '/data/raw'
+    assert args.force == ['metropolitan']
+    assert args.workers == 4
+
+
+def test_parser_handles_migrate_command():
+    # Arrange
+    parser = create_parser()
+
+    # Act
+    args = parser.parse_args(['migrate', '--vacuum'])
+
+    # Assert
+    assert args.command == 'migrate'
+    assert args.vacuum is True
+
+
+@patch('stopsearch_etl.cli.configure_logging')
+@patch('stopsearch_etl.cli.setup_application')
+def test_main_migrate_runs_heavy_migrations_without_building_the_app(mock_setup, mock_logging, tmp_path,
+                                                                      monkeypatch):
+    # Arrange
+    from sqlalchemy import create_engine
+    from stopsearch_etl.migrations import applied_versions
+    db_path = tmp_path / 'etl.db'
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{db_path}')
+
+    # Act
+    with patch.object(sys, 'argv', ['cli.py', 'migrate', '--vacuum']):
+        main()
+
+    # Assert
+    mock_setup.assert_not_called()
+    engine = create_engine(f'sqlite:///{db_path}')
+    assert applied_versions(engine) == {1, 2, 3, 4, 5}
+    engine.dispose()
+
+
+@patch('stopsearch_etl.cli.setup_application')
+def test_main_rejects_write_commands_under_the_readonly_profile(mock_setup, monkeypatch, capsys):
+    # Arrange
+    monkeypatch.setenv('SQLITE_PROFILE', 'readonly')
+
+    # Act
+    with patch.object(sys, 'argv', ['cli.py', 'run-once']):
+        with pytest.raises(SystemExit):
+            main()
+
+    # Assert
+    assert "SQLITE_PROFILE=readonly" in capsys.readouterr().err
+    mock_setup.assert_not_called()
+
+
+@patch('stopsearch_etl.cli.configure_logging')
+def test_setup_application_reads_an_existing_database_under_the_readonly_profile(mock_logging, tmp_path,
+                                                                                 monkeypatch):
+    # Arrange: a database the ETL process created and loaded, with migrations still to run
+    # (a reader mustn't try to run them: query_only refuses even the schema_migrations table)
+    from datetime import datetime
+    from sqlalchemy.orm import sessionmaker
+    from stopsearch_etl.cli import setup_application
+    from stopsearch_etl.domain import StopSearchRecord
+    from stopsearch_etl.read_service import ReadService
+    from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository
+    from stopsearch_etl.storage import create_database_engine
+    db_url = f'sqlite:///{tmp_path / "etl.db"}'
+    writer = create_database_engine(db_url, 'bulk')
+    Base.metadata.create_all(writer)
+    SqliteStopSearchRepository(sessionmaker(bind=writer)()).save_batch([StopSearchRecord(
+        type="Person search", datetime=datetime(2023, 1, 5, 10, 0), gender=None, age_range=None,
+        self_defined_ethnicity=None, officer_defined_ethnicity=None, legislation=None, object_of_search=None,
+        outcome="Arrest", outcome_linked_to_object_of_search=None, removal_of_more_than_outer_clothing=None,
+        latitude=51.5, longitude=-0.12, street_id=None, street_name=None, force="metropolitan",
+    )])
+    writer.dispose()
+    monkeypatch.setenv('DATABASE_URL', db_url)
+    monkeypatch.setenv('SQLITE_PROFILE', 'readonly')
+
+    # Act
+    _, repository, _, _, _ = setup_application()
+
+    # Assert
+    assert [r.outcome for r in repository.find_by_force_and_month("metropolitan", "2023-01")] == ["Arrest"]
+    assert ReadService(repository).get_summary_stats()["total_records"] == 1
+    repository.session.close()
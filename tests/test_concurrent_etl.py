@@ -1,22 +1,43 @@
+import threading
+import time
+
 import pytest
 from unittest.mock import Mock
-from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
 from stopsearch_etl.concurrent_etl import ConcurrentEtlService
 from stopsearch_etl.backfill_service import BackfillResult
+from stopsearch_etl.etl_service import EtlService, ExtractedMonth
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository, StopSearchTable
+
+
+def _extracted(force, month, count=1):
+    # the writer only cares about the records list length here
+    return ExtractedMonth(force, month, [Mock()] * count, count)
+
+
+def _etl_service_mock(records_per_month=100, failing_month=None):
+    mock_etl_service = Mock()
+
+    def extract_side_effect(force, month):
+        if month == failing_month:
+            raise Exception("Network timeout")
+        return _extracted(force, month, records_per_month)
+
+    mock_etl_service.extract_transform.side_effect = extract_side_effect
+    mock_etl_service.load_many.side_effect = lambda months, **kwargs: [len(m.records) for m in months]
+    return mock_etl_service
 
 
 def test_concurrent_etl_processes_months_in_parallel(): # happy path: all months succeed
     # Arrange
     mock_api_client = Mock()
-    mock_etl_service = Mock()
+    mock_etl_service = _etl_service_mock(records_per_month=100)
 
     available_months = ["2023-12", "2023-11", "2023-10"]
     mock_api_client.get_available_months.return_value = available_months
 
-    # Mock ETL results
-    mock_etl_service.extract_transform_load.return_value = 100
-
     concurrent_etl = ConcurrentEtlService(mock_api_client, mock_etl_service, max_workers=2)
 
     # Act
@@ -27,26 +48,21 @@ def test_concurrent_etl_processes_months_in_parallel(): # happy path: all months
     assert result.months_processed == 3
     assert result.force == "metropolitan"
 
-    # All months should have been processed
-    assert mock_etl_service.extract_transform_load.call_count == 3
+    # All months should have been fetched, and loaded through load_many
+    assert mock_etl_service.extract_transform.call_count == 3
+    loaded = [m.month for call in mock_etl_service.load_many.call_args_list for m in call.args[0]]
+    assert sorted(loaded) == sorted(available_months)
+    mock_etl_service.extract_transform_load.assert_not_called()
 
 
 def test_concurrent_etl_handles_month_failures(): # one month fails; others still count
     # Arrange
     mock_api_client = Mock()
-    mock_etl_service = Mock()
+    mock_etl_service = _etl_service_mock(records_per_month=100, failing_month="2023-11")
 
     available_months = ["2023-12", "2023-11", "2023-10"]
     mock_api_client.get_available_months.return_value = available_months
 
-    # Middle month fails
-    def etl_side_effect(force, month):
-        if month == "2023-11":
-            raise Exception("Network timeout")
-        return 100
-
-    mock_etl_service.extract_transform_load.side_effect = etl_side_effect
-
     concurrent_etl = ConcurrentEtlService(mock_api_client, mock_etl_service, max_workers=2)
 
     # Act
@@ -61,26 +77,17 @@ def test_concurrent_etl_handles_month_failures(): # one month fails; others stil
 def test_concurrent_etl_respects_max_workers_limit(): # many months: just check everything ran
     # Arrange
     mock_api_client = Mock()
-    mock_etl_service = Mock()
-    
+    mock_etl_service = _etl_service_mock(records_per_month=50)
+
     available_months = [f"2023-{month:02d}" for month in range(1, 13)]  # 12 months
     mock_api_client.get_available_months.return_value = available_months
 
-    # track basic concurrency (best-effort)
-    executing_count = 0
-    max_concurrent = 0
-
-    def slow_etl(force, month):
-        nonlocal executing_count, max_concurrent
-        executing_count += 1
-        max_concurrent = max(max_concurrent, executing_count)
-        # pretend to do work
-        import time
+    def slow_extract(force, month):
+        # pretend to do network work
         time.sleep(0.01)
-        executing_count -= 1
-        return 50
+        return _extracted(force, month, 50)
 
-    mock_etl_service.extract_transform_load.side_effect = slow_etl
+    mock_etl_service.extract_transform.side_effect = slow_extract
 
     concurrent_etl = ConcurrentEtlService(mock_api_client, mock_etl_service, max_workers=3)
 
@@ -90,5 +97,169 @@ def test_concurrent_etl_respects_max_workers_limit(): # many months: just check
     # Assert
     assert result.total_records == 600  # 12 months × 50 records
     assert result.months_processed == 12
-    assert mock_etl_service.extract_transform_load.call_count == 12
-    # NOTE: checking exact concurrency is flaky; avoid strict asserts on max_concurrent
\ No newline at end of file
+    assert mock_etl_service.extract_transform.call_count == 12
+    # NOTE: checking exact concurrency is flaky; avoid strict asserts on max_concurrent
+
+
+def test_concurrent_etl_loads_on_the_calling_thread(): # workers never touch the DB
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_available_months.return_value = [f"2023-{month:02d}" for month in range(1, 13)]
+    mock_etl_service = _etl_service_mock(records_per_month=5)
+
+    load_threads = set()
+
+    def record_thread(months, **kwargs):
+        load_threads.add(threading.current_thread().name)
+        return [len(m.records) for m in months]
+
+    mock_etl_service.load_many.side_effect = record_thread
+
+    concurrent_etl = ConcurrentEtlService(mock_api_client, mock_etl_service, max_workers=4)
+
+    # Act
+    result = concurrent_etl.backfill_force_concurrent("metropolitan")
+
+    # Assert
+    assert result.months_processed == 12
+    assert load_threads == {threading.current_thread().name}
+
+
+def test_concurrent_etl_coalesces_waiting_months_into_one_transaction():
+    # Arrange
+    mock_api_client = Mock()
+    months = [f"2023-{month:02d}" for month in range(1, 7)]
+    mock_api_client.get_available_months.return_value = months
+    mock_etl_service = _etl_service_mock(records_per_month=1)
+
+    # hold the writer on its first batch so the rest pile up in the queue
+    first_load = threading.Event()
+    release = threading.Event()
+    batch_sizes = []
+
+    def slow_first_load(extracted, **kwargs):
+        batch_sizes.append(len(extracted))
+        if not first_load.is_set():
+            first_load.set()
+            release.wait(timeout=5)
+        return [len(m.records) for m in extracted]
+
+    mock_etl_service.load_many.side_effect = slow_first_load
+
+    def extract_after_first_load(force, month):
+        if month != months[0]:
+            first_load.wait(timeout=5)
+        return _extracted(force, month, 1)
+
+    mock_etl_service.extract_transform.side_effect = extract_after_first_load
+
+    concurrent_etl = ConcurrentEtlService(mock_api_client, mock_etl_service, max_workers=6,
+                                          queue_size=10, months_per_transaction=8)
+
+    # Act
+    worker = threading.Thread(target=concurrent_etl.backfill_force_concurrent, args=("metropolitan",))
+    worker.start()
+    first_load.wait(timeout=5)
+    deadline = time.monotonic() + 5
+    while mock_etl_service.extract_transform.call_count < len(months) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)  # let the last worker hand its month over
+    release.set()
+    worker.join(timeout=5)
+
+    # Assert
+    assert batch_sizes == [1, 5]
+
+
+def test_concurrent_etl_retries_months_alone_when_a_batch_fails():
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_available_months.return_value = ["2023-03", "2023-02", "2023-01"]
+    mock_etl_service = _etl_service_mock(records_per_month=10)
+
+    def bad_february(extracted, **kwargs):
+        if any(m.month == "2023-02" for m in extracted):
+            raise Exception("disk I/O error")
+        return [len(m.records) for m in extracted]
+
+    mock_etl_service.load_many.side_effect = bad_february
+
+    concurrent_etl = ConcurrentEtlService(mock_api_client, mock_etl_service, max_workers=3)
+
+    # Act
+    result = concurrent_etl.backfill_force_concurrent("metropolitan")
+
+    # Assert
+    assert result.months_processed == 2
+    assert result.months_failed == 1
+    assert result.total_records == 20
+
+
+def test_months_retried_after_a_failed_batch_are_only_counted_once():
+    # Arrange: the writer's transaction fails whenever february (2 records) is in it
+    from stopsearch_etl.metrics import MetricsCollector
+    repository = Mock()
+
+    def save_batches(batches):
+        if any(len(batch) == 2 for batch in batches):
+            raise Exception("disk I/O error")
+        return [len(batch) for batch in batches]
+
+    repository.save_batches.side_effect = save_batches
+    metrics = MetricsCollector()
+    etl_service = EtlService(Mock(), repository, metrics)
+    extracted = [
+        ExtractedMonth("metropolitan", month, etl_service.transform_batch(
+            [{"type": "Person search", "datetime": f"{month}-15T10:{i:02d}:00+00:00"} for i in range(count)],
+            "metropolitan"), count)
+        for month, count in [("2023-01", 3), ("2023-02", 2), ("2023-03", 3)]
+    ]
+    concurrent_etl = ConcurrentEtlService(Mock(), etl_service)
+    outcomes = []
+
+    # Act
+    concurrent_etl._write(extracted, outcomes)
+
+    # Assert
+    snapshot = metrics.get_current_metrics()
+    assert [(o.month, o.error is None) for o in outcomes] == [("2023-01", True), ("2023-02", False),
+                                                              ("2023-03", True)]
+    assert (snapshot.total_batches_processed, snapshot.total_batches_failed) == (2, 1)
+    assert [failure["month"] for failure in snapshot.failed_batches] == ["2023-02"]
+
+
+def test_concurrent_etl_end_to_end_with_sqlite(tmp_path): # real repo, file-backed DB
+    # Arrange
+    engine = create_engine(f"sqlite:///{tmp_path / 'stopsearch.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    repository = SqliteStopSearchRepository(session)
+
+    mock_api_client = Mock()
+    months = [f"2023-{month:02d}" for month in range(1, 13)]
+    mock_api_client.get_available_months.return_value = months
+
+    def fetch_stops(force, month):
+        return [
+            {
+                "datetime": f"{month}-15T10:{i:02d}:00+00:00",
+                "type": "Person search",
+                "outcome": "A no further action disposal",
+                "object_of_search": "Controlled drugs",
+                "location": {"latitude": "51.5", "longitude": "-0.1"},
+            }
+            for i in range(3)
+        ]
+
+    mock_api_client.fetch_stops.side_effect = fetch_stops
+    etl_service = EtlService(mock_api_client, repository)
+    concurrent_etl = ConcurrentEtlService(mock_api_client, etl_service, max_workers=8)
+
+    # Act
+    result = concurrent_etl.backfill_force_concurrent("metropolitan")
+
+    # Assert
+    assert result.months_processed == 12
+    assert result.total_records == 36
+    assert session.query(StopSearchTable).count() == 36
+    session.close()
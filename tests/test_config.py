@@ -18,6 +18,7 @@ def test_config_loads_defaults():
         assert config.forces == ["metropolitan"]  # sensible default
         assert config.database_url == "sqlite:///stopsearch.db"
         assert config.log_level == "INFO"
+        assert config.max_in_flight == 1  # the streaming sequential runner
 
     finally:
         # put env bac
@@ -60,4 +61,124 @@ def test_config_validates_log_level():
 
     finally:
         # cleanup
-        os.environ.pop("LOG_LEVEL", None)
\ No newline at end of file
+        os.environ.pop("LOG_LEVEL", None)
+
+def test_config_validates_etl_mode():
+    # Arrange
+    os.environ["ETL_MODE"] = "sometimes"
+
+    try:
+        # Act & Assert
+        with pytest.raises(ValueError) as exc_info:
+            Config()
+
+        assert "Invalid ETL mode" in str(exc_info.value)
+
+    finally:
+        # cleanup
+        os.environ.pop("ETL_MODE", None)
+
+def test_config_validates_sqlite_profile():
+    # Arrange
+    os.environ["SQLITE_PROFILE"] = "turbo"
+
+    try:
+        # Act & Assert
+        with pytest.raises(ValueError) as exc_info:
+            Config()
+
+        assert "Invalid SQLite profile" in str(exc_info.value)
+
+    finally:
+        # cleanup
+        os.environ.pop("SQLITE_PROFILE", None)
+
+def test_config_validates_stream_flush_interval():
+    # Arrange
+    os.environ["STREAM_FLUSH_INTERVAL_MS"] = "-5"
+
+    try:
+        # Act & Assert
+        with pytest.raises(ValueError) as exc_info:
+            Config()
+
+        assert "Invalid STREAM_FLUSH_INTERVAL_MS" in str(exc_info.value)
+
+    finally:
+        # cleanup
+        os.environ.pop("STREAM_FLUSH_INTERVAL_MS", None)
+
+def test_config_validates_raw_archive_codec():
+    # Arrange
+    os.environ["RAW_ARCHIVE_CODEC"] = "bzip9"
+
+    try:
+        # Act & Assert
+        with pytest.raises(ValueError) as exc_info:
+            Config()
+
+        assert "Invalid archive codec" in str(exc_info.value)
+
+    finally:
+        # cleanup
+        os.environ.pop("RAW_ARCHIVE_CODEC", None)
+
+def test_config_validates_api_cache_settings():
+    # Arrange
+    os.environ["API_CACHE_TTL_S"] = "a day"
+
+    try:
+        # Act & Assert
+        with pytest.raises(ValueError) as exc_info:
+            Config()
+
+        assert "Invalid API_CACHE_TTL_S" in str(exc_info.value)
+
+    finally:
+        # cleanup
+        os.environ.pop("API_CACHE_TTL_S", None)
+
+def test_config_adaptive_concurrency_can_be_turned_off():
+    # Arrange
+    os.environ["ADAPTIVE_CONCURRENCY"] = "false"
+
+    try:
+        # Act
+        config = Config()
+
+        # Assert
+        assert config.adaptive_concurrency is False
+
+    finally:
+        # cleanup
+        os.environ.pop("ADAPTIVE_CONCURRENCY", None)
+
+def test_config_validates_metrics_port():
+    # Arrange
+    os.environ["METRICS_PORT"] = "70000"
+
+    try:
+        # Act & Assert
+        with pytest.raises(ValueError) as exc_info:
+            Config()
+
+        assert "Invalid METRICS_PORT" in str(exc_info.value)
+
+    finally:
+        # cleanup
+        os.environ.pop("METRICS_PORT", None)
+
+def test_config_validates_log_format():
+    # Arrange
+    os.environ["LOG_FORMAT"] = "xml"
+
+    try:
+        # Act & Assert
+        with pytest.raises(ValueError) as exc_info:
+            Config()
+
+        assert "Invalid LOG_FORMAT" in str(exc_info.value)
+
+    finally:
+        # cleanup
+        os.environ.pop("LOG_FORMAT", None)
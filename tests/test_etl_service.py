@@ -3,6 +3,7 @@ from unittest.mock import Mock, call
 from datetime import datetime
 
 from stopsearch_etl.domain import StopSearchRecord
+from stopsearch_etl.api import ApiError
 from stopsearch_etl.etl_service import EtlService
 
 
@@ -55,6 +56,7 @@ def test_etl_service_processes_single_force_month():
     assert isinstance(saved_records[0], StopSearchRecord)
     assert saved_records[0].type == "Person search"
     assert saved_records[0].gender == "Male"
+    assert saved_records[0].force == "metropolitan"  # tagged with the force we asked for
 
 
 def test_etl_service_handles_empty_api_response():
@@ -102,4 +104,95 @@ def test_etl_service_handles_malformed_records():
     saved_records = mock_repository.save_batch.call_args[0][0]
     assert len(saved_records) == 1
     assert saved_records[0].type == "Vehicle search"
-    assert saved_records[0].gender is None  # Should handle missing fields gracefully
\ No newline at end of file
+    assert saved_records[0].gender is None  # Should handle missing fields gracefully
+
+def test_etl_service_streams_month_in_fixed_size_chunks():
+    # Arrange
+    from stopsearch_etl.ledger import payload_hash
+    mock_api_client = Mock()
+    mock_repository = Mock()
+    mock_ledger = Mock()
+    raw = [{"type": "Person search", "datetime": f"2023-01-{day:02d}T10:00:00+00:00"} for day in range(1, 6)]
+    raw.insert(2, {"type": "broken"})  # no datetime -> skipped by transform
+    mock_api_client.iter_stops.return_value = iter(raw)
+    mock_repository.save_batch.side_effect = lambda records: len(records)
+
+    etl_service = EtlService(mock_api_client, mock_repository, ledger=mock_ledger, stream_chunk_size=2)
+
+    # Act
+    result = etl_service.extract_transform_load("metropolitan", "2023-01")
+
+    # Assert
+    assert result == 5
+    mock_api_client.fetch_stops.assert_not_called()
+    chunk_sizes = [len(c.args[0]) for c in mock_repository.save_batch.call_args_list]
+    assert chunk_sizes == [2, 1, 2]  # the broken record's chunk just comes out short
+    assert all(r.force == "metropolitan" for c in mock_repository.save_batch.call_args_list for r in c.args[0])
+    mock_ledger.record_load.assert_called_once_with("metropolitan", "2023-01", 6, payload_hash(raw))
+
+def test_load_records_reports_per_chunk_metrics():
+    # Arrange
+    mock_repository = Mock()
+    mock_metrics = Mock()
+    raw = [{"type": "Person search", "datetime": f"2023-01-{day:02d}T10:00:00+00:00"} for day in range(1, 8)]
+    mock_repository.save_batch.side_effect = lambda records: len(records) - 1  # one dupe per chunk
+
+    etl_service = EtlService(Mock(), mock_repository, metrics_collector=mock_metrics)
+
+    # Act
+    result = etl_service.load_records("metropolitan", "2023-01", (r for r in raw), chunk_size=3)
+
+    # Assert
+    assert [(c.index, c.raw_count, c.parsed_count, c.saved_count) for c in result.chunks] == [
+        (0, 3, 3, 2), (1, 3, 3, 2), (2, 1, 1, 0),
+    ]
+    assert (result.raw_count, result.parsed_count, result.saved_count, result.deduplicated_count) == (7, 7, 4, 3)
+    assert all(c.parse_ms >= 0 and c.write_ms >= 0 for c in result.chunks)
+    mock_metrics.record_successful_batch.assert_called_once_with("metropolitan", "2023-01", 4, 3)
+
+def test_load_records_flushes_slow_streams_on_interval():
+    # Arrange
+    import time
+    mock_repository = Mock()
+    mock_repository.save_batch.side_effect = lambda records: len(records)
+
+    def slow_stream():
+        for day in range(1, 5):
+            time.sleep(0.03)
+            yield {"type": "Person search", "datetime": f"2023-01-{day:02d}T10:00:00+00:00"}
+
+    etl_service = EtlService(Mock(), mock_repository)
+
+    # Act
+    result = etl_service.load_records("metropolitan", "2023-01", slow_stream(), chunk_size=1000,
+                                      flush_interval_ms=1)
+
+    # Assert - never got near 1000, but each record was old enough to go on its own
+    assert [c.raw_count for c in result.chunks] == [1, 1, 1, 1]
+    assert result.saved_count == 4
+
+def test_load_records_writes_on_calling_thread_and_surfaces_stream_errors():
+    # Arrange
+    import threading
+    mock_repository = Mock()
+    mock_ledger = Mock()
+    writer_threads = []
+
+    def save_batch(records):
+        writer_threads.append(threading.current_thread())
+        return len(records)
+
+    def broken_stream():
+        yield {"type": "Person search", "datetime": "2023-01-01T10:00:00+00:00"}
+        yield {"type": "Person search", "datetime": "2023-01-02T10:00:00+00:00"}
+        raise ApiError("connection reset")
+
+    mock_repository.save_batch.side_effect = save_batch
+    etl_service = EtlService(Mock(), mock_repository, ledger=mock_ledger)
+
+    # Act / Assert
+    with pytest.raises(ApiError, match="connection reset"):
+        etl_service.load_records("metropolitan", "2023-01", broken_stream(), chunk_size=1)
+
+    assert writer_threads and all(t is threading.current_thread() for t in writer_threads)
+    mock_ledger.record_load.assert_not_called()  # month isn't marked done
@@ -57,4 +57,39 @@ def test_http_client_raises_api_error_on_404(): # Pretend API gives us a 404 ->
     with pytest.raises(ApiError) as exc_info:
         client.fetch_stops(force, year_month)
 
-    assert "404" in str(exc_info.value)
\ No newline at end of file
+    assert "404" in str(exc_info.value)
+
+@responses.activate
+def test_http_client_streams_stops_record_by_record():
+    # Arrange
+    force = "metropolitan"
+    year_month = "2023-01"
+    records = [{"type": "Person search", "n": i, "street": {"name": "On or near Café Road"}} for i in range(50)]
+    responses.add(
+        responses.GET,
+        f"https://data.police.uk/api/stops-force?force={force}&date={year_month}",
+        json=records,
+        status=200
+    )
+    client = HttpPoliceApiClient()
+
+    # Act: tiny chunks so records straddle chunk boundaries
+    streamed = list(client.iter_stops(force, year_month, chunk_size=7))
+
+    # Assert
+    assert streamed == records
+
+
+@responses.activate
+def test_http_client_stream_raises_api_error_on_bad_json_and_http_errors():
+    # Arrange
+    base = "https://data.police.uk/api/stops-force"
+    responses.add(responses.GET, f"{base}?force=metropolitan&date=2023-01", body='[{"type": "Person', status=200)
+    responses.add(responses.GET, f"{base}?force=nowhere&date=2023-01", status=404)
+    client = HttpPoliceApiClient()
+
+    # Act & Assert
+    with pytest.raises(ApiError, match="Invalid JSON"):
+        list(client.iter_stops("metropolitan", "2023-01"))
+    with pytest.raises(ApiError, match="404"):
+        list(client.iter_stops("nowhere", "2023-01"))
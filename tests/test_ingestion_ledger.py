@@ -0,0 +1,146 @@
+import pytest
+from unittest.mock import Mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from stopsearch_etl.availability import AvailabilityCatalogue
+from stopsearch_etl.backfill_service import BackfillService
+from stopsearch_etl.etl_service import EtlService
+from stopsearch_etl.ledger import IngestionLedger, payload_hash
+from stopsearch_etl.sqlite_repository import SqliteStopSearchRepository, Base
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _stops(month):
+    return [{"type": "Person search", "datetime": f"{month}-01T10:00:00+00:00", "legislation": "Police Act"}]
+
+
+def _build_incremental_backfill(session, availability):
+    mock_api_client = Mock()
+    mock_api_client.get_availability.side_effect = lambda: availability
+    mock_api_client.fetch_stops.side_effect = lambda force, month: _stops(month)
+
+    ledger = IngestionLedger(session)
+    catalogue = AvailabilityCatalogue(mock_api_client)
+    etl_service = EtlService(mock_api_client, SqliteStopSearchRepository(session), ledger=ledger)
+    backfill_service = BackfillService(mock_api_client, etl_service, catalogue, ledger, incremental=True)
+    return backfill_service, catalogue, mock_api_client
+
+
+def test_ledger_records_and_reads_back_loads(session):
+    # Arrange
+    ledger = IngestionLedger(session)
+
+    # Act
+    ledger.record_load("metropolitan", "2023-01", 150, "abc")
+    ledger.record_load("metropolitan", "2023-01", 160, "def")  # reload overwrites
+    ledger.record_load("kent", "2023-01", 20, "xyz")
+
+    # Assert
+    entries = ledger.entries_for("metropolitan")
+    assert list(entries) == ["2023-01"]
+    assert entries["2023-01"].record_count == 160
+    assert entries["2023-01"].payload_hash == "def"
+    assert entries["2023-01"].loaded_at is not None
+
+
+def test_ledger_months_to_fetch_returns_missing_and_changed(session):
+    # Arrange
+    ledger = IngestionLedger(session)
+    ledger.record_load("metropolitan", "2023-01", 1, "a")
+    ledger.record_load("metropolitan", "2023-02", 1, "b")
+    ledger.record_availability("metropolitan", "2023-01", "old")
+    ledger.record_availability("metropolitan", "2023-02", "same")
+
+    # Act
+    months = ledger.months_to_fetch(
+        "metropolitan", ["2023-03", "2023-02", "2023-01"],
+        {"2023-03": "new", "2023-02": "same", "2023-01": "changed"},
+    )
+
+    # Assert
+    assert months == ["2023-03", "2023-01"]
+
+
+def test_payload_hash_is_stable_across_key_order():
+    # Arrange & Act & Assert
+    assert payload_hash([{"a": 1, "b": 2}]) == payload_hash([{"b": 2, "a": 1}])
+    assert payload_hash([{"a": 1}]) != payload_hash([{"a": 2}])
+
+
+def test_etl_service_writes_ledger_entry(session):
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.fetch_stops.return_value = _stops("2023-01")
+    ledger = IngestionLedger(session)
+    etl_service = EtlService(mock_api_client, SqliteStopSearchRepository(session), ledger=ledger)
+
+    # Act
+    etl_service.extract_transform_load("metropolitan", "2023-01")
+
+    # Assert
+    entry = ledger.entries_for("metropolitan")["2023-01"]
+    assert entry.record_count == 1
+    assert entry.payload_hash == payload_hash(_stops("2023-01"))
+
+
+def test_incremental_backfill_only_fetches_new_months(session): # second run: 1 call, not 3
+    # Arrange
+    availability = [
+        {"date": "2023-02", "stop-and-search": ["metropolitan"]},
+        {"date": "2023-01", "stop-and-search": ["metropolitan"]},
+    ]
+    backfill_service, catalogue, mock_api_client = _build_incremental_backfill(session, availability)
+    first = backfill_service.backfill_force("metropolitan")
+
+    availability.insert(0, {"date": "2023-03", "stop-and-search": ["metropolitan"]})
+    catalogue.invalidate()
+    mock_api_client.fetch_stops.reset_mock()
+
+    # Act
+    second = backfill_service.backfill_force("metropolitan")
+
+    # Assert
+    assert first.months_processed == 2
+    assert second.months_processed == 1
+    mock_api_client.fetch_stops.assert_called_once_with("metropolitan", "2023-03")
+
+
+def test_incremental_backfill_refetches_month_when_availability_changes(session):
+    # Arrange
+    availability = [{"date": "2023-01", "stop-and-search": ["metropolitan"]}]
+    backfill_service, catalogue, mock_api_client = _build_incremental_backfill(session, availability)
+    backfill_service.backfill_force("metropolitan")
+
+    availability[0] = {"date": "2023-01", "stop-and-search": ["metropolitan", "kent"]}  # republished
+    catalogue.invalidate()
+    mock_api_client.fetch_stops.reset_mock()
+
+    # Act
+    result = backfill_service.backfill_force("metropolitan")
+
+    # Assert
+    assert result.months_processed == 1
+    mock_api_client.fetch_stops.assert_called_once_with("metropolitan", "2023-01")
+
+
+def test_full_mode_overrides_incremental_default(session):
+    # Arrange
+    availability = [{"date": "2023-01", "stop-and-search": ["metropolitan"]}]
+    backfill_service, _, mock_api_client = _build_incremental_backfill(session, availability)
+    backfill_service.backfill_force("metropolitan")
+
+    # Act
+    result = backfill_service.backfill_force("metropolitan", incremental=False)
+
+    # Assert
+    assert result.months_processed == 1
+    assert mock_api_client.fetch_stops.call_count == 2
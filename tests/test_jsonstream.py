@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from stopsearch_etl.jsonstream import iter_json_array
+
+
+DOCUMENT = json.dumps([
+    {"type": "Person search", "location": {"latitude": "51.5", "street": {"id": 883407, "name": "Café Road"}}},
+    {"type": "Vehicle search", "outcome": None, "removal_of_more_than_outer_clothing": False},
+    12345,
+    "a string with ] and , inside",
+    [1, [2, 3]],
+    -0.125,
+], indent=2).encode("utf-8")
+
+
+def _split_every(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 100_000])
+def test_iter_json_array_matches_json_loads_for_any_chunking(chunk_size):
+    # Act: 1-byte chunks also split the multi-byte "é" and the number 12345
+    items = list(iter_json_array(_split_every(DOCUMENT, chunk_size)))
+
+    # Assert
+    assert items == json.loads(DOCUMENT)
+
+
+def test_iter_json_array_yields_before_the_body_is_complete():
+    # Arrange
+    def chunks():
+        yield b'[{"n": 1}, '
+        raise AssertionError("read past the first element")
+
+    # Act
+    first = next(iter_json_array(chunks()))
+
+    # Assert
+    assert first == {"n": 1}
+
+
+@pytest.mark.parametrize("body", [b"[]", b"  [ ] \n", b"[\n]"])
+def test_iter_json_array_handles_empty_arrays(body):
+    assert list(iter_json_array([body])) == []
+
+
+@pytest.mark.parametrize("body", [
+    b'{"not": "an array"}',
+    b'[{"n": 1}, {"n": 2}',  # cut off
+    b'[{"n": 1} {"n": 2}]',  # missing comma
+    b'[1, 2] trailing',
+    b'',
+])
+def test_iter_json_array_rejects_malformed_input(body):
+    with pytest.raises(ValueError):
+        list(iter_json_array(_split_every(body, 3)))
@@ -0,0 +1,148 @@
+import io
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from unittest.mock import Mock
+
+import pytest
+
+from stopsearch_etl.backfill_service import BackfillService
+from stopsearch_etl.etl_service import EtlService
+from stopsearch_etl.logging_setup import RECORDS_LOGGER, JsonFormatter, SamplingFilter, configure_logging
+
+
+@pytest.fixture
+def configured():
+    """configure_logging into a StringIO, putting the root logger back afterwards"""
+    root = logging.getLogger()
+    saved_handlers, saved_level = list(root.handlers), root.level
+    records_logger = logging.getLogger(RECORDS_LOGGER)
+    saved_filters = list(records_logger.filters)
+    listeners = []
+
+    def configure(**kwargs):
+        stream = io.StringIO()
+        listeners.append(configure_logging(stream=stream, **kwargs))
+        return stream, listeners[-1]
+
+    yield configure
+    for listener in listeners:
+        listener.stop()  # no-op for ones already stopped
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in saved_handlers:
+        root.addHandler(handler)
+    root.setLevel(saved_level)
+    records_logger.filters[:] = saved_filters
+
+
+def test_json_formatter_keeps_extra_fields_and_exceptions():
+    # Arrange
+    logger = logging.getLogger("stopsearch_etl.test")
+    try:
+        raise ValueError("bad payload")
+    except ValueError as e:
+        record = logger.makeRecord(logger.name, logging.ERROR, __file__, 1, "Failed %s", ("metropolitan",),
+                                   (type(e), e, e.__traceback__),
+                                   extra={"force": "metropolitan", "month": "2023-01", "records_saved": 3})
+
+    # Act
+    entry = json.loads(JsonFormatter().format(record))
+
+    # Assert
+    assert entry["message"] == "Failed metropolitan"
+    assert entry["level"] == "ERROR"
+    assert (entry["force"], entry["month"], entry["records_saved"]) == ("metropolitan", "2023-01", 3)
+    assert "ValueError: bad payload" in entry["exception"]
+    assert "args" not in entry and "msg" not in entry
+
+
+def test_json_formatter_keeps_its_own_fields_when_extras_reuse_their_names():
+    # Arrange
+    logger = logging.getLogger("stopsearch_etl.test")
+    record = logger.makeRecord(logger.name, logging.INFO, __file__, 1, "Batch completed", (), None,
+                               extra={"timestamp": "2000-01-01T00:00:00", "level": "fake"})
+
+    # Act
+    entry = json.loads(JsonFormatter().format(record))
+
+    # Assert
+    assert entry["timestamp"] == datetime.fromtimestamp(record.created, timezone.utc).isoformat()
+    assert entry["level"] == "INFO"
+    assert (entry["extra_timestamp"], entry["extra_level"]) == ("2000-01-01T00:00:00", "fake")
+
+
+def test_queued_json_logging_from_many_threads_loses_nothing(configured):
+    # Arrange
+    stream, listener = configured(log_format="json")
+    logger = logging.getLogger("stopsearch_etl.test")
+
+    def worker(index):
+        for month in range(1, 13):
+            logger.info("Processed %s %s", f"force-{index}", month, extra={"force": f"force-{index}"})
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+
+    # Act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    listener.stop()  # drains the queue
+
+    # Assert
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(entries) == 16 * 12
+    assert {entry["force"] for entry in entries} == {f"force-{i}" for i in range(16)}
+    assert all(entry["logger"] == "stopsearch_etl.test" for entry in entries)
+
+
+def test_parse_warnings_are_sampled_and_count_what_they_dropped(configured):
+    # Arrange
+    stream, listener = configured(log_format="json", sample_every=100)
+    etl_service = EtlService(Mock(), Mock())
+    bad_records = [{"type": "Person search", "datetime": "not a date"}] * 1000
+
+    # Act
+    etl_service.transform(bad_records, "metropolitan")
+    listener.stop()
+
+    # Assert
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(entries) == 10 + 9  # the first 10, then 1 in 100 of the other 990
+    assert all(entry["message"].startswith("Failed to parse record") for entry in entries)
+    assert sum(entry.get("suppressed", 0) for entry in entries) == 9 * 99
+
+
+def test_sampling_filter_keeps_different_messages_apart():
+    # Arrange
+    sampler = SamplingFilter(every=2, burst=1)
+    logger = logging.getLogger("stopsearch_etl.test")
+
+    def record(msg):
+        return logger.makeRecord(logger.name, logging.WARNING, __file__, 1, msg, (), None)
+
+    # Act
+    kept = [sampler.filter(record(msg)) for msg in ["a", "a", "b", "a", "b", "b"]]
+
+    # Assert
+    assert kept == [True, False, True, True, False, True]
+
+
+def test_backfill_progress_goes_through_logging_with_fields(caplog):
+    # Arrange
+    api_client = Mock()
+    api_client.get_available_months.return_value = ["2023-01", "2023-02"]
+    etl_service = Mock()
+    etl_service.extract_transform_load.side_effect = [5, RuntimeError("db locked")]
+    service = BackfillService(api_client, etl_service)
+
+    # Act
+    with caplog.at_level(logging.INFO, logger="stopsearch_etl.backfill_service"):
+        service.backfill_force("metropolitan")
+
+    # Assert
+    processed, failed = caplog.records
+    assert (processed.force, processed.month, processed.records_saved) == ("metropolitan", "2023-01", 5)
+    assert failed.levelname == "ERROR" and failed.error == "db locked"
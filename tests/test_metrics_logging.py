@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 from unittest.mock import Mock, patch
 from dataclasses import asdict
@@ -54,6 +56,67 @@ def test_metrics_collector_can_reset():
     assert metrics.total_batches_processed == 0
 
 
+def test_metrics_collector_counts_exactly_under_many_threads():
+    # Arrange
+    collector = MetricsCollector()
+    start = threading.Barrier(32)
+
+    def worker(index):
+        start.wait()  # all threads hammer it at once
+        for i in range(500):
+            collector.record_successful_batch("metropolitan", f"2023-{index}", 3, 1)
+        collector.record_failed_batch("kent", f"2023-{index}", "boom")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(32)]
+
+    # Act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    metrics = collector.get_current_metrics()
+    assert metrics.total_batches_processed == 32 * 500
+    assert metrics.total_records_ingested == 32 * 500 * 3
+    assert metrics.total_records_deduplicated == 32 * 500
+    assert metrics.total_batches_failed == 32
+    assert len(metrics.failed_batches) == 32
+
+
+def test_metrics_collector_keeps_only_recent_failures_and_returns_snapshots():
+    # Arrange
+    collector = MetricsCollector(max_failures=3)
+    for month in range(1, 6):
+        collector.record_failed_batch("kent", f"2023-0{month}", "API timeout")
+
+    # Act
+    snapshot = collector.get_current_metrics()
+    collector.record_successful_batch("kent", "2023-06", 10, 0)
+    collector.record_failed_batch("kent", "2023-07", "API timeout")
+
+    # Assert
+    assert snapshot.total_batches_failed == 5
+    assert [failure["month"] for failure in snapshot.failed_batches] == ["2023-03", "2023-04", "2023-05"]
+    assert snapshot.total_batches_processed == 0  # not touched by later recording
+    assert collector.get_current_metrics().failed_batches[-1]["month"] == "2023-07"
+
+
+def test_metrics_property_is_a_snapshot_too():
+    # Arrange
+    collector = MetricsCollector()
+    collector.record_successful_batch("kent", "2023-01", 10, 2)
+
+    # Act
+    metrics = collector.metrics
+    metrics.total_records_ingested = 0  # callers can't corrupt the live counters
+    collector.record_successful_batch("kent", "2023-02", 5, 0)
+
+    # Assert
+    assert metrics.total_batches_processed == 1
+    assert collector.metrics.total_records_ingested == 15
+
+
 @patch('stopsearch_etl.metrics.logger')
 def test_metrics_collector_logs_structured_data(mock_logger):
     # Arrange
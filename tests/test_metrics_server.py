@@ -0,0 +1,97 @@
+import urllib.error
+import urllib.request
+from unittest.mock import Mock
+
+import pytest
+
+from stopsearch_etl.adaptive import AimdController
+from stopsearch_etl.metrics import MetricsCollector
+from stopsearch_etl.metrics_server import MetricsExporter, MetricsServer
+from stopsearch_etl.ratelimit import TokenBucket
+from stopsearch_etl.scheduler import EtlScheduler
+
+
+@pytest.fixture
+def server():
+    servers = []
+
+    def start(exporter):
+        servers.append(MetricsServer(exporter, port=0, host="127.0.0.1").start())
+        return servers[-1]
+
+    yield start
+    for metrics_server in servers:
+        metrics_server.stop()
+
+
+def scrape(metrics_server, path="/metrics"):
+    with urllib.request.urlopen(f"http://127.0.0.1:{metrics_server.port}{path}", timeout=5) as response:
+        return response.headers["Content-Type"], response.read().decode()
+
+
+def test_metrics_endpoint_serves_counters_histograms_and_limiter_stats(server, tmp_path):
+    # Arrange
+    collector = MetricsCollector()
+    collector.record_successful_batch("metropolitan", "2023-01", 150, 5)
+    collector.record_failed_batch("kent", "2023-01", "API timeout")
+    collector.record_stage_timings("metropolitan", {"fetch": 0.25, "commit": 0.01})
+    rate_limiter = TokenBucket(rate=100, burst=1)
+    rate_limiter.acquire()
+    rate_limiter.acquire()  # second one waits for a token
+    database = tmp_path / "stopsearch.db"
+    database.write_bytes(b"x" * 4096)
+    exporter = MetricsExporter(collector, rate_limiter=rate_limiter, concurrency=AimdController(initial_limit=3),
+                               database_path=str(database))
+
+    # Act
+    content_type, body = scrape(server(exporter))
+
+    # Assert
+    assert content_type.startswith("text/plain; version=0.0.4")
+    lines = body.splitlines()
+    assert "stopsearch_records_ingested_total 150" in lines
+    assert "stopsearch_batches_failed_total 1" in lines
+    assert "# TYPE stopsearch_stage_duration_seconds summary" in lines
+    assert 'stopsearch_stage_duration_seconds_count{force="metropolitan",stage="fetch"} 1' in lines
+    assert any(line.startswith('stopsearch_stage_duration_seconds{force="metropolitan",stage="fetch",'
+                               'quantile="0.99"} 0.2') for line in lines)
+    assert "stopsearch_rate_limit_requests_total 2" in lines
+    assert "stopsearch_rate_limit_delayed_total 1" in lines
+    wait_line, = [line for line in lines if line.startswith("stopsearch_rate_limit_wait_seconds_total ")]
+    assert float(wait_line.split()[1]) > 0
+    assert "stopsearch_concurrency_limit 3" in lines
+    assert "stopsearch_database_size_bytes 4096" in lines
+
+
+def test_metrics_endpoint_reports_last_run_times_and_404s_elsewhere(server):
+    # Arrange
+    runner = Mock()
+    runner.run_backfill.return_value = Mock(total_records=0, forces_completed=1)
+    scheduler = EtlScheduler(runner, ["metropolitan"])
+    metrics_server = server(MetricsExporter(scheduler=scheduler))
+    _, before = scrape(metrics_server)
+
+    # Act
+    scheduler.run_once()
+    _, after = scrape(metrics_server)
+
+    # Assert
+    assert "last_run" not in before
+    assert f"stopsearch_last_success_timestamp_seconds {scheduler.last_success_at!r}" in after.splitlines()
+    assert "stopsearch_last_run_start_timestamp_seconds" in after
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        scrape(metrics_server, "/nope")
+    assert exc_info.value.code == 404
+
+
+def test_scheduler_only_serves_metrics_when_a_port_is_set():
+    # Arrange
+    metrics_server = Mock(port=0)
+    scheduler = EtlScheduler(Mock(), ["metropolitan"], metrics_server=metrics_server)
+
+    # Act
+    scheduler.start()
+    scheduler.stop()
+
+    # Assert
+    metrics_server.start.assert_not_called()
@@ -0,0 +1,247 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, text
+
+from stopsearch_etl.migrations import MaintenanceRequired, Migration, applied_versions, run_migrations
+from stopsearch_etl.sqlite_repository import Base
+import stopsearch_etl.ledger  # noqa: F401  (registers ingestion_ledger on Base for create_all)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'etl.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _query_plan(engine, sql, **params):
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+    return " ".join(row[-1] for row in rows)
+
+
+def test_run_migrations_applies_each_version_once(engine):
+    # Act
+    first = run_migrations(engine)
+    second = run_migrations(engine)
+
+    # Assert
+    assert first == [1, 2, 3, 4, 5]  # nothing to rebuild on a new database, so 5 isn't held back
+    assert second == []
+    assert applied_versions(engine) == {1, 2, 3, 4, 5}
+
+
+def test_secondary_indexes_are_used_by_read_queries(engine):
+    # Arrange
+    run_migrations(engine)
+
+    # Act & Assert
+    assert "USING INDEX" in _query_plan(
+        engine, "SELECT * FROM stop_search_records WHERE datetime >= :start AND datetime < :end",
+        start="2023-01-01 00:00:00.000000", end="2023-02-01 00:00:00.000000",
+    )
+    assert "ix_stop_search_outcome_id" in _query_plan(
+        engine, "SELECT * FROM stop_search_records WHERE outcome_id = :outcome", outcome=3
+    )
+    assert "ix_stop_search_type_id" in _query_plan(
+        engine, "SELECT * FROM stop_search_records WHERE type_id = :type", type=1
+    )
+    assert "ix_stop_search_lat_lon" in _query_plan(
+        engine, "SELECT * FROM stop_search_records WHERE latitude BETWEEN 51.4 AND 51.6 "
+                "AND longitude BETWEEN -0.2 AND 0.0",
+    )
+
+
+def test_superseded_migration_is_recorded_without_running(engine):
+    # Arrange: a new database is created encoded, so migration 1's text columns don't exist
+    ran = []
+    migrations = [
+        Migration(1, "index a column the new schema dropped", ran.append, superseded=lambda connection: True),
+        Migration(2, "still needed", ran.append),
+    ]
+
+    # Act
+    applied = run_migrations(engine, migrations)
+
+    # Assert
+    assert applied == [1, 2]
+    assert applied_versions(engine) == {1, 2}
+    assert len(ran) == 1
+
+
+def test_failed_migration_is_not_recorded(engine):
+    # Arrange
+    def broken(connection):
+        connection.exec_driver_sql("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    # Act
+    with pytest.raises(RuntimeError):
+        run_migrations(engine, [Migration(1, "broken", broken)])
+
+    # Assert: rolled back, so the next run tries again
+    assert applied_versions(engine) == set()
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql(
+            "SELECT count(*) FROM sqlite_master WHERE name = 'half_done'"
+        ).scalar() == 0
+
+
+OLD_SCHEMA = """
+CREATE TABLE stop_search_records (
+    id INTEGER NOT NULL, type VARCHAR(100), datetime DATETIME, gender VARCHAR(20),
+    age_range VARCHAR(20), self_defined_ethnicity VARCHAR(200), officer_defined_ethnicity VARCHAR(200),
+    legislation TEXT, object_of_search VARCHAR(100), outcome TEXT,
+    outcome_linked_to_object_of_search BOOLEAN, removal_of_more_than_outer_clothing BOOLEAN,
+    latitude FLOAT, longitude FLOAT, street_id INTEGER, street_name VARCHAR(500),
+    PRIMARY KEY (id),
+    CONSTRAINT unique_stop_search UNIQUE (datetime, latitude, longitude, type, legislation)
+)
+"""
+
+
+def test_force_column_is_added_and_backfilled_from_the_ledger(tmp_path, monkeypatch):
+    # Arrange: a database from before force was stored
+    import stopsearch_etl.migrations as migrations
+    monkeypatch.setattr(migrations, "FORCE_BACKFILL_CHUNK", 3)  # several chunks per month
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(OLD_SCHEMA)
+        for i in range(7):
+            connection.exec_driver_sql(
+                "INSERT INTO stop_search_records (type, datetime, legislation) VALUES (?, ?, ?)",
+                ("Person search", f"2023-01-{i + 1:02d} 10:00:00.000000", ""),
+            )
+        connection.exec_driver_sql(
+            "INSERT INTO stop_search_records (type, datetime, legislation) VALUES (?, ?, ?)",
+            ("Person search", "2023-02-01 10:00:00.000000", ""),
+        )
+    Base.metadata.create_all(engine)  # what cli does: adds the ledger etc., leaves the old table alone
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO ingestion_ledger (force, month, record_count) VALUES "
+            "('metropolitan', '2023-01', 7), ('metropolitan', '2023-02', 1), ('kent', '2023-02', 1)"
+        )
+
+    # Act
+    run_migrations(engine, maintenance=True)
+
+    # Assert
+    with engine.connect() as connection:
+        forces = connection.exec_driver_sql(
+            "SELECT substr(datetime, 1, 7), force, count(*) FROM stop_search_records GROUP BY 1, 2"
+        ).all()
+    assert sorted(forces) == [("2023-01", "metropolitan", 7), ("2023-02", "", 1)]  # feb is ambiguous
+    assert "ix_stop_search_force_datetime" in _query_plan(
+        engine, "SELECT * FROM stop_search_records WHERE force = :force AND datetime >= :start AND datetime < :end",
+        force="metropolitan", start="2023-01-01 00:00:00.000000", end="2023-02-01 00:00:00.000000",
+    )
+    engine.dispose()
+
+
+def test_text_columns_are_dictionary_encoded_by_a_table_rebuild(tmp_path):
+    # Arrange: a pre-encoding database with text columns and a couple of rows
+    from sqlalchemy.orm import sessionmaker
+    from stopsearch_etl.domain import StopSearchRecord
+    from stopsearch_etl.read_service import ReadService
+    from stopsearch_etl.sqlite_repository import SqliteStopSearchRepository
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(OLD_SCHEMA)
+        for i, (search_type, outcome) in enumerate([("Person search", "Arrest"), ("Vehicle search", None),
+                                                    ("Person search", "Arrest")]):
+            connection.exec_driver_sql(
+                "INSERT INTO stop_search_records (type, datetime, legislation, outcome, latitude, longitude) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (search_type, f"2023-01-{i + 1:02d} 10:00:00.000000", "Police Act", outcome, 51.5, -0.12),
+            )
+    Base.metadata.create_all(engine)
+
+    # Act: the rebuild waits for an explicit maintenance run
+    with pytest.raises(MaintenanceRequired):
+        run_migrations(engine)
+    assert applied_versions(engine) == {1, 2, 3, 4}
+    run_migrations(engine, maintenance=True)
+
+    # Assert: text moved into category_values, stored once per value
+    with engine.connect() as connection:
+        columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(stop_search_records)")}
+        categories = connection.exec_driver_sql(
+            "SELECT category, value FROM category_values ORDER BY category, value"
+        ).all()
+        decoded = connection.exec_driver_sql(
+            "SELECT type, outcome, legislation FROM stop_search_records_decoded ORDER BY id"
+        ).all()
+    assert {"type", "outcome", "type_id", "outcome_id"} & columns == {"type_id", "outcome_id"}
+    assert categories == [("legislation", "Police Act"), ("outcome", "Arrest"),
+                          ("type", "Person search"), ("type", "Vehicle search")]
+    assert decoded == [("Person search", "Arrest", "Police Act"), ("Vehicle search", None, "Police Act"),
+                       ("Person search", "Arrest", "Police Act")]
+
+    # ...and the app sees the same records, with R*Tree triggers and the unique constraint back in place
+    session = sessionmaker(bind=engine)()
+    repository = SqliteStopSearchRepository(session)
+    read_service = ReadService(repository)
+    assert [r.type for r in read_service.get_records_by_outcome("Arrest")] == ["Person search"] * 2
+    assert read_service.get_summary_stats()["search_types"] == {"Person search": 2, "Vehicle search": 1}
+
+    again = StopSearchRecord(
+        type="Vehicle search", datetime=datetime(2023, 1, 2, 10, 0), gender=None, age_range=None,
+        self_defined_ethnicity=None, officer_defined_ethnicity=None, legislation="Police Act",
+        object_of_search=None, outcome=None, outcome_linked_to_object_of_search=None,
+        removal_of_more_than_outer_clothing=None, latitude=51.5, longitude=-0.12, street_id=None, street_name=None,
+    )
+    assert repository.save_batch([again]) == 0
+    # force was never stored for these rows, so reloading the month with its force mustn't duplicate them
+    assert repository.save_batch([StopSearchRecord(**{**_fields(again), "force": "metropolitan"})]) == 0
+    assert read_service.get_summary_stats()["total_records"] == 3
+    assert repository.save_batch([StopSearchRecord(**{**_fields(again), "latitude": 53.48, "longitude": -2.24})]) == 1
+    assert len(read_service.get_records_near_location(53.48, -2.24, radius_km=1.0)) == 1
+    with engine.connect() as connection:
+        indexes = {row[0] for row in connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'stop_search_records'"
+        )}
+    assert {"ix_stop_search_outcome_id", "ix_stop_search_type_id", "ix_stop_search_lat_lon",
+            "ix_stop_search_force_datetime"} <= indexes
+    session.close()
+    engine.dispose()
+
+
+def test_rebuild_keys_on_force_once_every_row_has_one(tmp_path):
+    # Arrange: a pre-encoding database whose only month the ledger can attribute
+    from sqlalchemy.orm import sessionmaker
+    from stopsearch_etl.domain import StopSearchRecord
+    from stopsearch_etl.sqlite_repository import SqliteStopSearchRepository
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(OLD_SCHEMA)
+        connection.exec_driver_sql(
+            "INSERT INTO stop_search_records (type, datetime, legislation, latitude, longitude) "
+            "VALUES ('Person search', '2023-01-01 10:00:00.000000', 'Police Act', 51.5, -0.12)"
+        )
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO ingestion_ledger (force, month, record_count) VALUES ('metropolitan', '2023-01', 1)"
+        )
+
+    # Act
+    run_migrations(engine, maintenance=True)
+
+    # Assert: the same search reported by another force is its own row
+    repository = SqliteStopSearchRepository(sessionmaker(bind=engine)())
+    record = StopSearchRecord(
+        type="Person search", datetime=datetime(2023, 1, 1, 10, 0), gender=None, age_range=None,
+        self_defined_ethnicity=None, officer_defined_ethnicity=None, legislation="Police Act",
+        object_of_search=None, outcome=None, outcome_linked_to_object_of_search=None,
+        removal_of_more_than_outer_clothing=None, latitude=51.5, longitude=-0.12, street_id=None, street_name=None,
+    )
+    assert repository.save_batch([StopSearchRecord(**{**_fields(record), "force": "metropolitan"})]) == 0
+    assert repository.save_batch([StopSearchRecord(**{**_fields(record), "force": "city-of-london"})]) == 1
+    engine.dispose()
+
+
+def _fields(record):
+    from stopsearch_etl.domain import RECORD_FIELDS
+    return dict(zip(RECORD_FIELDS, record.as_tuple()))
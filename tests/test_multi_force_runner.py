@@ -1,8 +1,19 @@
+import threading
+import time
+
 import pytest
 from unittest.mock import Mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
 
-from stopsearch_etl.multi_force_runner import MultiForceRunner
-from stopsearch_etl.backfill_service import BackfillResult
+from stopsearch_etl.adaptive import AimdController
+from stopsearch_etl.api import ApiError
+from stopsearch_etl.multi_force_runner import ConcurrentMultiForceRunner, MultiForceRunner
+from stopsearch_etl.backfill_service import BackfillResult, BackfillService
+from stopsearch_etl.etl_service import EtlService, ExtractedMonth
+from stopsearch_etl.metrics import MetricsCollector
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository
+from stopsearch_etl.work_queue import BackfillWorkQueue
 
 
 def test_multi_force_runner_processes_all_forces(): # happy path: both forces succeed, results roll up as expected
@@ -107,4 +118,152 @@ def test_multi_force_runner_handles_empty_force_list():  # empty input → quick
     assert summary.total_records == 0
     assert summary.forces_completed == 0
     assert summary.forces_failed == 0
-    mock_backfill_service.backfill_force.assert_not_called() # no work should be dispatched
\ No newline at end of file
+    mock_backfill_service.backfill_force.assert_not_called() # no work should be dispatched
+
+
+MONTHS = {"metropolitan": ["2023-01", "2023-02", "2023-03", "2023-04"], "kent": ["2023-01", "2023-02"],
+          "essex": ["2023-01"]}
+
+
+def fake_api(delay=0.0, failing=(), status=500):
+    """Mock API with MONTHS; tracks how many fetches run at once (overall and per force)"""
+    api_client = Mock()
+    api_client.get_available_months.side_effect = lambda force: list(MONTHS[force])
+    lock = threading.Lock()
+    active = {"total": 0}
+    api_client.peak = {"total": 0}
+
+    def fetch_stops(force, month):
+        with lock:
+            active["total"] += 1
+            active[force] = active.get(force, 0) + 1
+            for key in ("total", force):
+                api_client.peak[key] = max(api_client.peak.get(key, 0), active[key])
+        try:
+            time.sleep(delay)
+            if (force, month) in failing:
+                raise ApiError(f"HTTP error {status}", status_code=status)
+            return [{"type": "Person search", "datetime": f"{month}-15T10:{i:02d}:00+00:00",
+                     "legislation": force} for i in range(3)]
+        finally:
+            with lock:
+                active["total"] -= 1
+                active[force] -= 1
+
+    api_client.fetch_stops.side_effect = fetch_stops
+    return api_client
+
+
+def backfill_service(api_client):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    etl_service = EtlService(api_client, SqliteStopSearchRepository(session))
+    return BackfillService(api_client, etl_service, work_queue=BackfillWorkQueue(session))
+
+
+def test_concurrent_runner_gives_the_same_summary_as_the_sequential_one():
+    # Arrange
+    failing = {("metropolitan", "2023-03")}
+    forces = ["metropolitan", "kent", "essex"]
+
+    # Act
+    sequential = MultiForceRunner(backfill_service(fake_api(failing=failing))).run_backfill(forces)
+    concurrent = ConcurrentMultiForceRunner(
+        backfill_service(fake_api(failing=failing)), max_in_flight=4, per_force_limit=2
+    ).run_backfill(forces)
+
+    # Assert
+    assert concurrent == sequential
+    assert (concurrent.total_records, concurrent.total_months_failed) == (18, 1)
+
+
+def test_concurrent_runner_respects_global_and_per_force_caps():
+    # Arrange
+    api_client = fake_api(delay=0.05)
+    service = backfill_service(api_client)
+    runner = ConcurrentMultiForceRunner(service, max_in_flight=3, per_force_limit=2)
+
+    # Act
+    start = time.monotonic()
+    summary = runner.run_backfill(["metropolitan", "kent", "essex"])
+    elapsed = time.monotonic() - start
+
+    # Assert
+    assert summary.total_months_processed == 7
+    assert api_client.peak["total"] == 3
+    assert max(api_client.peak[force] for force in MONTHS) <= 2
+    assert elapsed < 7 * 0.05  # overlapped, not one month after another
+    assert service.work_queue.unfinished_months("metropolitan") == []
+
+
+def test_concurrent_runner_counts_forces_that_cannot_be_planned():
+    # Arrange
+    api_client = fake_api()
+    service = backfill_service(api_client)
+
+    def plan_months(force):
+        if force == "essex":
+            raise ApiError("availability down")
+        if force == "metropolitan":
+            raise RuntimeError("bug")
+        return list(MONTHS[force])
+
+    service.plan_months = Mock(side_effect=plan_months)
+
+    # Act
+    summary = ConcurrentMultiForceRunner(service).run_backfill(["metropolitan", "kent", "essex"])
+
+    # Assert
+    assert summary.failed_forces == ["metropolitan"]
+    assert (summary.forces_completed, summary.forces_failed) == (2, 1)  # essex: no months, like backfill_force
+    assert summary.total_months_processed == 2
+
+
+def test_concurrent_runner_counts_a_month_that_sinks_a_shared_transaction_once():
+    # Arrange: the writer's transaction fails whenever kent 2023-02 (2 records) is in it
+    repository = Mock()
+
+    def save_batches(batches):
+        if any(len(batch) == 2 for batch in batches):
+            raise Exception("disk I/O error")
+        return [len(batch) for batch in batches]
+
+    repository.save_batches.side_effect = save_batches
+    metrics = MetricsCollector()
+    etl_service = EtlService(Mock(), repository, metrics)
+    runner = ConcurrentMultiForceRunner(BackfillService(Mock(), etl_service))
+    extracted = [
+        ExtractedMonth(force, month, etl_service.transform_batch(
+            [{"type": "Person search", "datetime": f"{month}-15T10:{i:02d}:00+00:00"} for i in range(count)],
+            force), count)
+        for force, month, count in [("metropolitan", "2023-01", 3), ("kent", "2023-02", 2), ("kent", "2023-03", 3)]
+    ]
+    results = {force: BackfillResult(force=force, total_records=0, months_processed=0, months_failed=0)
+               for force in ("metropolitan", "kent")}
+
+    # Act
+    runner._load(extracted, results)
+
+    # Assert
+    assert (results["kent"].months_processed, results["kent"].months_failed) == (1, 1)
+    assert metrics.get_current_metrics().total_batches_failed == 1
+    assert metrics.get_current_metrics().total_batches_processed == 2
+
+
+def test_concurrent_runner_stays_under_the_adaptive_limit():
+    # Arrange: metropolitan's first two months come back 429, each of which halves the limit
+    failing = {("metropolitan", "2023-01"), ("metropolitan", "2023-02")}
+    api_client = fake_api(delay=0.02, failing=failing, status=429)
+    controller = AimdController(initial_limit=2, max_limit=4)
+    runner = ConcurrentMultiForceRunner(backfill_service(api_client), max_in_flight=4, per_force_limit=4,
+                                        concurrency=controller)
+
+    # Act
+    summary = runner.run_backfill(["metropolitan", "kent", "essex"])
+
+    # Assert
+    assert (summary.total_months_processed, summary.total_months_failed) == (5, 2)
+    assert api_client.peak["total"] <= 2
+    assert controller.stats.decreases == 2  # the two 429s were sent in different windows
+    assert controller.in_flight == 0
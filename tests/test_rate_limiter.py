@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from stopsearch_etl.api import ApiError
+from stopsearch_etl.async_http_client import AsyncPoliceApiClient
+from stopsearch_etl.http_client import HttpPoliceApiClient
+from stopsearch_etl.ratelimit import TokenBucket
+
+
+def test_bucket_allows_a_burst_then_paces_requests(fake_clock):
+    # Arrange
+    clock = fake_clock
+    bucket = TokenBucket(rate=10, burst=3, clock=clock)
+
+    # Act
+    waits = [bucket._reserve() for _ in range(5)]
+    clock.now += 1.0  # a quiet second refills the bucket (capped at the burst)
+    refilled = [bucket._reserve() for _ in range(3)]
+
+    # Assert
+    assert waits == pytest.approx([0, 0, 0, 0.1, 0.2])
+    assert refilled == [0, 0, 0]
+    assert (bucket.stats.requests, bucket.stats.delayed) == (8, 2)
+    assert bucket.stats.wait_seconds == pytest.approx(0.3)
+
+
+def test_retry_after_pauses_everyone_and_rate_recovers(fake_clock):
+    # Arrange
+    clock = fake_clock
+    bucket = TokenBucket(rate=10, burst=10, recovery_seconds=10, clock=clock)
+
+    # Act
+    bucket.throttled(retry_after=5)
+    paused_wait = bucket._reserve()
+    slowed_rate = bucket.rate
+    clock.now += 30  # pause over, then well past the recovery window
+    bucket._reserve()
+
+    # Assert
+    assert paused_wait == pytest.approx(5.2)  # the pause, then one token at the halved rate
+    assert slowed_rate == 5
+    assert bucket.rate == 10
+    assert bucket.stats.throttled == 1
+
+
+def test_requests_queued_during_a_pause_are_paced_after_it(fake_clock):
+    # Arrange
+    clock = fake_clock
+    bucket = TokenBucket(rate=10, burst=10, clock=clock)
+    bucket.throttled(retry_after=5)  # also halves the rate to 5/s
+
+    # Act
+    waits = [bucket._reserve() for _ in range(3)]
+    clock.now += 1  # still paused: nobody gets ahead of the queue
+    late = bucket._reserve()
+
+    # Assert: 1/rate apart once the pause ends, not all released together
+    assert waits == pytest.approx([5.2, 5.4, 5.6])
+    assert late == pytest.approx(4.8)
+
+
+def test_threads_share_one_budget():
+    # Arrange
+    bucket = TokenBucket(rate=200, burst=5)
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(5)]) for _ in range(8)]
+
+    # Act
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    # Assert: 40 requests, 5 free, the other 35 at 200/s
+    assert elapsed >= 35 / 200 * 0.9
+    assert bucket.stats.requests == 40
+
+
+def test_coroutines_share_the_same_bucket():
+    # Arrange
+    bucket = TokenBucket(rate=100, burst=2)
+
+    async def run():
+        await asyncio.gather(*(bucket.acquire_async() for _ in range(12)))
+
+    # Act
+    start = time.monotonic()
+    asyncio.run(run())
+    elapsed = time.monotonic() - start
+
+    # Assert
+    assert elapsed >= 10 / 100 * 0.9
+    assert bucket.stats.delayed == 10
+
+
+def test_http_client_throttles_the_bucket_on_retry_after(stub_api):
+    # Arrange
+    bucket = TokenBucket(rate=50, burst=5)
+    stub_api.add(429, headers={"Retry-After": "0"})
+    stub_api.add(200, [{"type": "Person search"}])
+    client = HttpPoliceApiClient(base_url=stub_api.base_url, max_retries=2, backoff_factor=0, rate_limiter=bucket)
+
+    # Act
+    records = client.fetch_stops("metropolitan", "2023-01")
+
+    # Assert
+    assert records == [{"type": "Person search"}]
+    assert bucket.stats.throttled == 1
+    assert bucket.stats.requests == 2  # the retry took a token as well
+    assert bucket.rate == pytest.approx(25, rel=0.05)
+
+
+def test_async_client_throttles_and_reports_status_codes(stub_api):
+    # Arrange
+    bucket = TokenBucket(rate=50, burst=5)
+    stub_api.add(429, headers={"Retry-After": "0"})
+    stub_api.add(404)
+
+    async def run():
+        async with AsyncPoliceApiClient(base_url=stub_api.base_url, max_retries=2, backoff_factor=0,
+                                        rate_limiter=bucket) as client:
+            await client.fetch_stops("metropolitan", "2023-01")
+
+    # Act
+    with pytest.raises(ApiError) as exc_info:
+        asyncio.run(run())
+
+    # Assert
+    assert exc_info.value.status_code == 404
+    assert bucket.stats.throttled == 1
+    assert bucket.stats.requests == 2
@@ -0,0 +1,151 @@
+import gzip
+import os
+
+import pytest
+from unittest.mock import Mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from stopsearch_etl.archive import RawArchive
+from stopsearch_etl.etl_service import EtlService
+from stopsearch_etl.ledger import IngestionLedger, payload_hash
+from stopsearch_etl.replay import ReplayService
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository
+
+
+def raw_month(count, day=15, month="2023-01"):
+    return [
+        {
+            "type": "Person search",
+            "datetime": f"{month}-{day:02d}T{i % 24:02d}:{i % 60:02d}:00+00:00",
+            "gender": "Male",
+            "legislation": "Misuse of Drugs Act 1971 (section 23)",
+            "outcome": "Arrest",
+            "location": {"latitude": "51.5", "longitude": "-0.12", "street": {"id": i, "name": "High St"}},
+        }
+        for i in range(count)
+    ]
+
+
+def database():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    return session, SqliteStopSearchRepository(session), IngestionLedger(session)
+
+
+def test_archive_is_content_addressed_by_payload_hash(tmp_path):
+    # Arrange
+    archive = RawArchive(str(tmp_path), "gzip")
+    payload = raw_month(5)
+
+    # Act
+    first = archive.put("metropolitan", "2023-01", payload)
+    second = archive.put("kent", "2023-01", payload)  # same bytes, another force-month
+
+    # Assert
+    assert first.sha256 == second.sha256 == payload_hash(payload)
+    objects = [name for _, _, names in os.walk(tmp_path / "objects") for name in names]
+    assert objects == [f"{first.sha256}.jsonl.gz"]
+    assert [(e.force, e.record_count) for e in archive.entries()] == [("kent", 5), ("metropolitan", 5)]
+    assert list(archive.read(first)) == payload
+
+
+@pytest.mark.parametrize("codec", ["gzip", "lzma"])
+def test_archive_round_trips_each_codec(tmp_path, codec):
+    # Arrange
+    archive = RawArchive(str(tmp_path), codec)
+    payload = raw_month(3)
+
+    # Act
+    entry = archive.put("metropolitan", "2023-01", payload)
+
+    # Assert
+    assert entry.codec == codec
+    assert list(RawArchive(str(tmp_path)).read(entry)) == payload
+
+
+def test_latest_manifest_line_wins_and_damage_is_detected(tmp_path):
+    # Arrange
+    archive = RawArchive(str(tmp_path), "gzip")
+    archive.put("metropolitan", "2023-01", raw_month(2))
+    entry = archive.put("metropolitan", "2023-01", raw_month(4))  # month republished
+    with open(archive.manifest_path, "a") as manifest:
+        manifest.write('{"force": "kent", "mon')  # crash mid-append
+
+    # Act
+    entries = archive.entries()
+    with gzip.open(archive.object_path(entry.sha256, "gzip"), "wb") as damaged:
+        damaged.write(b'{"type": "tampered"}\n')
+
+    # Assert
+    assert [(e.month, e.record_count) for e in entries] == [("2023-01", 4)]
+    with pytest.raises(ValueError):
+        list(archive.read(entry))
+
+
+def test_etl_service_archives_streamed_and_whole_months(tmp_path):
+    # Arrange
+    archive = RawArchive(str(tmp_path), "gzip")
+    api_client = Mock()
+    api_client.fetch_stops.return_value = raw_month(3)
+    api_client.iter_stops.side_effect = lambda force, month: iter(raw_month(7, day=20))
+    session, repository, ledger = database()
+
+    # Act
+    EtlService(api_client, repository, ledger=ledger, archive=archive) \
+        .extract_transform_load("metropolitan", "2023-01")
+    EtlService(api_client, repository, ledger=ledger, archive=archive, stream_chunk_size=2) \
+        .extract_transform_load("kent", "2023-01")
+
+    # Assert
+    entries = {entry.force: entry for entry in archive.entries()}
+    assert entries["metropolitan"].record_count == 3
+    assert entries["kent"].record_count == 7
+    loaded = ledger.entries_for("kent")["2023-01"]
+    assert loaded.payload_hash == entries["kent"].sha256
+    assert os.listdir(tmp_path / "tmp") == []
+
+
+def test_failed_stream_leaves_nothing_in_the_archive(tmp_path):
+    # Arrange
+    archive = RawArchive(str(tmp_path), "gzip")
+
+    def broken_stream(force, month):
+        yield raw_month(1)[0]
+        raise ConnectionError("connection reset")
+
+    api_client = Mock()
+    api_client.iter_stops.side_effect = broken_stream
+    session, repository, ledger = database()
+    etl_service = EtlService(api_client, repository, archive=archive, stream_chunk_size=10)
+
+    # Act
+    with pytest.raises(ConnectionError):
+        etl_service.extract_transform_load("metropolitan", "2023-01")
+
+    # Assert
+    assert archive.entries() == []
+    assert os.listdir(tmp_path / "tmp") == []
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_replay_rebuilds_database_without_the_api(tmp_path, workers):
+    # Arrange
+    archive = RawArchive(str(tmp_path), "gzip")
+    archive.put("metropolitan", "2023-01", raw_month(6))
+    archive.put("metropolitan", "2023-02", raw_month(4, month="2023-02"))
+    archive.put("kent", "2023-01", raw_month(2, day=17))
+    api_client = Mock()
+    session, repository, ledger = database()
+    etl_service = EtlService(api_client, repository, ledger=ledger)
+
+    # Act
+    result = ReplayService(archive, etl_service, max_workers=workers).replay(["metropolitan"])
+
+    # Assert
+    assert (result.months_replayed, result.total_records, result.months_failed) == (2, 10, 0)
+    assert len(repository.find_by_force_and_month("metropolitan", "2023-01")) == 6
+    assert set(ledger.entries_for("metropolitan")) == {"2023-01", "2023-02"}
+    assert ledger.entries_for("kent") == {}
+    assert not api_client.method_calls
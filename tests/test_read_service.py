@@ -171,4 +171,29 @@ def test_read_service_gets_records_by_location_proximity(setup_read_service_with
     assert len(nearby_records) >= 1  # Should find at least some records
     # All returned records should have coordinates
     assert all(record.latitude is not None and record.longitude is not None
-              for record in nearby_records)
\ No newline at end of file
+              for record in nearby_records)
+
+def test_read_service_month_range_is_half_open(setup_read_service_with_data): # edges of december
+    # Arrange
+    read_service, repository = setup_read_service_with_data
+    edge = dict(
+        gender=None, age_range=None, self_defined_ethnicity=None, officer_defined_ethnicity=None,
+        legislation="", object_of_search=None, outcome=None, outcome_linked_to_object_of_search=None,
+        removal_of_more_than_outer_clothing=None, latitude=51.5, longitude=-0.1,
+        street_id=None, street_name=None,
+    )
+    repository.save_batch([
+        StopSearchRecord(type="Person search", datetime=datetime(2022, 12, 1, 0, 0), **edge),
+        StopSearchRecord(type="Person search", datetime=datetime(2022, 12, 31, 23, 59, 59, 999999), **edge),
+        StopSearchRecord(type="Person search", datetime=datetime(2023, 1, 1, 0, 0), **edge),
+        StopSearchRecord(type="Person search", datetime=datetime(2022, 11, 30, 23, 59, 59), **edge),
+    ])
+
+    # Act
+    december_records = read_service.get_records_by_month("2022-12")
+
+    # Assert
+    assert sorted(r.datetime for r in december_records) == [
+        datetime(2022, 12, 1, 0, 0), datetime(2022, 12, 31, 23, 59, 59, 999999)
+    ]
+    assert read_service.get_records_by_month("2022-13") == []  # invalid month
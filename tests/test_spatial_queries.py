@@ -0,0 +1,111 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from stopsearch_etl.domain import StopSearchRecord
+from stopsearch_etl.geo import haversine_km
+from stopsearch_etl.migrations import run_migrations
+from stopsearch_etl.read_service import ReadService
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository, StopSearchTable
+
+CHARING_CROSS = (51.5074, -0.1278)
+
+
+def _record(i, lat, lon):
+    return StopSearchRecord(
+        type="Person search", datetime=datetime(2023, 1, 1) + timedelta(minutes=i), gender=None,
+        age_range=None, self_defined_ethnicity=None, officer_defined_ethnicity=None, legislation="",
+        object_of_search=None, outcome=None, outcome_linked_to_object_of_search=None,
+        removal_of_more_than_outer_clothing=None, latitude=lat, longitude=lon,
+        street_id=None, street_name=None,
+    )
+
+
+def _grid():
+    """~20 km square of points around central London, plus one with no location"""
+    records = [
+        _record(i * 41 + j, 51.42 + i * 0.0045, -0.27 + j * 0.0072)
+        for i in range(41) for j in range(41)
+    ]
+    records.append(_record(99999, None, None))
+    return records
+
+
+@pytest.fixture(params=["rtree", "no_rtree"])
+def read_service(request):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    if request.param == "rtree":
+        run_migrations(engine)
+    session = sessionmaker(bind=engine)()
+    repository = SqliteStopSearchRepository(session)
+    repository.save_batch(_grid())
+    yield ReadService(repository)
+    session.close()
+
+
+def test_near_location_returns_exactly_the_points_in_the_circle(read_service):
+    # Arrange
+    lat, lon = CHARING_CROSS
+    expected = sorted(
+        (haversine_km(lat, lon, r.latitude, r.longitude), r.latitude, r.longitude)
+        for r in _grid() if r.latitude is not None and haversine_km(lat, lon, r.latitude, r.longitude) <= 2.0
+    )
+
+    # Act
+    records = read_service.get_records_near_location(lat, lon, radius_km=2.0)
+
+    # Assert: no bounding-box corners, nearest first
+    assert [(r.latitude, r.longitude) for r in records] == [(la, lo) for _, la, lo in expected]
+    assert len(records) > 0
+
+
+def test_nearest_records_returns_k_closest(read_service):
+    # Arrange
+    lat, lon = CHARING_CROSS
+    by_distance = sorted(
+        (haversine_km(lat, lon, r.latitude, r.longitude), r.latitude, r.longitude)
+        for r in _grid() if r.latitude is not None
+    )
+
+    # Act
+    nearest = read_service.get_nearest_records(lat, lon, k=25)
+
+    # Assert
+    assert [(r.latitude, r.longitude) for r in nearest] == [(la, lo) for _, la, lo in by_distance[:25]]
+
+
+def test_nearest_records_stops_at_max_radius(read_service):
+    # Act: middle of the North Sea, nothing within 10 km
+    nearest = read_service.get_nearest_records(54.0, 3.0, k=5, max_radius_km=10.0)
+
+    # Assert
+    assert nearest == []
+
+
+def test_spatial_index_follows_inserts_updates_and_deletes():
+    # Arrange
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    SqliteStopSearchRepository(session).save_batch([_record(1, 51.5, -0.1)])
+    run_migrations(engine)  # backfills the existing row
+    repository = SqliteStopSearchRepository(session)
+
+    def indexed():
+        return session.execute(text("SELECT count(*) FROM stop_search_rtree")).scalar()
+
+    # Act & Assert
+    assert indexed() == 1
+    repository.save_batch([_record(2, 51.6, -0.2), _record(3, None, None)])
+    assert indexed() == 2  # unlocated rows aren't indexed
+
+    session.query(StopSearchTable).filter_by(latitude=51.6).update({"latitude": 53.48, "longitude": -2.24})
+    session.commit()
+    assert ReadService(repository).get_records_near_location(53.48, -2.24, radius_km=0.1)[0].latitude == 53.48
+
+    session.query(StopSearchTable).delete()
+    session.commit()
+    assert indexed() == 0
+    session.close()
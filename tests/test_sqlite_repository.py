@@ -1,6 +1,6 @@
 import pytest
 from datetime import datetime
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
 from stopsearch_etl.domain import StopSearchRecord
@@ -48,7 +48,7 @@ def test_sqlite_repo_saves_single_record(in_memory_db):
 
     # Assert
     found_records = repo.find_by_force_and_month("test-force", "2023-01")
-    # Note: we're not storing force in record yet, so this will be empty
+    # Note: the record has no force, so nothing comes back for "test-force"
     # but the save should not have crashed
     assert isinstance(found_records, list)
 
@@ -80,4 +80,167 @@ def test_sqlite_repo_handles_duplicate_saves_idempotently(in_memory_db):
 
     # Assert
     # Should not raise an error and should handle the duplicate gracefully
-    assert True  # If we get here without exception, test passes
\ No newline at end of file
+    assert True  # If we get here without exception, test passes
+
+def _make_record(minute, street_name="High Street", force=None, day=15):
+    return StopSearchRecord(
+        type="Person search",
+        datetime=datetime(2023, 1, day, 14, minute),
+        gender="Male",
+        age_range="25-34",
+        self_defined_ethnicity=None,
+        officer_defined_ethnicity="White",
+        legislation="Police Act",
+        object_of_search="Drugs",
+        outcome="No action",
+        outcome_linked_to_object_of_search=False,
+        removal_of_more_than_outer_clothing=False,
+        latitude=51.5074,
+        longitude=-0.1278,
+        street_id=883407,
+        street_name=street_name,
+        force=force
+    )
+
+
+def test_save_batch_counts_only_new_rows_in_mixed_batch(in_memory_db): # 2 dupes + 3 new -> 3
+    # Arrange
+    repo = in_memory_db
+    repo.save_batch([_make_record(0), _make_record(1)])
+
+    # Act
+    saved = repo.save_batch([_make_record(minute) for minute in range(5)])
+
+    # Assert
+    assert saved == 3
+
+
+def test_save_batch_count_ignores_rows_from_other_writers(tmp_path): # another session writes in between
+    # Arrange
+    engine = create_engine(f"sqlite:///{tmp_path / 'shared.db'}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    repo = SqliteStopSearchRepository(Session())
+    other_writer = SqliteStopSearchRepository(Session())
+
+    # Act
+    first = repo.save_batch([_make_record(0)])
+    other_writer.save_batch([_make_record(minute) for minute in range(10, 20)])
+    second = repo.save_batch([_make_record(0), _make_record(1)])
+
+    # Assert
+    assert first == 1
+    assert second == 1  # only our new row, not the other writer's 10
+
+
+def test_save_batch_does_not_scan_table(in_memory_db): # no count(*) around the insert
+    # Arrange
+    from sqlalchemy import event
+    repo = in_memory_db
+    statements = []
+    engine = repo.session.get_bind()
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    # Act
+    repo.save_batch([_make_record(0), _make_record(1)])
+
+    # Assert
+    assert statements
+    assert not any("count(" in statement.lower() for statement in statements)
+
+
+def test_same_stop_in_two_forces_is_kept_twice(in_memory_db): # dedupe is per force
+    # Arrange
+    repo = in_memory_db
+
+    # Act
+    saved = repo.save_batch([_make_record(0, force="metropolitan"), _make_record(0, force="city-of-london")])
+    again = repo.save_batch([_make_record(0, force="metropolitan")])
+
+    # Assert
+    assert saved == 2
+    assert again == 0
+
+
+def test_find_by_force_and_month_returns_only_that_force_month(in_memory_db):
+    # Arrange
+    repo = in_memory_db
+    repo.save_batch([
+        _make_record(5, force="metropolitan", day=31),
+        _make_record(0, force="metropolitan", day=1),
+        _make_record(1, force="kent", day=2),
+    ])
+    repo.save_batch([
+        StopSearchRecord(
+            type="Person search", datetime=datetime(2023, 2, 1, 0, 0), gender=None, age_range=None,
+            self_defined_ethnicity=None, officer_defined_ethnicity=None, legislation="",
+            object_of_search=None, outcome=None, outcome_linked_to_object_of_search=None,
+            removal_of_more_than_outer_clothing=None, latitude=None, longitude=None,
+            street_id=None, street_name=None, force="metropolitan",
+        )
+    ])
+
+    # Act
+    found = repo.find_by_force_and_month("metropolitan", "2023-01")
+
+    # Assert
+    assert [(r.force, r.datetime.day) for r in found] == [("metropolitan", 1), ("metropolitan", 31)]
+    assert repo.find_by_force_and_month("metropolitan", "not-a-month") == []
+
+
+def test_save_batch_stores_values_the_same_way_as_save(in_memory_db):
+    # Arrange: save() goes through SQLAlchemy, save_batch() straight through the driver
+    repo = in_memory_db
+    record = StopSearchRecord.from_api_data({
+        "type": "Person search", "datetime": "2023-01-15T14:30:00+01:00", "legislation": "Police Act",
+        "outcome_linked_to_object_of_search": True,
+        "location": {"latitude": "51.5", "longitude": "-0.12", "street": {"id": 7, "name": "High St"}},
+    }, force="metropolitan")
+    repo.save(record)
+
+    # Act
+    saved = repo.save_batch([record])
+    found = repo.find_by_force_and_month("metropolitan", "2023-01")
+
+    # Assert
+    assert saved == 0  # same stored datetime/coordinates -> caught by the unique constraint
+    assert len(found) == 1
+    assert found[0].datetime == datetime(2023, 1, 15, 14, 30)
+    assert (found[0].latitude, found[0].outcome_linked_to_object_of_search, found[0].street_id) == (51.5, True, 7)
+
+
+def test_categorical_columns_are_stored_once_as_ids(in_memory_db):
+    # Arrange
+    repo = in_memory_db
+    records = [_make_record(minute) for minute in range(10)]
+
+    # Act
+    repo.save_batch(records)
+
+    # Assert: 10 rows, but each distinct string only once in category_values
+    values = repo.session.execute(text("SELECT category, value FROM category_values")).all()
+    assert sorted(values) == sorted([
+        ("type", "Person search"), ("gender", "Male"), ("age_range", "25-34"),
+        ("officer_defined_ethnicity", "White"), ("legislation", "Police Act"),
+        ("object_of_search", "Drugs"), ("outcome", "No action"),
+    ])
+    found = repo.find_by_force_and_month("", "2023-01")
+    assert len(found) == 10 and found[0].outcome == "No action"
+    assert found[0].outcome is found[9].outcome  # decoded strings are shared
+
+
+def test_failed_batch_forgets_category_ids_it_added(in_memory_db):
+    # Arrange
+    repo = in_memory_db
+    broken = _make_record(1)
+    broken.datetime = "not a datetime"  # blows up building the insert parameters
+
+    # Act
+    with pytest.raises(Exception):
+        repo.save_batch([_make_record(0), broken])
+
+    # Assert: the rollback took the new category rows with it, and the cache agrees
+    assert repo.session.execute(text("SELECT count(*) FROM category_values")).scalar() == 0
+    assert repo.save_batch([_make_record(0)]) == 1
+    assert repo.find_by_force_and_month("", "2023-01")[0].type == "Person search"
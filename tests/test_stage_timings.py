@@ -0,0 +1,147 @@
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from stopsearch_etl.etl_service import EtlService
+from stopsearch_etl.metrics import MetricsCollector
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository
+from stopsearch_etl.timing import LatencyHistogram, stage, timed
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def slow_api(delay=0.01):
+    api_client = Mock()
+
+    def fetch_stops(force, month):
+        with stage("fetch"):
+            time.sleep(delay)
+        with stage("decode"):
+            return [{"type": "Person search", "datetime": f"{month}-15T10:{i:02d}:00+00:00",
+                     "legislation": force} for i in range(5)]
+
+    api_client.fetch_stops.side_effect = fetch_stops
+    return api_client
+
+
+def test_nested_stages_only_charge_their_own_time():
+    # Arrange / Act
+    with timed() as timer:
+        with stage("fetch"):
+            time.sleep(0.02)
+            with stage("decode"):
+                time.sleep(0.03)
+
+    # Assert
+    assert 0.02 <= timer.seconds["fetch"] < 0.03
+    assert timer.seconds["decode"] >= 0.03
+
+
+def test_stage_outside_a_timed_block_does_nothing():
+    # Act
+    with stage("fetch"):
+        pass
+
+    # Assert: nothing to check beyond "didn't raise"; inner timers are unaffected
+    with timed() as timer:
+        pass
+    assert timer.seconds == {}
+
+
+def test_histogram_percentiles_are_within_one_bucket():
+    # Arrange
+    histogram = LatencyHistogram()
+
+    # Act: 1 ms .. 1000 ms, evenly spread
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000)
+
+    # Assert
+    assert histogram.count == 1000
+    for p, expected in [(50, 0.5), (95, 0.95), (99, 0.99)]:
+        assert expected <= histogram.percentile(p) <= expected * 2 ** 0.125
+    assert histogram.percentile(100) == histogram.max == 1.0
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_extract_transform_load_records_per_stage_percentiles_per_force(session):
+    # Arrange
+    collector = MetricsCollector()
+    etl_service = EtlService(slow_api(), SqliteStopSearchRepository(session), collector)
+
+    # Act
+    for month in ("2023-01", "2023-02", "2023-03"):
+        etl_service.extract_transform_load("metropolitan", month)
+    etl_service.extract_transform_load("kent", "2023-01")
+
+    # Assert
+    summaries = collector.get_stage_summaries()
+    assert list(summaries) == ["kent", "metropolitan"]
+    metropolitan = summaries["metropolitan"]
+    assert list(metropolitan) == ["fetch", "decode", "transform", "load", "commit"]
+    assert metropolitan["fetch"].count == 3
+    assert metropolitan["fetch"].p50 >= 0.01
+    assert metropolitan["fetch"].p99 >= metropolitan["fetch"].p50
+    assert collector.get_stage_summaries("kent")["kent"]["commit"].count == 1
+
+
+def test_load_many_combines_worker_and_writer_timings(session):
+    # Arrange
+    collector = MetricsCollector()
+    etl_service = EtlService(slow_api(), SqliteStopSearchRepository(session), collector)
+    months = [etl_service.extract_transform("metropolitan", month) for month in ("2023-01", "2023-02")]
+
+    # Act
+    etl_service.load_many(months)
+
+    # Assert
+    stages = collector.get_stage_summaries("metropolitan")["metropolitan"]
+    assert {name: summary.count for name, summary in stages.items()} == {
+        "fetch": 2, "decode": 2, "transform": 2, "load": 2, "commit": 2
+    }
+
+
+def test_streamed_months_report_the_parse_thread_stages_too(session):
+    # Arrange
+    collector = MetricsCollector()
+    api_client = Mock()
+    api_client.iter_stops.side_effect = lambda force, month: (
+        {"type": "Person search", "datetime": f"{month}-15T10:{i:02d}:00+00:00"} for i in range(5)
+    )
+    etl_service = EtlService(api_client, SqliteStopSearchRepository(session), collector, stream_chunk_size=2)
+
+    # Act
+    etl_service.extract_transform_load("metropolitan", "2023-01")
+
+    # Assert
+    stages = collector.get_stage_summaries("metropolitan")["metropolitan"]
+    assert set(stages) == {"fetch", "transform", "load", "commit"}
+    assert stages["commit"].count == 1  # one month, however many chunks
+
+
+@patch('stopsearch_etl.metrics.logger')
+def test_log_summary_includes_stage_percentiles(mock_logger):
+    # Arrange
+    collector = MetricsCollector()
+    collector.record_stage_timings("metropolitan", {"fetch": 0.2, "commit": 0.01})
+
+    # Act
+    collector.log_summary()
+
+    # Assert
+    message, = [call for call in mock_logger.info.call_args_list if call[0][0] == "Stage timings"]
+    extra = message[1]["extra"]
+    assert extra["force"] == "metropolitan"
+    assert extra["fetch_count"] == 1
+    assert 200 <= extra["fetch_p95_ms"] <= 200 * 2 ** 0.125
+    assert "commit_p99_ms" in extra
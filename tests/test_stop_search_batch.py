@@ -0,0 +1,129 @@
+import logging
+import math
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from stopsearch_etl.batch import StopSearchBatch
+from stopsearch_etl.domain import RECORD_FIELDS, StopSearchRecord
+from stopsearch_etl.logging_setup import RECORDS_LOGGER
+from stopsearch_etl.sqlite_repository import SqliteStopSearchRepository, Base
+
+
+def _raw(day, **overrides):
+    record = {
+        "type": "Person search",
+        "datetime": f"2023-01-{day:02d}T10:00:00+00:00",
+        "gender": "Male",
+        "legislation": "Police and Criminal Evidence Act 1984 (section 1)",
+        "outcome_linked_to_object_of_search": False,
+        "location": {"latitude": "51.5", "longitude": "-0.12", "street": {"id": day, "name": "High St"}},
+    }
+    record.update(overrides)
+    return record
+
+
+@pytest.fixture
+def repo():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield SqliteStopSearchRepository(session)
+    session.close()
+
+
+def test_batch_from_api_data_matches_record_by_record_transform():
+    # Arrange
+    raw = [_raw(1), _raw(2, gender=None), {"datetime": "2023-01-03T09:00:00Z"}]
+
+    # Act
+    batch = StopSearchBatch.from_api_data(raw, force="metropolitan")
+
+    # Assert - same values as from_api_data, just with coordinates as numbers
+    expected = [StopSearchRecord.from_api_data(r, "metropolitan") for r in raw]
+    for record in expected:
+        record.latitude = float(record.latitude) if record.latitude is not None else None
+        record.longitude = float(record.longitude) if record.longitude is not None else None
+    assert len(batch) == 3
+    assert batch.records() == expected
+    assert list(batch.to_columns()) == list(RECORD_FIELDS)
+
+
+def test_batch_validates_each_column(caplog):
+    # Arrange
+    raw = [
+        _raw(1),
+        {"type": "Person search"},  # no datetime
+        _raw(2, datetime="not a date"),
+        _raw(3, location=None),  # the API sends null for unlocated stops
+        _raw(4, location={"latitude": "123.0", "longitude": "abc"}),
+    ]
+
+    # Act
+    with caplog.at_level(logging.WARNING, logger=RECORDS_LOGGER):
+        batch = StopSearchBatch.from_api_data(raw)
+
+    # Assert
+    assert batch.rejected == 2
+    [skipped] = caplog.records  # per-record noise goes to the sampled records logger
+    assert (skipped.name, skipped.records_rejected) == (RECORDS_LOGGER, 2)
+    assert [d.day for d in batch.columns["datetime"]] == [1, 3, 4]
+    assert batch.to_columns()["latitude"] == [51.5, None, None]  # 123 isn't a latitude
+    assert batch.to_columns()["longitude"] == [-0.12, None, None]
+    assert batch.columns["street_id"] == [1, None, None]
+
+
+def test_batch_rejects_mismatched_columns():
+    # Act & Assert
+    with pytest.raises(ValueError, match="columns"):
+        StopSearchBatch({"type": []})
+
+    columns = {name: [] for name in RECORD_FIELDS}
+    columns["type"] = ["Person search"]
+    with pytest.raises(ValueError, match="length"):
+        StopSearchBatch(columns)
+
+
+def test_save_batch_accepts_a_columnar_batch(repo):
+    # Arrange
+    raw = [_raw(day) for day in range(1, 6)]
+    repo.save_batch([StopSearchRecord.from_api_data(raw[0], "metropolitan")])  # object path
+
+    # Act
+    saved = repo.save_batch(StopSearchBatch.from_api_data(raw, "metropolitan"))
+    again = repo.save_batch(StopSearchBatch.from_api_data(raw, "metropolitan"))
+
+    # Assert - both paths store identical values, so the first day is a duplicate
+    assert (saved, again) == (4, 0)
+    found = repo.find_by_force_and_month("metropolitan", "2023-01")
+    assert [(r.datetime, r.latitude) for r in found][:1] == [(datetime(2023, 1, 1, 10, 0), 51.5)]
+    assert len(found) == 5
+
+
+def test_batch_round_trips_through_records():
+    # Arrange
+    records = StopSearchBatch.from_api_data([_raw(1), _raw(2, location={})], "kent").records()
+
+    # Act
+    batch = StopSearchBatch.from_records(records)
+
+    # Assert
+    assert batch.records() == records
+    assert math.isnan(batch.columns["latitude"][1])
+    assert len(StopSearchBatch.from_records([])) == 0
+
+
+def test_batch_to_numpy_exports_typed_columns():
+    # Arrange
+    np = pytest.importorskip("numpy")
+    batch = StopSearchBatch.from_api_data([_raw(1), _raw(2, location=None)], "metropolitan")
+
+    # Act
+    arrays = batch.to_numpy()
+
+    # Assert
+    assert arrays["latitude"].dtype == np.float64
+    assert np.isnan(arrays["latitude"][1])
+    assert arrays["datetime"][0] == np.datetime64(datetime(2023, 1, 1, 10, 0).replace(tzinfo=None))
+    assert list(arrays["force"]) == ["metropolitan", "metropolitan"]
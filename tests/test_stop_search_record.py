@@ -1,6 +1,6 @@
 from datetime import datetime
 import pytest
-from stopsearch_etl.domain import StopSearchRecord
+from stopsearch_etl.domain import RECORD_FIELDS, StopSearchRecord
 
 
 def test_stop_search_record_creation_with_valid_data():
@@ -55,4 +55,30 @@ def test_stop_search_record_handles_missing_fields():
     assert record.gender is None
 
     # legislation falls back to empty string
-    assert record.legislation == ""
\ No newline at end of file
+    assert record.legislation == ""
+
+def test_stop_search_record_takes_force_from_caller():
+    # Arrange: the API payload itself never says which force it came from
+    record_data = {"type": "Person search", "datetime": "2023-02-01T00:00:00Z"}
+
+    # Act
+    record = StopSearchRecord.from_api_data(record_data, force="metropolitan")
+
+    # Assert
+    assert record.force == "metropolitan"
+    assert StopSearchRecord.from_api_data(record_data).force is None
+
+def test_stop_search_record_is_slotted_and_round_trips_as_tuple():
+    # Arrange
+    record = StopSearchRecord.from_api_data(
+        {"type": "Person search", "datetime": "2023-02-01T00:00:00Z", "location": {"latitude": "51.5"}},
+        force="metropolitan",
+    )
+
+    # Act
+    values = record.as_tuple()
+
+    # Assert
+    assert not hasattr(record, "__dict__")  # no per-instance dict
+    assert values == tuple(getattr(record, name) for name in RECORD_FIELDS)
+    assert StopSearchRecord(*values) == record
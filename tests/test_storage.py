@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from stopsearch_etl.domain import StopSearchRecord
+from stopsearch_etl.sqlite_repository import Base, SqliteStopSearchRepository
+from stopsearch_etl.storage import create_database_engine
+
+
+def _records(count, start=datetime(2023, 1, 1)):
+    return [
+        StopSearchRecord(
+            type="Person search", datetime=start + timedelta(minutes=i), gender=None, age_range=None,
+            self_defined_ethnicity=None, officer_defined_ethnicity=None, legislation="",
+            object_of_search=None, outcome=None, outcome_linked_to_object_of_search=None,
+            removal_of_more_than_outer_clothing=None, latitude=51.5, longitude=-0.1,
+            street_id=None, street_name=None,
+        )
+        for i in range(count)
+    ]
+
+
+def _pragma(engine, name):
+    with engine.connect() as connection:
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+@pytest.mark.parametrize("profile, journal_mode, synchronous", [
+    ("bulk", "wal", 1),  # NORMAL
+    ("safe", "wal", 2),  # FULL
+])
+def test_sqlite_profile_sets_pragmas_on_connect(tmp_path, profile, journal_mode, synchronous):
+    # Arrange
+    engine = create_database_engine(f"sqlite:///{tmp_path / 'etl.db'}", profile)
+
+    # Act & Assert
+    assert _pragma(engine, "journal_mode") == journal_mode
+    assert _pragma(engine, "synchronous") == synchronous
+    assert _pragma(engine, "busy_timeout") == 30000
+    assert _pragma(engine, "temp_store") == 2  # MEMORY
+    engine.dispose()
+
+
+def test_readonly_profile_refuses_writes(tmp_path):
+    # Arrange
+    db_url = f"sqlite:///{tmp_path / 'etl.db'}"
+    writer = create_database_engine(db_url, "bulk")
+    Base.metadata.create_all(writer)
+    reader = create_database_engine(db_url, "readonly")
+
+    # Act & Assert
+    with reader.connect() as connection:
+        assert connection.execute(text("SELECT count(*) FROM stop_search_records")).scalar() == 0
+        with pytest.raises(OperationalError):
+            connection.execute(text("DELETE FROM stop_search_records"))
+    writer.dispose()
+    reader.dispose()
+
+
+def test_reader_keeps_working_while_the_etl_writes(tmp_path): # WAL: open read snapshot doesn't block commits
+    # Arrange
+    db_url = f"sqlite:///{tmp_path / 'etl.db'}"
+    writer_engine = create_database_engine(db_url, "bulk")
+    Base.metadata.create_all(writer_engine)
+    writer_session = sessionmaker(bind=writer_engine)()
+    repository = SqliteStopSearchRepository(writer_session)
+    repository.save_batch(_records(10))
+
+    reader_engine = create_database_engine(db_url, "readonly")
+    reader = reader_engine.connect()
+    reader.exec_driver_sql("BEGIN")
+    before = reader.execute(text("SELECT count(*) FROM stop_search_records")).scalar()
+
+    # Act: writer commits while the reader still holds its read transaction
+    # (in rollback-journal mode this commit would wait on the reader's lock)
+    saved = repository.save_batch(_records(5, start=datetime(2023, 2, 1)))
+    during = reader.execute(text("SELECT count(*) FROM stop_search_records")).scalar()
+    reader.exec_driver_sql("COMMIT")
+    after = reader.execute(text("SELECT count(*) FROM stop_search_records")).scalar()
+
+    # Assert
+    assert saved == 5
+    assert (before, during, after) == (10, 10, 15)  # reader sees a stable snapshot, then the new rows
+    reader.close()
+    writer_session.close()
+    reader_engine.dispose()
+
@@ -0,0 +1,67 @@
+import pytest
+from datetime import datetime
+
+from stopsearch_etl.timestamps import PARSE_CACHE_SIZE, parse_api_datetime, parse_api_datetimes
+
+SAMPLES = [
+    "2023-01-15T14:30:00+00:00",
+    "2023-01-15T14:30:00Z",
+    "2023-06-01T00:00:00+01:00",
+    "2023-06-01T09:15:30.250000+00:00",
+    "2023-06-01T09:15:30.25Z",
+    "2023-06-01T09:15:30",
+    "2023-06-01",
+    "2023-06-01 09:15:30-05:30",
+]
+BAD = ["", "not a date", "2023-13-01T00:00:00+00:00", "2023-01-01TZ", "Z2023-01-01", "2023-01-01T00:00:00ZZ"]
+
+
+def _reference(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+@pytest.mark.parametrize("value", SAMPLES)
+def test_parse_api_datetime_matches_fromisoformat(value):
+    # Act
+    parsed = parse_api_datetime(value)
+
+    # Assert - same value and same offset, not just the same instant
+    assert parsed == _reference(value)
+    assert parsed.utcoffset() == _reference(value).utcoffset()
+
+
+@pytest.mark.parametrize("value", BAD)
+def test_parse_api_datetime_rejects_what_fromisoformat_rejects(value):
+    # Act & Assert
+    with pytest.raises(ValueError):
+        _reference(value)
+    with pytest.raises(ValueError):
+        parse_api_datetime(value)
+
+
+def test_parse_api_datetime_cache_is_bounded_and_reused():
+    # Arrange
+    parse_api_datetime.cache_clear()
+
+    # Act
+    first = parse_api_datetime("2023-01-15T14:30:00+00:00")
+    second = parse_api_datetime("2023-01-15T14:30:00+00:00")
+
+    # Assert
+    assert first is second
+    info = parse_api_datetime.cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (1, 1, PARSE_CACHE_SIZE)
+
+
+def test_parse_api_datetimes_parses_a_column():
+    # Arrange
+    column = ["2023-01-15T14:30:00Z", None, "garbage", 20230115, "2023-01-15T14:30:00Z", "2023-01-16T08:00:00+00:00"]
+
+    # Act
+    parsed = parse_api_datetimes(column)
+
+    # Assert
+    assert parsed[1:4] == [None, None, None]
+    assert parsed[0] == parsed[4] == _reference("2023-01-15T14:30:00Z")
+    assert parsed[0] is parsed[4]
+    assert parsed[5] == _reference("2023-01-16T08:00:00+00:00")
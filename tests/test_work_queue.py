@@ -0,0 +1,172 @@
+import pytest
+import sys
+from unittest.mock import Mock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from stopsearch_etl.backfill_service import BackfillService, BackfillResult
+from stopsearch_etl.concurrent_etl import ConcurrentEtlService
+from stopsearch_etl.etl_service import ExtractedMonth
+from stopsearch_etl.sqlite_repository import Base
+from stopsearch_etl.work_queue import BackfillWorkQueue, DONE, FAILED, PENDING, RUNNING
+
+
+def _failing_on(bad_month, returns):
+    def etl_side_effect(force, month):
+        if month == bad_month:
+            raise Exception("Network timeout")
+        return returns
+    return etl_side_effect
+
+
+@pytest.fixture
+def work_queue():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield BackfillWorkQueue(session)
+    session.close()
+
+
+def test_work_queue_tracks_task_states_and_attempts(work_queue):
+    # Arrange
+    work_queue.enqueue("metropolitan", ["2023-01", "2023-02", "2023-03"])
+
+    # Act
+    work_queue.mark_running("metropolitan", "2023-01")
+    work_queue.mark_done("metropolitan", "2023-01")
+    work_queue.mark_running("metropolitan", "2023-02")
+    work_queue.mark_failed("metropolitan", "2023-02", "HTTP error 500")
+
+    # Assert
+    tasks = {task.month: task for task in work_queue.tasks_for("metropolitan")}
+    assert tasks["2023-01"].state == DONE
+    assert tasks["2023-02"].state == FAILED
+    assert tasks["2023-02"].last_error == "HTTP error 500"
+    assert tasks["2023-02"].attempts == 1
+    assert tasks["2023-03"].state == PENDING
+    assert work_queue.failed_forces() == ["metropolitan"]
+
+
+def test_work_queue_requeue_keeps_attempt_count(work_queue):
+    # Arrange
+    work_queue.enqueue("metropolitan", ["2023-01"])
+    work_queue.mark_running("metropolitan", "2023-01")
+    work_queue.mark_failed("metropolitan", "2023-01", "boom")
+
+    # Act
+    work_queue.enqueue("metropolitan", ["2023-01"])
+    work_queue.mark_running("metropolitan", "2023-01")
+
+    # Assert
+    task = work_queue.tasks_for("metropolitan")[0]
+    assert task.state == RUNNING
+    assert task.attempts == 2
+
+
+def test_backfill_resume_picks_up_after_crash(work_queue): # dies on 2nd month, resume runs the rest
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_available_months.return_value = ["2023-03", "2023-02", "2023-01"]
+    mock_etl_service = Mock()
+
+    def crash_on_february(force, month):
+        if month == "2023-02":
+            raise KeyboardInterrupt  # process killed mid-month
+        return 10
+
+    mock_etl_service.extract_transform_load.side_effect = crash_on_february
+    backfill_service = BackfillService(mock_api_client, mock_etl_service, work_queue=work_queue)
+
+    with pytest.raises(KeyboardInterrupt):
+        backfill_service.backfill_force("metropolitan")
+
+    mock_etl_service.extract_transform_load.side_effect = None
+    mock_etl_service.extract_transform_load.return_value = 10
+    mock_etl_service.extract_transform_load.reset_mock()
+
+    # Act
+    result = backfill_service.resume_force("metropolitan")
+
+    # Assert
+    assert result.months_processed == 2
+    resumed = [c.args[1] for c in mock_etl_service.extract_transform_load.call_args_list]
+    assert resumed == ["2023-02", "2023-01"]  # interrupted month first, 2023-03 not redone
+    assert work_queue.unfinished_months("metropolitan") == []
+
+
+def test_backfill_retry_failed_runs_only_failed_months(work_queue):
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_available_months.return_value = ["2023-03", "2023-02", "2023-01"]
+    mock_etl_service = Mock()
+    mock_etl_service.extract_transform_load.side_effect = _failing_on("2023-02", returns=10)
+    backfill_service = BackfillService(mock_api_client, mock_etl_service, work_queue=work_queue)
+    first = backfill_service.backfill_force("metropolitan")
+
+    mock_etl_service.extract_transform_load.side_effect = None
+    mock_etl_service.extract_transform_load.return_value = 7
+    mock_etl_service.extract_transform_load.reset_mock()
+
+    # Act
+    result = backfill_service.retry_failed("metropolitan")
+
+    # Assert
+    assert first.months_failed == 1
+    assert result.months_processed == 1
+    assert result.total_records == 7
+    mock_etl_service.extract_transform_load.assert_called_once_with("metropolitan", "2023-02")
+    assert work_queue.failed_months("metropolitan") == []
+
+
+def test_concurrent_etl_records_progress_in_work_queue(work_queue):
+    # Arrange
+    mock_api_client = Mock()
+    mock_api_client.get_available_months.return_value = ["2023-02", "2023-01"]
+    mock_etl_service = Mock()
+    mock_etl_service.extract_transform.side_effect = _failing_on(
+        "2023-01", returns=ExtractedMonth("metropolitan", "2023-02", [], 5)
+    )
+    mock_etl_service.load_many.side_effect = lambda months, **kwargs: [5 for _ in months]
+    service = ConcurrentEtlService(mock_api_client, mock_etl_service, max_workers=2, work_queue=work_queue)
+
+    # Act
+    service.backfill_force_concurrent("metropolitan")
+
+    # Assert
+    states = {task.month: task.state for task in work_queue.tasks_for("metropolitan")}
+    assert states == {"2023-02": DONE, "2023-01": FAILED}
+
+
+@patch('stopsearch_etl.cli.setup_application')
+def test_main_executes_backfill_resume(mock_setup):
+    # Arrange
+    from stopsearch_etl.cli import main
+    mock_backfill_service = Mock()
+    mock_backfill_service.resume_force.return_value = BackfillResult("metropolitan", 10, 1)
+    mock_setup.return_value = (None, None, mock_backfill_service, None, None)
+
+    # Act
+    with patch.object(sys, 'argv', ['cli.py', 'backfill', '--force', 'metropolitan', '--resume']):
+        main()
+
+    # Assert
+    mock_backfill_service.resume_force.assert_called_once_with('metropolitan')
+    mock_backfill_service.backfill_force.assert_not_called()
+
+
+@patch('stopsearch_etl.cli.setup_application')
+def test_main_retry_failed_defaults_to_forces_with_failures(mock_setup):
+    # Arrange
+    from stopsearch_etl.cli import main
+    mock_backfill_service = Mock()
+    mock_backfill_service.work_queue.failed_forces.return_value = ["kent", "metropolitan"]
+    mock_backfill_service.retry_failed.return_value = BackfillResult("kent", 0, 1)
+    mock_setup.return_value = (None, None, mock_backfill_service, None, None)
+
+    # Act
+    with patch.object(sys, 'argv', ['cli.py', 'retry-failed']):
+        main()
+
+    # Assert
+    assert [c.args[0] for c in mock_backfill_service.retry_failed.call_args_list] == ["kent", "metropolitan"]